@@ -0,0 +1,55 @@
+import os
+import time
+
+from pm4py.algo.conformance.alignments import factory as align_factory
+from pm4py.algo.discovery.inductive import factory as inductive_miner
+from pm4py.algo.filtering.tracelog.variants import variants_filter
+from pm4py.objects.log.importer.xes import factory as xes_importer
+
+LOGS = ["08_receipt.xes.gz", "06_bpic2013_incidents.xes.gz", "07_bpic2013_problems.xes.gz"]
+VERSIONS = [align_factory.VERSION_STATE_EQUATION_A_STAR, align_factory.VERSION_EXTENDED_MARKING_EQUATION_A_STAR,
+            align_factory.VERSION_REACHABILITY_GRAPH_DIJKSTRA]
+
+
+def execute_script(logs=None, versions=None, max_variants=None):
+    """
+    Benchmarks the alignments versions on some logs: for each log, a model is discovered with the inductive miner
+    and the variants of the log are aligned against it (each variant once)
+
+    Parameters
+    -------------
+    logs
+        Names of the logs (in tests/compressed_input_data) to use
+    versions
+        Versions of the alignments to benchmark
+    max_variants
+        If provided, only the most frequent variants are aligned
+    """
+    if logs is None:
+        logs = LOGS
+    if versions is None:
+        versions = VERSIONS
+    for log_name in logs:
+        log_path = os.path.join("..", "tests", "compressed_input_data", log_name)
+        log = xes_importer.import_log(log_path)
+        net, initial_marking, final_marking = inductive_miner.apply(log)
+        variants = variants_filter.get_variants_sorted_by_count(variants_filter.get_variants(log))
+        if max_variants is not None:
+            variants = variants[:max_variants]
+        variants_log = variants_filter.apply(log, [x[0] for x in variants])
+        for version in versions:
+            aligned_start = time.time()
+            alignments = align_factory.apply_log(variants_log, net, initial_marking, final_marking, version=version)
+            aligned_end = time.time()
+            visited_states = sum(x["visited_states"] for x in alignments)
+            queued_states = sum(x["queued_states"] for x in alignments)
+            # states visited by the searches interrupted by a restart (extended marking equation version)
+            restarted_visited_states = sum(x["restarted_visited_states"] for x in alignments
+                                           if "restarted_visited_states" in x)
+            print(log_name, version, "variants=" + str(len(variants)), "time=%.2fs" % (aligned_end - aligned_start),
+                  "visited_states=" + str(visited_states), "restarted_visited_states=" + str(restarted_visited_states),
+                  "queued_states=" + str(queued_states))
+
+
+if __name__ == "__main__":
+    execute_script()
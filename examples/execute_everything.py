@@ -14,6 +14,8 @@ if __name__ == "__main__":
     from examples import token_replay_imdf
     from examples import big_dataframe_filtering
     from examples import big_dataframe_management
+    from examples import alignments_benchmark
+    from examples import pnml_benchmark
 
     print("\n\nbig_log_imdf_decor frequency")
     big_log_imdf_decor.execute_script(variant="frequency")
@@ -35,3 +37,7 @@ if __name__ == "__main__":
     big_dataframe_filtering.execute_script()
     print("\n\nbig_dataframe_management")
     big_dataframe_management.execute_script()
+    print("\n\nalignments_benchmark")
+    alignments_benchmark.execute_script()
+    print("\n\npnml_benchmark")
+    pnml_benchmark.execute_script(sizes=[100, 1000])
@@ -0,0 +1,103 @@
+import os
+import tempfile
+import time
+
+from pm4py.objects.petri import utils
+from pm4py.objects.petri.exporter import pnml as pnml_exporter
+from pm4py.objects.petri.importer import pnml as pnml_importer
+from pm4py.objects.petri.petrinet import PetriNet, Marking
+
+SIZES = [1000, 10000, 50000]
+
+
+def generate_net(no_blocks):
+    """
+    Generates a synthetic Petri net, made of a sequence of blocks: each block is an exclusive choice between a
+    visible transition and a parallel split (silent transition) of two visible transitions joined by another silent
+    transition
+
+    Parameters
+    -------------
+    no_blocks
+        Number of blocks
+
+    Returns
+    -------------
+    net
+        Petri net
+    initial_marking
+        Initial marking
+    final_marking
+        Final marking
+    """
+    net = PetriNet("synthetic_" + str(no_blocks))
+
+    def add_place(name):
+        place = PetriNet.Place(name)
+        net.places.add(place)
+        return place
+
+    def add_transition(name, label, inputs, outputs):
+        trans = PetriNet.Transition(name, label)
+        net.transitions.add(trans)
+        for place in inputs:
+            utils.add_arc_from_to(place, trans, net)
+        for place in outputs:
+            utils.add_arc_from_to(trans, place, net)
+
+    source = add_place("source")
+    current = source
+    for i in range(no_blocks):
+        block = str(i)
+        following = add_place("p_" + block)
+        add_transition("choice_" + block, "activity " + block, [current], [following])
+        left_in, right_in = add_place("pl_in_" + block), add_place("pr_in_" + block)
+        left_out, right_out = add_place("pl_out_" + block), add_place("pr_out_" + block)
+        add_transition("split_" + block, None, [current], [left_in, right_in])
+        add_transition("left_" + block, "left " + block, [left_in], [left_out])
+        add_transition("right_" + block, "right " + block, [right_in], [right_out])
+        add_transition("join_" + block, None, [left_out, right_out], [following])
+        current = following
+    return net, Marking({source: 1}), Marking({current: 1})
+
+
+def execute_script(sizes=None):
+    """
+    Benchmarks the PNML exporter and importer on synthetic nets: each net is exported to a file and imported back
+    (from the file, and from the PNML string), checking that the imported net has the same size of the exported one
+
+    Parameters
+    -------------
+    sizes
+        Numbers of blocks of the synthetic nets (see generate_net)
+    """
+    if sizes is None:
+        sizes = SIZES
+    for size in sizes:
+        net, initial_marking, final_marking = generate_net(size)
+        fp = tempfile.NamedTemporaryFile(suffix='.pnml')
+        fp.close()
+        export_start = time.time()
+        pnml_exporter.export_net(net, initial_marking, fp.name, final_marking=final_marking)
+        export_end = time.time()
+        imported_net, imported_im, imported_fm = pnml_importer.import_net(fp.name)
+        import_end = time.time()
+        petri_string = pnml_exporter.export_petri_as_string(net, initial_marking, final_marking=final_marking)
+        string_export_end = time.time()
+        pnml_importer.import_petri_from_string(petri_string)
+        string_import_end = time.time()
+        file_size = os.path.getsize(fp.name)
+        os.remove(fp.name)
+        if (len(imported_net.places), len(imported_net.transitions), len(imported_net.arcs)) != (
+                len(net.places), len(net.transitions), len(net.arcs)) or len(imported_im) != len(
+                initial_marking) or len(imported_fm) != len(final_marking):
+            raise Exception("the imported net differs from the exported one")
+        print("blocks=" + str(size), "nodes=" + str(len(net.places) + len(net.transitions)),
+              "arcs=" + str(len(net.arcs)), "size=%.1fMB" % (file_size / 1024 / 1024),
+              "export=%.2fs" % (export_end - export_start), "import=%.2fs" % (import_end - export_end),
+              "string_export=%.2fs" % (string_export_end - import_end),
+              "string_import=%.2fs" % (string_import_end - string_export_end))
+
+
+if __name__ == "__main__":
+    execute_script()
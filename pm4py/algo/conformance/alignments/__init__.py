@@ -1 +1 @@
-from pm4py.algo.conformance.alignments import versions, factory, utils
+from pm4py.algo.conformance.alignments import versions, factory, utils, adapters
@@ -0,0 +1 @@
+from pm4py.algo.conformance.alignments.adapters import pandas
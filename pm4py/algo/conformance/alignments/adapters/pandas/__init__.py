@@ -0,0 +1 @@
+from pm4py.algo.conformance.alignments.adapters.pandas import df_alignments
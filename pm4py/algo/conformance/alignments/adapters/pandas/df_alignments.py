@@ -0,0 +1,70 @@
+import pandas as pd
+
+from pm4py.algo.conformance.alignments import factory as alignments_factory
+from pm4py.algo.conformance.tokenreplay.adapters.pandas.df_token_replay import get_variants_from_df
+from pm4py.algo.filtering.common.filtering_constants import CASE_CONCEPT_NAME
+from pm4py.objects.log.util import xes
+from pm4py.util.constants import PARAMETER_CONSTANT_ACTIVITY_KEY
+from pm4py.util.constants import PARAMETER_CONSTANT_CASEID_KEY
+from pm4py.util.constants import PARAMETER_CONSTANT_TIMESTAMP_KEY
+
+RESULT_COLUMNS = ["alignment", "cost", "fitness"]
+
+
+def apply(df, net, initial_marking, final_marking, parameters=None, version=alignments_factory.VERSION_AUTO):
+    """
+    Apply alignments directly to a Pandas dataframe: the variants are extracted from the dataframe,
+    only the unique variants are aligned (without converting the dataframe to a log) and the results are
+    associated back to the cases
+
+    Parameters
+    -----------
+    df
+        Dataframe
+    net
+        Petri net
+    initial_marking
+        Initial marking
+    final_marking
+        Final marking
+    parameters
+        Parameters of the algorithm (see pm4py.algo.conformance.alignments.factory.apply_log), including:
+            case_id_glue -> Column that contains the Case ID
+            pm4py.util.constants.PARAMETER_CONSTANT_ACTIVITY_KEY -> Column that contains the activity
+            pm4py.util.constants.PARAMETER_CONSTANT_TIMESTAMP_KEY -> Column that contains the timestamp
+            sort_required -> Specify if a sort on the Case ID and the timestamp is required (default: True)
+    version
+        Selected variant of the algorithm (see pm4py.algo.conformance.alignments.factory.apply_log)
+
+    Returns
+    -----------
+    dictionary
+        Dictionary with keys **cases** (dataframe having the Case ID as index, the variant of the case in the variant
+        column and the alignment, its cost and its fitness as other columns) and **fitness** (aggregated fitness
+        over the cases, see pm4py.algo.conformance.alignments.factory.evaluate_variants)
+    """
+    if parameters is None:
+        parameters = {}
+
+    case_id_glue = parameters[
+        PARAMETER_CONSTANT_CASEID_KEY] if PARAMETER_CONSTANT_CASEID_KEY in parameters else CASE_CONCEPT_NAME
+    activity_key = parameters[
+        PARAMETER_CONSTANT_ACTIVITY_KEY] if PARAMETER_CONSTANT_ACTIVITY_KEY in parameters else xes.DEFAULT_NAME_KEY
+    timestamp_key = parameters[
+        PARAMETER_CONSTANT_TIMESTAMP_KEY] if PARAMETER_CONSTANT_TIMESTAMP_KEY in parameters else \
+        xes.DEFAULT_TIMESTAMP_KEY
+    sort_required = parameters["sort_required"] if "sort_required" in parameters else True
+
+    variants_df = get_variants_from_df(df, case_id_glue=case_id_glue, activity_key=activity_key,
+                                       timestamp_key=timestamp_key, sort_required=sort_required)
+    variants_count = variants_df["variant"].value_counts()
+    variants = [[variant, int(count)] for variant, count in variants_count.items()]
+
+    result = alignments_factory.apply_variants(variants, net, initial_marking, final_marking, parameters=parameters,
+                                               version=version)
+
+    results_df = pd.DataFrame([[align[column] for column in RESULT_COLUMNS] for align in result["variants"]],
+                              index=[align["variant"] for align in result["variants"]], columns=RESULT_COLUMNS)
+    results_df.index.name = "variant"
+
+    return {"cases": variants_df.join(results_df, on="variant"), "fitness": result["fitness"]}
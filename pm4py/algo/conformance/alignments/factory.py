@@ -1,23 +1,65 @@
+import hashlib
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+import shelve
+import time
 from copy import copy
 
 import pm4py
 from pm4py.algo.conformance import alignments as ali
 from pm4py.algo.conformance.alignments import versions
 from pm4py.algo.conformance.alignments.utils import STD_MODEL_LOG_MOVE_COST
+from pm4py.algo.conformance.alignments.versions.state_equation_a_star import PARAM_DEADLINE
 from pm4py.algo.conformance.alignments.versions.state_equation_a_star import PARAM_MODEL_COST_FUNCTION
 from pm4py.algo.conformance.alignments.versions.state_equation_a_star import PARAM_SYNC_COST_FUNCTION
 from pm4py.algo.conformance.alignments.versions.state_equation_a_star import PARAM_TRACE_COST_FUNCTION
+from pm4py.evaluation.replay_fitness.versions import alignment_based
 from pm4py.objects.log import transform as log_transform
 from pm4py.objects.log.util import general as log_util
 from pm4py.objects.log.util.xes import DEFAULT_NAME_KEY
+from pm4py.objects.petri import net_cache
+from pm4py.objects.petri import reduction
+from pm4py.objects.petri.utils import get_net_fingerprint
 from pm4py.util.constants import PARAMETER_CONSTANT_ACTIVITY_KEY
 
 VERSION_STATE_EQUATION_A_STAR = 'state_equation_a_star'
-VERSIONS = {VERSION_STATE_EQUATION_A_STAR: versions.state_equation_a_star.apply}
-VERSIONS_COST = {VERSION_STATE_EQUATION_A_STAR: versions.state_equation_a_star.get_best_worst_cost}
+VERSION_REACHABILITY_GRAPH_DIJKSTRA = 'reachability_graph_dijkstra'
+VERSION_EXTENDED_MARKING_EQUATION_A_STAR = 'extended_marking_equation_a_star'
+VERSION_DECOMPOSED_STATE_EQUATION_A_STAR = 'decomposed_state_equation_a_star'
+VERSION_AUTO = 'auto'
+VERSIONS = {VERSION_STATE_EQUATION_A_STAR: versions.state_equation_a_star.apply,
+            VERSION_REACHABILITY_GRAPH_DIJKSTRA: versions.reachability_graph_dijkstra.apply,
+            VERSION_EXTENDED_MARKING_EQUATION_A_STAR: versions.extended_marking_equation_a_star.apply,
+            VERSION_DECOMPOSED_STATE_EQUATION_A_STAR: versions.decomposed_state_equation_a_star.apply}
+# versions aligning the traces of a log together (e.g. sharing the work on the fragments of the model), and
+# distributing the work between the worker processes by themselves
+VERSIONS_LOG = {VERSION_DECOMPOSED_STATE_EQUATION_A_STAR: versions.decomposed_state_equation_a_star.apply_log}
+VERSIONS_COST = {VERSION_STATE_EQUATION_A_STAR: versions.state_equation_a_star.get_best_worst_cost,
+                 VERSION_REACHABILITY_GRAPH_DIJKSTRA: versions.reachability_graph_dijkstra.get_best_worst_cost,
+                 VERSION_EXTENDED_MARKING_EQUATION_A_STAR:
+                     versions.extended_marking_equation_a_star.get_best_worst_cost,
+                 VERSION_DECOMPOSED_STATE_EQUATION_A_STAR:
+                     versions.decomposed_state_equation_a_star.get_best_worst_cost}
 
+PARAM_PARALLEL = "parallel"
+PARAM_MAX_WORKERS = "max_workers"
+PARAM_CHUNK_SIZE = "chunk_size"
+PARAM_ALIGNMENTS_CACHE = "alignments_cache"
+PARAM_MAX_TOTAL_TIME = "max_total_time"
+PARAM_MAX_AUTOMATON_STATES = versions.reachability_graph_dijkstra.PARAM_MAX_AUTOMATON_STATES
+PARAM_REDUCE_NET = "reduce_net"
 
-def apply(objj, petri_net, initial_marking, final_marking, parameters=None, version=VERSION_STATE_EQUATION_A_STAR):
+CACHE_BEST_WORST_COST_KEY = "@@best_worst_cost"
+
+# number of chunks assigned (on average) to each worker when the chunk size is not provided
+CHUNKS_PER_WORKER = 16
+
+# model, parameters and version of the algorithm, set once for each worker process
+WORKER_CONTEXT = None
+
+
+def apply(objj, petri_net, initial_marking, final_marking, parameters=None, version=VERSION_AUTO):
     if isinstance(objj, pm4py.objects.log.log.Trace):
         return apply_trace(objj, petri_net, initial_marking, final_marking, parameters, version)
     elif isinstance(objj, pm4py.objects.log.log.TraceLog):
@@ -38,7 +80,7 @@ def apply(objj, petri_net, initial_marking, final_marking, parameters=None, vers
 
 
 def apply_trace(trace, petri_net, initial_marking, final_marking, parameters=None,
-                version=VERSION_STATE_EQUATION_A_STAR):
+                version=VERSION_AUTO):
     """
     apply alignments to a trace
 
@@ -53,7 +95,9 @@ def apply_trace(trace, petri_net, initial_marking, final_marking, parameters=Non
     final_marking
         :class:`pm4py.objects.petri.petrinet.Marking` final marking of the net
     version
-        :class:`str` selected variant of the algorithm, possible values: {\'state_equation_a_star\'}
+        :class:`str` selected variant of the algorithm, possible values: {\'auto\', \'state_equation_a_star\',
+        \'reachability_graph_dijkstra\', \'extended_marking_equation_a_star\', \'decomposed_state_equation_a_star\'}
+        (default: \'auto\', see get_version)
     parameters
         :class:`dict` parameters of the algorithm, for key \'state_equation_a_star\':
             pm4py.util.constants.PARAMETER_CONSTANT_ACTIVITY_KEY -> Attribute in the log that contains the activity
@@ -63,6 +107,10 @@ def apply_trace(trace, petri_net, initial_marking, final_marking, parameters=Non
             mapping of each transition in the model to corresponding model cost
             pm4py.algo.conformance.alignments.versions.state_equation_a_star.PARAM_TRACE_COST_FUNCTION ->
             mapping of each index of the trace to a positive cost value
+        the following parameters are valid for all the versions:
+            pm4py.algo.conformance.alignments.factory.PARAM_REDUCE_NET -> boolean value telling if the model shall
+            be reduced (see pm4py.objects.petri.reduction) before aligning (default: False); the moves on
+            the silent transitions removed by the reduction do not appear in the alignment
 
 
     Returns
@@ -72,16 +120,23 @@ def apply_trace(trace, petri_net, initial_marking, final_marking, parameters=Non
         **traversed_arcs**
         The alignment is a sequence of labels of the form (a,t), (a,>>), or (>>,t)
         representing synchronous/log/model-moves.
+        For the version \'decomposed_state_equation_a_star\', the alignment is None (the alignments of the
+        projections of the trace on the fragments of the model are in **fragments_alignments**)
     """
     if parameters is None:
         parameters = copy({PARAMETER_CONSTANT_ACTIVITY_KEY: DEFAULT_NAME_KEY})
+    if PARAM_REDUCE_NET in parameters and parameters[PARAM_REDUCE_NET]:
+        petri_net, initial_marking, final_marking, parameters = reduce_model(petri_net, initial_marking,
+                                                                             final_marking, parameters)
+    if version == VERSION_AUTO:
+        version = get_version(petri_net, initial_marking, final_marking, parameters=parameters)
     if PARAM_TRACE_COST_FUNCTION not in parameters:
         parameters[PARAM_TRACE_COST_FUNCTION] = list(
             map(lambda e: STD_MODEL_LOG_MOVE_COST, trace))
     return VERSIONS[version](trace, petri_net, initial_marking, final_marking, parameters)
 
 
-def apply_log(log, petri_net, initial_marking, final_marking, parameters=None, version=VERSION_STATE_EQUATION_A_STAR):
+def apply_log(log, petri_net, initial_marking, final_marking, parameters=None, version=VERSION_AUTO):
     """
     apply alignments to a trace
 
@@ -96,7 +151,9 @@ def apply_log(log, petri_net, initial_marking, final_marking, parameters=None, v
     final_marking
         :class:`pm4py.objects.petri.petrinet.Marking` final marking of the net
     version
-        :class:`str` selected variant of the algorithm, possible values: {\'state_equation_a_star\'}
+        :class:`str` selected variant of the algorithm, possible values: {\'auto\', \'state_equation_a_star\',
+        \'reachability_graph_dijkstra\', \'extended_marking_equation_a_star\', \'decomposed_state_equation_a_star\'}
+        (default: \'auto\', see get_version)
     parameters
         :class:`dict` parameters of the algorithm,
         for key \'state_equation_a_star\':
@@ -107,20 +164,181 @@ def apply_log(log, petri_net, initial_marking, final_marking, parameters=None, v
             mapping of each transition in the model to corresponding model cost
             pm4py.algo.conformance.alignments.versions.state_equation_a_star.PARAM_TRACE_COST_FUNCTION ->
             mapping of each index of the trace to a positive cost value
+        the following parameters are valid for all the versions:
+            pm4py.algo.conformance.alignments.factory.PARAM_PARALLEL -> boolean value telling if the traces shall be
+            aligned in parallel by a pool of worker processes (default: False); the version
+            \'decomposed_state_equation_a_star\' distributes the fragments of the model between the workers
+            pm4py.algo.conformance.alignments.factory.PARAM_MAX_WORKERS -> number of worker processes
+            (default: number of CPUs)
+            pm4py.algo.conformance.alignments.factory.PARAM_CHUNK_SIZE -> number of traces sent to a worker at once
+            (default: chosen so that each worker gets about 16 chunks)
+            pm4py.algo.conformance.alignments.factory.PARAM_ALIGNMENTS_CACHE -> persistent cache of the alignments,
+            either the path of a shelve file or a dict-like object; the alignments are stored by model fingerprint,
+            cost functions and variant, so that they are reused by the following executions (default: None)
+            pm4py.algo.conformance.alignments.factory.PARAM_MAX_TOTAL_TIME -> maximum time (in seconds) spent
+            aligning the log; when it is exceeded, the remaining traces get a partial alignment
+            (see the budgets of the version, e.g. PARAM_MAX_VISITED_STATES and PARAM_MAX_TRACE_TIME of
+            state_equation_a_star)
+            pm4py.algo.conformance.alignments.factory.PARAM_REDUCE_NET -> boolean value telling if the model shall
+            be reduced (see pm4py.objects.petri.reduction) before aligning (default: False); the moves on
+            the silent transitions removed by the reduction do not appear in the alignments
 
 
     Returns
     -----------
     alignment
-        :class:`dict` with keys **alignment**, **cost**, **visited_states**, **queued_states** and
-        **traversed_arcs**
+        :class:`list` of :class:`dict` (one for each trace, in the order of the log) with keys **alignment**,
+        **cost**, **visited_states**, **queued_states**, **traversed_arcs** and **fitness** (None for the partial
+        alignments, see get_fitness)
         The alignment is a sequence of labels of the form (a,t), (a,>>), or (>>,t)
         representing synchronous/log/model-moves.
+        For the version \'decomposed_state_equation_a_star\', the alignment is None (the alignments of the
+        projections of the trace on the fragments of the model are in **fragments_alignments**)
+    """
+    if parameters is None:
+        parameters = dict()
+    activity_key = parameters[
+        PARAMETER_CONSTANT_ACTIVITY_KEY] if PARAMETER_CONSTANT_ACTIVITY_KEY in parameters else DEFAULT_NAME_KEY
+
+    # the traces sharing the same sequence of activities (variant) are aligned only once
+    variants_idxs = {}
+    for index, trace in enumerate(log):
+        variant = ",".join([x[activity_key] for x in trace])
+        if variant not in variants_idxs:
+            variants_idxs[variant] = []
+        variants_idxs[variant].append(index)
+
+    variants_alignments, best_worst_cost = align_variants(
+        {variant: log[variants_idxs[variant][0]] for variant in variants_idxs}, petri_net, initial_marking,
+        final_marking, parameters=parameters, version=version)
+
+    # fan out the alignments of the variants to the traces, and assign fitness to traces
+    alignments = [None] * len(log)
+    for variant in variants_idxs:
+        for index in variants_idxs[variant]:
+            align = copy(variants_alignments[variant])
+            # align_cost = align['cost'] // ali.utils.STD_MODEL_LOG_MOVE_COST
+            # align['fitness'] = 1 - ((align['cost']  // ali.utils.STD_MODEL_LOG_MOVE_COST) / best_worst_cost)
+            align['fitness'] = get_fitness(align, len(log[index]), best_worst_cost)
+            alignments[index] = align
+
+    return alignments
+
+
+def apply_variants(variants, petri_net, initial_marking, final_marking, parameters=None, version=VERSION_AUTO):
+    """
+    Apply alignments to a list of variants (each one aligned once), without the need of building a log
+
+    Parameters
+    -----------
+    variants
+        List of couples (variant, count), where the variant is either a string (activities separated by comma)
+        or a list of activities, and count is the number of cases of the variant
+        (e.g. the output of variants_filter.get_variants_sorted_by_count)
+    petri_net
+        :class:`pm4py.objects.petri.petrinet.PetriNet` the model to use for the alignment
+    initial_marking
+        :class:`pm4py.objects.petri.petrinet.Marking` initial marking of the net
+    final_marking
+        :class:`pm4py.objects.petri.petrinet.Marking` final marking of the net
+    parameters
+        :class:`dict` parameters of the algorithm (see apply_log)
+    version
+        :class:`str` selected variant of the algorithm (see apply_log)
+
+    Returns
+    -----------
+    dictionary
+        :class:`dict` with keys **variants** (:class:`list` of :class:`dict`, one for each variant in the order
+        of the list, containing the keys of the alignment of a trace, see apply_log, and **variant** and **count**)
+        and **fitness** (aggregated fitness over the cases, see evaluate_variants)
     """
     if parameters is None:
         parameters = dict()
     activity_key = parameters[
         PARAMETER_CONSTANT_ACTIVITY_KEY] if PARAMETER_CONSTANT_ACTIVITY_KEY in parameters else DEFAULT_NAME_KEY
+
+    variants_activities = {}
+    for variant, count in variants:
+        activities = list(variant) if not isinstance(variant, str) else variant.split(",") if variant else []
+        variants_activities[",".join(activities)] = activities
+    # the versions only read the activity of each event, hence a light-weight dictionary is enough as event
+    variants_traces = {variant: [{activity_key: a} for a in variants_activities[variant]]
+                       for variant in variants_activities}
+    variants_alignments, best_worst_cost = align_variants(variants_traces, petri_net, initial_marking,
+                                                          final_marking, parameters=parameters, version=version)
+
+    results = []
+    for variant, count in variants:
+        activities = list(variant) if not isinstance(variant, str) else variant.split(",") if variant else []
+        align = copy(variants_alignments[",".join(activities)])
+        align['fitness'] = get_fitness(align, len(activities), best_worst_cost)
+        align['variant'] = variant
+        align['count'] = count
+        results.append(align)
+
+    return {'variants': results, 'fitness': evaluate_variants(results)}
+
+
+def evaluate_variants(variants_alignments):
+    """
+    Aggregates the fitness of the alignments of the variants, weighting each variant by its number of cases
+    (see pm4py.evaluation.replay_fitness.versions.alignment_based.evaluate)
+
+    Parameters
+    -----------
+    variants_alignments
+        List of alignments of the variants, each one containing the keys **fitness** and **count**
+
+    Returns
+    -----------
+    dictionary
+        Dictionary containing percFitTraces and averageFitness
+    """
+    return alignment_based.evaluate(variants_alignments)
+
+
+def align_variants(variants_traces, petri_net, initial_marking, final_marking, parameters=None,
+                   version=VERSION_AUTO):
+    """
+    Aligns the variants (using the cache, the pool of worker processes and the total time budget if requested
+    in the parameters)
+
+    Parameters
+    -----------
+    variants_traces
+        Dictionary associating to each variant (activities separated by comma) a trace of the variant
+    petri_net
+        Petri net
+    initial_marking
+        Initial marking
+    final_marking
+        Final marking
+    parameters
+        Parameters of the algorithm (see apply_log)
+    version
+        Selected variant of the algorithm
+
+    Returns
+    -----------
+    variants_alignments
+        Dictionary associating to each variant its alignment (without fitness)
+    best_worst_cost
+        Best worst cost of an alignment on the model
+    """
+    # the cost functions and the deadline are set in a copy, leaving the dictionary of the caller untouched
+    parameters = copy(parameters) if parameters is not None else dict()
+    if PARAM_REDUCE_NET in parameters and parameters[PARAM_REDUCE_NET]:
+        petri_net, initial_marking, final_marking, parameters = reduce_model(petri_net, initial_marking,
+                                                                             final_marking, parameters)
+    if version == VERSION_AUTO:
+        version = get_version(petri_net, initial_marking, final_marking, parameters=parameters)
+    parallel = parameters[PARAM_PARALLEL] if PARAM_PARALLEL in parameters else False
+    max_workers = parameters[PARAM_MAX_WORKERS] if PARAM_MAX_WORKERS in parameters else os.cpu_count()
+    chunk_size = parameters[PARAM_CHUNK_SIZE] if PARAM_CHUNK_SIZE in parameters else None
+    max_total_time = parameters[PARAM_MAX_TOTAL_TIME] if PARAM_MAX_TOTAL_TIME in parameters else None
+    activity_key = parameters[
+        PARAMETER_CONSTANT_ACTIVITY_KEY] if PARAMETER_CONSTANT_ACTIVITY_KEY in parameters else DEFAULT_NAME_KEY
     model_cost_function = parameters[
         PARAM_MODEL_COST_FUNCTION] if PARAM_MODEL_COST_FUNCTION in parameters else None
     sync_cost_function = parameters[
@@ -136,23 +354,317 @@ def apply_log(log, petri_net, initial_marking, final_marking, parameters=None, v
             else:
                 model_cost_function[t] = 1
 
-    best_worst_cost = VERSIONS_COST[version](petri_net, initial_marking, final_marking)
-
     parameters[pm4py.util.constants.PARAMETER_CONSTANT_ACTIVITY_KEY] = activity_key
     parameters[
         PARAM_MODEL_COST_FUNCTION] = model_cost_function
     parameters[
         PARAM_SYNC_COST_FUNCTION] = sync_cost_function
-    alignments = list(map(
-        lambda trace: apply_trace(trace, petri_net, initial_marking, final_marking, parameters=copy(parameters),
-                                  version=version),
-        log))
-
-    # assign fitness to traces
-    for index, align in enumerate(alignments):
-        # align_cost = align['cost'] // ali.utils.STD_MODEL_LOG_MOVE_COST
-        # align['fitness'] = 1 - ((align['cost']  // ali.utils.STD_MODEL_LOG_MOVE_COST) / best_worst_cost)
-        align['fitness'] = 1 - (
-                (align['cost'] // ali.utils.STD_MODEL_LOG_MOVE_COST) / (len(log[index]) + best_worst_cost))
 
+    if max_total_time is not None:
+        deadline = time.time() + max_total_time
+        if PARAM_DEADLINE in parameters and parameters[PARAM_DEADLINE] is not None:
+            deadline = min(deadline, parameters[PARAM_DEADLINE])
+        parameters[PARAM_DEADLINE] = deadline
+
+    cache = parameters[PARAM_ALIGNMENTS_CACHE] if PARAM_ALIGNMENTS_CACHE in parameters else None
+    shelf = None
+    if isinstance(cache, str):
+        cache = shelf = shelve.open(cache)
+    try:
+        cache_prefix = None
+        if cache is not None:
+            cache_prefix = get_cache_prefix(petri_net, initial_marking, final_marking, parameters, version)
+
+        if cache is not None and cache_prefix + CACHE_BEST_WORST_COST_KEY in cache:
+            best_worst_cost = cache[cache_prefix + CACHE_BEST_WORST_COST_KEY]
+        else:
+            best_worst_cost = net_cache.get(petri_net, initial_marking, final_marking, ("best_worst_cost", version),
+                                            lambda: VERSIONS_COST[version](petri_net, initial_marking, final_marking))
+            if cache is not None:
+                cache[cache_prefix + CACHE_BEST_WORST_COST_KEY] = best_worst_cost
+
+        variants_alignments = {}
+        variants_to_align = []
+        for variant in variants_traces:
+            if cache is not None and cache_prefix + variant in cache:
+                variants_alignments[variant] = cache[cache_prefix + variant]
+            else:
+                variants_to_align.append(variant)
+        traces_to_align = [variants_traces[variant] for variant in variants_to_align]
+
+        if version in VERSIONS_LOG and traces_to_align:
+            log_parameters = {x: parameters[x] for x in parameters if x != PARAM_ALIGNMENTS_CACHE}
+            log_parameters[PARAM_MAX_WORKERS] = max_workers if parallel else 1
+            new_alignments = VERSIONS_LOG[version](traces_to_align, petri_net, initial_marking, final_marking,
+                                                   parameters=log_parameters)
+            for align in new_alignments:
+                # the fitness is assigned by the caller
+                align.pop('fitness', None)
+        elif parallel and max_workers is not None and max_workers > 1 and len(traces_to_align) > 1:
+            # the cache is not needed by the workers
+            workers_parameters = {x: parameters[x] for x in parameters if x != PARAM_ALIGNMENTS_CACHE}
+            new_alignments = apply_log_parallel(traces_to_align, petri_net, initial_marking, final_marking,
+                                                workers_parameters, version, max_workers, chunk_size=chunk_size)
+        else:
+            new_alignments = list(map(
+                lambda trace: apply_trace(trace, petri_net, initial_marking, final_marking,
+                                          parameters=copy(parameters), version=version),
+                traces_to_align))
+
+        for variant, align in zip(variants_to_align, new_alignments):
+            variants_alignments[variant] = align
+            # partial alignments (obtained when a budget is exceeded) are not stored
+            if cache is not None and not ('partial' in align and align['partial']):
+                cache[cache_prefix + variant] = align
+    finally:
+        if shelf is not None:
+            shelf.close()
+
+    return variants_alignments, best_worst_cost
+
+
+def reduce_model(petri_net, initial_marking, final_marking, parameters):
+    """
+    Reduces the model (see pm4py.objects.petri.reduction; the reduced model is kept in the cache of
+    pm4py.objects.petri.net_cache), translating the model and synchronous cost functions, if provided, to the
+    transitions of the reduced model: a transition of the reduced model costs the sum of the costs of the
+    transitions of the original model that it fires
+
+    Parameters
+    -----------
+    petri_net
+        Petri net
+    initial_marking
+        Initial marking
+    final_marking
+        Final marking
+    parameters
+        Parameters of the algorithm
+
+    Returns
+    -----------
+    reduced_net
+        Reduced Petri net
+    reduced_initial_marking
+        Initial marking of the reduced net
+    reduced_final_marking
+        Final marking of the reduced net
+    parameters
+        Copy of the parameters, with the cost functions related to the reduced net
+    """
+    reduced_net, reduced_im, reduced_fm, corr = net_cache.get(
+        petri_net, initial_marking, final_marking, "reduction",
+        lambda: reduction.apply(petri_net, initial_marking, final_marking), bound_to_net=True)
+    parameters = copy(parameters)
+    del parameters[PARAM_REDUCE_NET]
+    model_cost_function = parameters[
+        PARAM_MODEL_COST_FUNCTION] if PARAM_MODEL_COST_FUNCTION in parameters else None
+    sync_cost_function = parameters[
+        PARAM_SYNC_COST_FUNCTION] if PARAM_SYNC_COST_FUNCTION in parameters else None
+    if model_cost_function is not None and sync_cost_function is not None:
+        parameters[PARAM_MODEL_COST_FUNCTION] = {t: sum(model_cost_function[x] for x in corr[t])
+                                                 for t in reduced_net.transitions}
+        # the first transition fired by a visible transition of the reduced net is the visible one,
+        # followed by silent transitions
+        parameters[PARAM_SYNC_COST_FUNCTION] = {
+            t: sync_cost_function[corr[t][0]] + sum(model_cost_function[x] for x in corr[t][1:])
+            for t in reduced_net.transitions if t.label is not None}
+    return reduced_net, reduced_im, reduced_fm, parameters
+
+
+def get_deviations(align):
+    """
+    Gets the number of deviations (log and model moves) of an alignment from its cost, discarding the cost of the
+    invisible transitions. The cost of an approximate alignment (see decomposed_state_equation_a_star) may contain
+    fractions of a move, that are kept
+
+    Parameters
+    -----------
+    align
+        Result of the alignment of a trace
+
+    Returns
+    -----------
+    deviations
+        Number of deviations
+    """
+    if 'approximate' in align and align['approximate']:
+        return align['cost'] / ali.utils.STD_MODEL_LOG_MOVE_COST
+    return align['cost'] // ali.utils.STD_MODEL_LOG_MOVE_COST
+
+
+def get_fitness(align, trace_length, best_worst_cost):
+    """
+    Gets the fitness of the alignment of a trace. A partial alignment (obtained when a budget is exceeded) has no
+    fitness, since its cost is only a lower bound of the cost of the optimal alignment
+
+    Parameters
+    -----------
+    align
+        Result of the alignment of a trace
+    trace_length
+        Number of events of the trace
+    best_worst_cost
+        Best worst cost of an alignment on the model
+
+    Returns
+    -----------
+    fitness
+        Fitness of the trace (None for a partial alignment)
+    """
+    if 'partial' in align and align['partial']:
+        return None
+    return 1 - (get_deviations(align) / (trace_length + best_worst_cost))
+
+
+def get_version(petri_net, initial_marking, final_marking, parameters=None):
+    """
+    Chooses the version of the alignments to use for a model: the automaton-based version
+    (reachability_graph_dijkstra) if the reachability graph of the model has at most PARAM_MAX_AUTOMATON_STATES
+    states (and contains the final marking), otherwise the state equation A* version
+
+    Parameters
+    -----------
+    petri_net
+        Petri net
+    initial_marking
+        Initial marking
+    final_marking
+        Final marking
+    parameters
+        Parameters of the algorithm
+
+    Returns
+    -----------
+    version
+        Version of the algorithm
+    """
+    if parameters is None:
+        parameters = {}
+    max_automaton_states = parameters[
+        PARAM_MAX_AUTOMATON_STATES] if PARAM_MAX_AUTOMATON_STATES in parameters else \
+        versions.reachability_graph_dijkstra.DEFAULT_MAX_AUTOMATON_STATES
+    if versions.reachability_graph_dijkstra.get_automaton(petri_net, initial_marking, final_marking,
+                                                          max_states=max_automaton_states) is not None:
+        return VERSION_REACHABILITY_GRAPH_DIJKSTRA
+    return VERSION_STATE_EQUATION_A_STAR
+
+
+def get_cache_prefix(petri_net, initial_marking, final_marking, parameters, version):
+    """
+    Gets the prefix of the keys of the alignments cache, identifying the model, the cost functions and
+    the version of the algorithm (the key of an alignment is the prefix followed by the variant)
+
+    Parameters
+    -----------
+    petri_net
+        Petri net
+    initial_marking
+        Initial marking
+    final_marking
+        Final marking
+    parameters
+        Parameters of the algorithm (including the model and synchronous cost functions)
+    version
+        Selected variant of the algorithm
+
+    Returns
+    -----------
+    cache_prefix
+        Prefix of the keys
+    """
+    model_cost_function = parameters[PARAM_MODEL_COST_FUNCTION]
+    sync_cost_function = parameters[PARAM_SYNC_COST_FUNCTION]
+    trace_cost_function = parameters[PARAM_TRACE_COST_FUNCTION] if PARAM_TRACE_COST_FUNCTION in parameters else None
+    costs = sorted(repr((t.name, t.label, model_cost_function.get(t), sync_cost_function.get(t)))
+                   for t in petri_net.transitions)
+    costs_fingerprint = hashlib.sha256(repr((costs, trace_cost_function)).encode("utf-8")).hexdigest()
+    # the keys are persisted: the fingerprint of the net is not taken from the memo
+    net_fingerprint = get_net_fingerprint(petri_net, initial_marking, final_marking, memoised=False)
+    return "@".join([version, net_fingerprint, costs_fingerprint, ""])
+
+
+def initialize_worker(petri_net, initial_marking, final_marking, parameters, version):
+    """
+    Initializes a worker process of the parallel alignments, storing the model (that is shipped once to each worker)
+
+    Parameters
+    -----------
+    petri_net
+        Petri net
+    initial_marking
+        Initial marking
+    final_marking
+        Final marking
+    parameters
+        Parameters of the algorithm (including the cost functions, that refer to the transitions of the net)
+    version
+        Selected variant of the algorithm
+    """
+    global WORKER_CONTEXT
+    WORKER_CONTEXT = (petri_net, initial_marking, final_marking, parameters, version)
+
+
+def apply_chunk_in_worker(traces):
+    """
+    Aligns a chunk of traces against the model stored in the worker process
+
+    Parameters
+    -----------
+    traces
+        List of traces
+
+    Returns
+    -----------
+    alignments
+        List of alignments (one for each trace of the chunk)
+    """
+    petri_net, initial_marking, final_marking, parameters, version = WORKER_CONTEXT
+    return [apply_trace(trace, petri_net, initial_marking, final_marking, parameters=copy(parameters),
+                        version=version) for trace in traces]
+
+
+def apply_log_parallel(log, petri_net, initial_marking, final_marking, parameters, version, max_workers,
+                       chunk_size=None):
+    """
+    Aligns the traces of a log using a pool of worker processes. The model is sent to each worker only once,
+    then the traces are sent in chunks, starting from the longest ones (that are usually the most expensive
+    to align) so that the workers are not left waiting for a long trace at the end
+
+    Parameters
+    -----------
+    log
+        Trace log
+    petri_net
+        Petri net
+    initial_marking
+        Initial marking
+    final_marking
+        Final marking
+    parameters
+        Parameters of the algorithm
+    version
+        Selected variant of the algorithm
+    max_workers
+        Number of worker processes
+    chunk_size
+        Number of traces sent to a worker at once
+
+    Returns
+    -----------
+    alignments
+        List of alignments (one for each trace, in the order of the log)
+    """
+    order = sorted(range(len(log)), key=lambda index: len(log[index]), reverse=True)
+    if chunk_size is None:
+        chunk_size = max(1, math.ceil(len(log) / (max_workers * CHUNKS_PER_WORKER)))
+    chunks = [order[i:i + chunk_size] for i in range(0, len(order), chunk_size)]
+
+    alignments = [None] * len(log)
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=initialize_worker,
+                             initargs=(petri_net, initial_marking, final_marking, parameters, version)) as executor:
+        chunks_alignments = executor.map(apply_chunk_in_worker, [[log[index] for index in chunk] for chunk in chunks])
+        for chunk, chunk_alignments in zip(chunks, chunks_alignments):
+            for index, align in zip(chunk, chunk_alignments):
+                alignments[index] = align
     return alignments
@@ -1 +1,2 @@
-from pm4py.algo.conformance.alignments.versions import state_equation_a_star
+from pm4py.algo.conformance.alignments.versions import state_equation_a_star, reachability_graph_dijkstra, \
+    extended_marking_equation_a_star, decomposed_state_equation_a_star
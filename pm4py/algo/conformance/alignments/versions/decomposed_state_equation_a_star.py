@@ -0,0 +1,357 @@
+"""
+This module contains code that allows us to compute alignments on large models, by decomposing the Petri net
+in fragments (maximal decomposition, see pm4py.objects.petri.decomposition), projecting the trace on the
+activities of each fragment, and aligning each projection on its fragment with the state equation A* version.
+
+The cost of the moves on transitions that are shared by several fragments is split equally between the fragments,
+so the composed cost (sum of the costs of the fragments) is a lower bound of the cost of the optimal alignment
+on the whole net; it is exact when it is 0, i.e. a trace fits the net if and only if all its projections fit
+the fragments (W.M.P. van der Aalst, "Decomposing Petri nets for process mining: A generic approach",
+Distributed and Parallel Databases 31(4), 2013).
+Hence, the results where a deviation (log or model move) involves a transition shared by several fragments, whose
+cost has been split, are flagged as approximate.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from pm4py import util as pm4pyutil
+from pm4py.algo.conformance import alignments
+from pm4py.algo.conformance.alignments.versions import state_equation_a_star
+from pm4py.objects.log import log as log_implementation
+from pm4py.objects.log.util.xes import DEFAULT_NAME_KEY
+from pm4py.objects.petri import decomposition
+from pm4py.objects.petri import net_cache
+from pm4py.util.constants import PARAMETER_CONSTANT_ACTIVITY_KEY
+
+PARAM_TRACE_COST_FUNCTION = state_equation_a_star.PARAM_TRACE_COST_FUNCTION
+PARAM_MODEL_COST_FUNCTION = state_equation_a_star.PARAM_MODEL_COST_FUNCTION
+PARAM_SYNC_COST_FUNCTION = state_equation_a_star.PARAM_SYNC_COST_FUNCTION
+PARAM_MAX_WORKERS = 'max_workers'
+
+PARAMETERS = [PARAM_TRACE_COST_FUNCTION, PARAM_MODEL_COST_FUNCTION, PARAM_SYNC_COST_FUNCTION,
+              pm4pyutil.constants.PARAMETER_CONSTANT_ACTIVITY_KEY, PARAM_MAX_WORKERS,
+              state_equation_a_star.PARAM_MAX_VISITED_STATES, state_equation_a_star.PARAM_MAX_TRACE_TIME,
+              state_equation_a_star.PARAM_DEADLINE]
+
+
+def get_decomposition(petri_net, initial_marking, final_marking):
+    """
+    Gets the maximal decomposition of a model, computing it only if the model or its markings changed since the
+    last call
+
+    Parameters
+    ----------
+    petri_net: :class:`pm4py.objects.petri.net.PetriNet` the Petri net
+    initial_marking: :class:`pm4py.objects.petri.net.Marking` initial marking in the Petri net
+    final_marking: :class:`pm4py.objects.petri.net.Marking` final marking in the Petri net
+
+    Returns
+    -------
+    fragments: :class:`list` fragments of the decomposition, see pm4py.objects.petri.decomposition.decompose
+    """
+    return net_cache.get(petri_net, initial_marking, final_marking, "decomposition",
+                         lambda: decomposition.decompose(petri_net, initial_marking, final_marking), bound_to_net=True)
+
+
+def get_best_worst_cost(petri_net, initial_marking, final_marking):
+    """
+    Gets the best worst cost of an alignment, as the sum of the best worst costs of the fragments
+    (a lower bound of the best worst cost on the whole net)
+
+    Parameters
+    -----------
+    petri_net
+        Petri net
+    initial_marking
+        Initial marking
+    final_marking
+        Final marking
+
+    Returns
+    -----------
+    best_worst_cost
+        Best worst cost of alignment
+    """
+    best_worst = apply(log_implementation.Trace(), petri_net, initial_marking, final_marking)
+    return best_worst['cost'] // alignments.utils.STD_MODEL_LOG_MOVE_COST
+
+
+def apply(trace, petri_net, initial_marking, final_marking, parameters=None):
+    """
+    Performs the decomposed alignment of a trace on a net: the projections of the trace are aligned on the fragments
+    of the net, one after the other
+
+    Parameters
+    ----------
+    trace: :class:`list` input trace, assumed to be a list of events (i.e. the code will use the activity key
+    to get the attributes)
+    petri_net: :class:`pm4py.objects.petri.net.PetriNet` the Petri net to use in the alignment
+    initial_marking: :class:`pm4py.objects.petri.net.Marking` initial marking in the Petri net
+    final_marking: :class:`pm4py.objects.petri.net.Marking` final marking in the Petri net
+    parameters: :class:`dict` (optional) dictionary containing the parameters of state_equation_a_star
+    (the cost functions refer to the transitions of the whole net, and the budgets are applied to each fragment)
+
+    Returns
+    -------
+    dictionary: `dict` with keys **alignment** (always None, since the alignments of the fragments cannot be
+    composed in a single alignment), **fragments_alignments** (list of the alignments of the projections of the
+    trace on the fragments), **cost** (sum of the costs of the fragments), **approximate** (True if a deviation
+    involves a shared transition, in which case the cost is only a lower bound of the cost of the optimal alignment),
+    **visited_states**, **queued_states**, **traversed_arcs** (sums over the fragments) and, if the budget has been
+    exceeded on a fragment, **partial** (True)
+    """
+    if parameters is None:
+        parameters = {}
+    activity_key = parameters[
+        PARAMETER_CONSTANT_ACTIVITY_KEY] if PARAMETER_CONSTANT_ACTIVITY_KEY in parameters else DEFAULT_NAME_KEY
+    activities = [event[activity_key] for event in trace]
+    trace_costs = parameters[PARAM_TRACE_COST_FUNCTION] if PARAM_TRACE_COST_FUNCTION in parameters else None
+    fragments = get_decomposition(petri_net, initial_marking, final_marking)
+    fragments_costs = get_fragments_costs(petri_net, fragments, parameters)
+    search_parameters = get_search_parameters(parameters)
+
+    shares = get_shares(fragments)
+
+    fragments_results = []
+    for fragment, (model_costs, sync_costs) in zip(fragments, fragments_costs):
+        projection, projection_costs = project_trace(activities, trace_costs, get_labels(fragment), shares)
+        fragments_results.append(align_projection(fragment[0], fragment[1], fragment[2], model_costs, sync_costs,
+                                                  projection, projection_costs, search_parameters))
+    return compose(activities, trace_costs, shares, fragments_results)
+
+
+def apply_log(log, petri_net, initial_marking, final_marking, parameters=None):
+    """
+    Performs the decomposed alignment of a log on a net: the fragments are distributed between a pool of worker
+    processes, and each worker aligns on its fragments the distinct projections of the variants of the log
+
+    Parameters
+    ----------
+    log: :class:`pm4py.objects.log.log.TraceLog` trace log
+    petri_net: :class:`pm4py.objects.petri.net.PetriNet` the Petri net to use in the alignment
+    initial_marking: :class:`pm4py.objects.petri.net.Marking` initial marking in the Petri net
+    final_marking: :class:`pm4py.objects.petri.net.Marking` final marking in the Petri net
+    parameters: :class:`dict` (optional) dictionary containing the parameters of apply, and:
+        PARAM_MAX_WORKERS: :class:`int` (parameter) number of worker processes (default: number of CPUs;
+        if 1, the fragments are aligned in the current process)
+
+    Returns
+    -------
+    alignments: :class:`list` of :class:`dict` (one for each trace, in the order of the log) with the keys returned
+    by apply, and **fitness**
+    """
+    if parameters is None:
+        parameters = {}
+    activity_key = parameters[
+        PARAMETER_CONSTANT_ACTIVITY_KEY] if PARAMETER_CONSTANT_ACTIVITY_KEY in parameters else DEFAULT_NAME_KEY
+    max_workers = parameters[PARAM_MAX_WORKERS] if PARAM_MAX_WORKERS in parameters else os.cpu_count()
+    fragments = get_decomposition(petri_net, initial_marking, final_marking)
+    fragments_costs = get_fragments_costs(petri_net, fragments, parameters)
+    search_parameters = get_search_parameters(parameters)
+
+    variants_idxs = {}
+    variants_activities = {}
+    for index, trace in enumerate(log):
+        activities = [x[activity_key] for x in trace]
+        variant = ",".join(activities)
+        if variant not in variants_idxs:
+            variants_idxs[variant] = []
+            variants_activities[variant] = activities
+        variants_idxs[variant].append(index)
+
+    shares = get_shares(fragments)
+    fragments_labels = [get_labels(fragment) for fragment in fragments]
+
+    # the distinct projections of the variants (and the empty one, needed by the best worst cost) on each fragment
+    variants_projections = {variant: [] for variant in variants_activities}
+    tasks = []
+    for fragment, labels, (model_costs, sync_costs) in zip(fragments, fragments_labels, fragments_costs):
+        projections = {(): ([], [])}
+        for variant in variants_activities:
+            projection, projection_costs = project_trace(variants_activities[variant], None, labels, shares)
+            projections[tuple(projection)] = (projection, projection_costs)
+            variants_projections[variant].append(tuple(projection))
+        tasks.append((fragment[0], fragment[1], fragment[2], model_costs, sync_costs,
+                      [x[0] for x in projections.values()], [x[1] for x in projections.values()],
+                      search_parameters))
+
+    max_workers = max(1, min(max_workers if max_workers is not None else 1, len(tasks)))
+    if max_workers == 1:
+        fragments_results = [align_fragment(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            fragments_results = list(executor.map(align_fragment, *zip(*tasks)))
+    fragments_results = [dict(zip([tuple(x) for x in task[5]], results))
+                         for task, results in zip(tasks, fragments_results)]
+
+    best_worst = compose([], None, shares, [results[()] for results in fragments_results])
+    best_worst_cost = best_worst['cost'] // alignments.utils.STD_MODEL_LOG_MOVE_COST
+    alignments_list = [None] * len(log)
+    for variant in variants_idxs:
+        activities = variants_activities[variant]
+        results = [fragment_results[projection]
+                   for projection, fragment_results in zip(variants_projections[variant], fragments_results)]
+        align = compose(activities, None, shares, results)
+        for index in variants_idxs[variant]:
+            trace_align = dict(align)
+            trace_align['fitness'] = alignments.factory.get_fitness(align, len(activities), best_worst_cost)
+            alignments_list[index] = trace_align
+    return alignments_list
+
+
+def get_labels(fragment):
+    """
+    Gets the labels of the visible transitions of a fragment
+    """
+    return {t.label for t in fragment[0].transitions if t.label is not None}
+
+
+def get_shares(fragments):
+    """
+    Gets, for each label, the number of fragments of the decomposition containing a transition with such label
+    """
+    shares = {}
+    for fragment in fragments:
+        for label in get_labels(fragment):
+            shares[label] = shares.get(label, 0) + 1
+    return shares
+
+
+def get_fragments_costs(petri_net, fragments, parameters):
+    """
+    Gets the model and synchronous cost functions of each fragment, splitting the costs of the shared transitions
+    between the fragments containing them
+    """
+    if PARAM_MODEL_COST_FUNCTION in parameters and PARAM_SYNC_COST_FUNCTION in parameters:
+        model_costs = parameters[PARAM_MODEL_COST_FUNCTION]
+        sync_costs = parameters[PARAM_SYNC_COST_FUNCTION]
+    else:
+        model_costs = {}
+        sync_costs = {}
+        for t in petri_net.transitions:
+            if t.label is not None:
+                model_costs[t] = alignments.utils.STD_MODEL_LOG_MOVE_COST
+                sync_costs[t] = alignments.utils.STD_SYNC_COST
+            else:
+                model_costs[t] = alignments.utils.STD_TAU_COST
+    shares = get_shares(fragments)
+    fragments_costs = []
+    for fragment in fragments:
+        fragment_model_costs = {}
+        fragment_sync_costs = {}
+        for t in fragment[0].transitions:
+            original = fragment[3][t]
+            share = shares[t.label] if t.label is not None else 1
+            fragment_model_costs[t] = model_costs[original] / share
+            if original in sync_costs:
+                fragment_sync_costs[t] = sync_costs[original] / share
+        fragments_costs.append((fragment_model_costs, fragment_sync_costs))
+    return fragments_costs
+
+
+def get_search_parameters(parameters):
+    """
+    Gets the parameters (budgets) passed to the search on each fragment
+    """
+    return {x: parameters[x] for x in [state_equation_a_star.PARAM_MAX_VISITED_STATES,
+                                       state_equation_a_star.PARAM_MAX_TRACE_TIME,
+                                       state_equation_a_star.PARAM_DEADLINE,
+                                       state_equation_a_star.PARAM_LP_SOLVER] if x in parameters}
+
+
+def project_trace(activities, trace_costs, labels, shares):
+    """
+    Projects a trace on the activities of a fragment
+
+    Parameters
+    ----------
+    activities: :class:`list` activities of the trace
+    trace_costs: :class:`list` cost of the log move of each event of the trace (None for the standard costs)
+    labels: :class:`set` labels of the transitions of the fragment
+    shares: :class:`dict` number of fragments containing each label (see get_shares)
+
+    Returns
+    -------
+    projection: :class:`list` activities of the trace that are labels of transitions of the fragment
+    projection_costs: :class:`list` costs of the log moves of the projected events, split between the fragments
+    sharing the activity
+    """
+    projection = []
+    projection_costs = []
+    for index, activity in enumerate(activities):
+        if activity in labels:
+            projection.append(activity)
+            cost = trace_costs[index] if trace_costs is not None else alignments.utils.STD_MODEL_LOG_MOVE_COST
+            projection_costs.append(cost / shares[activity])
+    return projection, projection_costs
+
+
+def align_projection(net, initial_marking, final_marking, model_costs, sync_costs, projection, projection_costs,
+                     parameters):
+    """
+    Aligns the projection of a trace on a fragment
+    """
+    trace = log_implementation.Trace([log_implementation.Event({DEFAULT_NAME_KEY: a}) for a in projection])
+    search_parameters = dict(parameters)
+    search_parameters[PARAM_TRACE_COST_FUNCTION] = projection_costs
+    search_parameters[PARAM_MODEL_COST_FUNCTION] = model_costs
+    search_parameters[PARAM_SYNC_COST_FUNCTION] = sync_costs
+    search_parameters[PARAMETER_CONSTANT_ACTIVITY_KEY] = DEFAULT_NAME_KEY
+    return state_equation_a_star.apply(trace, net, initial_marking, final_marking, parameters=search_parameters)
+
+
+def align_fragment(net, initial_marking, final_marking, model_costs, sync_costs, projections, projections_costs,
+                   parameters):
+    """
+    Aligns several projections on a fragment (executed by the worker processes)
+
+    Returns
+    -------
+    results: :class:`list` results of the alignment of the projections, in the same order
+    """
+    return [align_projection(net, initial_marking, final_marking, model_costs, sync_costs, projection,
+                             projection_costs, parameters)
+            for projection, projection_costs in zip(projections, projections_costs)]
+
+
+def compose(activities, trace_costs, shares, fragments_results):
+    """
+    Composes the results of the alignments of the projections of a trace on the fragments
+    """
+    cost = 0
+    # the events whose activity is not a label of the fragments are log moves in any alignment
+    for index, activity in enumerate(activities):
+        if activity not in shares:
+            cost += trace_costs[index] if trace_costs is not None else alignments.utils.STD_MODEL_LOG_MOVE_COST
+    result = {'alignment': None, 'fragments_alignments': [], 'visited_states': 0, 'queued_states': 0,
+              'traversed_arcs': 0}
+    for fragment_result in fragments_results:
+        if fragment_result is None:
+            # the final marking of the fragment is not reachable
+            return None
+        cost += fragment_result['cost']
+        result['fragments_alignments'].append(fragment_result['alignment'])
+        for key in ['visited_states', 'queued_states', 'traversed_arcs']:
+            result[key] += fragment_result[key]
+        if 'partial' in fragment_result and fragment_result['partial']:
+            result['partial'] = True
+    # the split costs are summed as floats
+    result['cost'] = round(cost, 6)
+    # the cost is exact when no deviation involves a shared transition (whose cost has been split)
+    result['approximate'] = len(fragments_results) > 1 and any(
+        __is_shared_deviation(move, shares) for alignment in result['fragments_alignments'] for move in alignment)
+    return result
+
+
+def __is_shared_deviation(move, shares):
+    """
+    Checks if a move of the alignment of a projection is a log or model move on a label shared by several fragments
+    """
+    log_label, model_label = move
+    if log_label == alignments.utils.SKIP:
+        label = model_label
+    elif model_label == alignments.utils.SKIP:
+        label = log_label
+    else:
+        return False
+    return label is not None and shares.get(label, 0) > 1
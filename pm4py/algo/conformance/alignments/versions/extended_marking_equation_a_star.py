@@ -0,0 +1,447 @@
+"""
+This module contains code that allows us to compute alignments on the basis of an A* search on the state-space
+of the synchronous product net of a trace and a Petri net, using the extended marking equation with split points
+as heuristic, following [1]_.
+The trace is split in several segments (at the split points), and the LP requires each segment to start with a
+transition explaining the first event of the segment, which is enabled after the previous segments. The bound
+is much tighter than the one of the marking equation.
+The LP is solved once for the initial marking; the heuristic of the other states is derived from the solution.
+When a state whose derived solution is not feasible is reached, if the maximum number of events explained so far
+is not already a split point, it is added as a split point and the search is restarted; otherwise the (plain)
+marking equation is solved for the state.
+Since heuristic values coming from different LPs are mixed, the heuristic is admissible but not consistent,
+hence closed markings are reopened when they are reached with a lower cost.
+Each restart discards the states visited so far: with many split points, the searches interrupted by the restarts
+may visit more states than the last search (and than the state equation A* version), although the last search
+benefits from the tighter bound.
+
+References
+----------
+.. [1] Boudewijn F. van Dongen, "Efficiently Computing Alignments - Using the Extended Marking Equation",
+      BPM 2018: 197-214.
+
+"""
+import heapq
+import math
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+from cvxopt import matrix, solvers, spmatrix
+
+from pm4py import util as pm4pyutil
+from pm4py.algo.conformance import alignments
+from pm4py.algo.conformance.alignments.versions.state_equation_a_star import get_sync_product_template
+from pm4py.objects import petri
+from pm4py.objects.log import log as log_implementation
+from pm4py.objects.log.util.xes import DEFAULT_NAME_KEY
+from pm4py.util.constants import PARAMETER_CONSTANT_ACTIVITY_KEY
+
+PARAM_TRACE_COST_FUNCTION = 'trace_cost_function'
+PARAM_MODEL_COST_FUNCTION = 'model_cost_function'
+PARAM_SYNC_COST_FUNCTION = 'sync_cost_function'
+PARAM_MAX_VISITED_STATES = 'max_visited_states'
+PARAM_MAX_TRACE_TIME = 'max_trace_time'
+PARAM_DEADLINE = 'deadline'
+
+PARAMETERS = [PARAM_TRACE_COST_FUNCTION, PARAM_MODEL_COST_FUNCTION, PARAM_SYNC_COST_FUNCTION,
+              pm4pyutil.constants.PARAMETER_CONSTANT_ACTIVITY_KEY, PARAM_MAX_VISITED_STATES, PARAM_MAX_TRACE_TIME,
+              PARAM_DEADLINE]
+
+BUDGET_MAX_VISITED_STATES = 'max_visited_states'
+BUDGET_TIME = 'time'
+
+
+def get_best_worst_cost(petri_net, initial_marking, final_marking):
+    """
+    Gets the best worst cost of an alignment
+
+    Parameters
+    -----------
+    petri_net
+        Petri net
+    initial_marking
+        Initial marking
+    final_marking
+        Final marking
+
+    Returns
+    -----------
+    best_worst_cost
+        Best worst cost of alignment
+    """
+    best_worst = apply(log_implementation.Trace(), petri_net, initial_marking, final_marking)
+    return best_worst['cost'] // alignments.utils.STD_MODEL_LOG_MOVE_COST
+
+
+def apply(trace, petri_net, initial_marking, final_marking, parameters=None):
+    """
+    Performs the alignment search with the extended marking equation heuristic, given a trace and a net.
+
+    Parameters
+    ----------
+    trace: :class:`list` input trace, assumed to be a list of events (i.e. the code will use the activity key
+    to get the attributes)
+    petri_net: :class:`pm4py.objects.petri.net.PetriNet` the Petri net to use in the alignment
+    initial_marking: :class:`pm4py.objects.petri.net.Marking` initial marking in the Petri net
+    final_marking: :class:`pm4py.objects.petri.net.Marking` final marking in the Petri net
+    parameters: :class:`dict` (optional) dictionary containing one of the following:
+        PARAM_TRACE_COST_FUNCTION: :class:`list` (parameter) mapping of each index of the trace to a positive cost value
+        PARAM_MODEL_COST_FUNCTION: :class:`dict` (parameter) mapping of each transition in the model to corresponding
+        model cost
+        PARAM_SYNC_COST_FUNCTION: :class:`dict` (parameter) mapping of each transition in the model to corresponding
+        synchronous costs
+        PARAM_ACTIVITY_KEY: :class:`str` (parameter) key to use to identify the activity described by the events
+        PARAM_MAX_VISITED_STATES: :class:`int` (parameter) maximum number of states visited by the search
+        PARAM_MAX_TRACE_TIME: :class:`float` (parameter) maximum time (in seconds) spent in the search
+        PARAM_DEADLINE: :class:`float` (parameter) timestamp (as returned by time.time()) at which the search
+        shall be stopped
+
+    Returns
+    -------
+    dictionary: `dict` with keys **alignment**, **cost**, **visited_states**, **queued_states**, **traversed_arcs**,
+    **lp_solved**, **lp_time**, **split_points**, **restarts** and **restarted_visited_states** (number of states,
+    included in visited_states, visited by the searches interrupted by a restart). If a budget is exceeded, the
+    dictionary also contains **partial** (True) and **budget_exceeded** (BUDGET_MAX_VISITED_STATES or BUDGET_TIME),
+    as in state_equation_a_star
+    """
+    if parameters is None:
+        parameters = {}
+    activity_key = parameters[
+        PARAMETER_CONSTANT_ACTIVITY_KEY] if PARAMETER_CONSTANT_ACTIVITY_KEY in parameters else DEFAULT_NAME_KEY
+    max_visited_states = parameters[PARAM_MAX_VISITED_STATES] if PARAM_MAX_VISITED_STATES in parameters else None
+    deadline = parameters[PARAM_DEADLINE] if PARAM_DEADLINE in parameters else None
+    if PARAM_MAX_TRACE_TIME in parameters and parameters[PARAM_MAX_TRACE_TIME] is not None:
+        trace_deadline = time.time() + parameters[PARAM_MAX_TRACE_TIME]
+        deadline = trace_deadline if deadline is None else min(deadline, trace_deadline)
+
+    if PARAM_TRACE_COST_FUNCTION not in parameters or PARAM_MODEL_COST_FUNCTION not in parameters or \
+            PARAM_SYNC_COST_FUNCTION not in parameters:
+        trace_costs = [alignments.utils.STD_MODEL_LOG_MOVE_COST] * len(trace)
+        model_costs = {}
+        sync_costs = {}
+        for t in petri_net.transitions:
+            if t.label is not None:
+                model_costs[t] = alignments.utils.STD_MODEL_LOG_MOVE_COST
+                sync_costs[t] = alignments.utils.STD_SYNC_COST
+            else:
+                model_costs[t] = alignments.utils.STD_TAU_COST
+    else:
+        trace_costs = parameters[PARAM_TRACE_COST_FUNCTION]
+        model_costs = parameters[PARAM_MODEL_COST_FUNCTION]
+        sync_costs = parameters[PARAM_SYNC_COST_FUNCTION]
+
+    template = get_sync_product_template(petri_net, initial_marking, final_marking, model_costs, sync_costs)
+    sync_prod, sync_initial_marking, sync_final_marking, cost_function = template.construct(
+        [event[activity_key] for event in trace], trace_costs)
+    try:
+        incidence_matrix = petri.incidence_matrix.construct(sync_prod, columns=template.incidence_columns)
+        lp_model = __build_lp_model(incidence_matrix, sync_initial_marking, sync_final_marking, cost_function,
+                                    template.event_indexes, template.trace_place_indexes)
+        return __search(sync_prod, sync_initial_marking, sync_final_marking, cost_function, alignments.utils.SKIP,
+                        len(trace), lp_model, max_visited_states=max_visited_states, deadline=deadline)
+    finally:
+        template.release()
+
+
+def __search(sync_net, ini, fin, cost_function, skip, trace_length, lp_model, max_visited_states=None,
+             deadline=None):
+    stats = {'lp_solved': 0, 'lp_time': 0.0, 'visited': 0, 'queued': 0, 'traversed': 0, 'restarts': 0,
+             'restarted_visited': 0}
+    split_points = []
+    # the synchronous product net is not modified during the search
+    consumers_index = petri.semantics.get_consumers_index(sync_net)
+    while True:
+        restart, result = __search_with_split_points(sync_net, ini, fin, cost_function, skip, trace_length,
+                                                     lp_model, split_points, stats, max_visited_states, deadline,
+                                                     consumers_index)
+        if not restart:
+            if result is not None:
+                result['split_points'] = list(split_points)
+                result['restarts'] = stats['restarts']
+                result['restarted_visited_states'] = stats['restarted_visited']
+            return result
+        stats['restarts'] += 1
+        stats['restarted_visited'] = stats['visited']
+
+
+def __search_with_split_points(sync_net, ini, fin, cost_function, skip, trace_length, lp_model, split_points,
+                               stats, max_visited_states, deadline, consumers_index):
+    """
+    Runs the A* search with the given split points. Returns a couple (restart, result), where restart is True
+    when a new split point has been added (and the search shall be restarted)
+    """
+    h, x = __compute_extended_heuristic(lp_model, split_points, stats)
+    ini_state = SearchTuple(0 + h, 0, h, ini, None, None, x, True)
+    open_set = [ini_state]
+    open_index = {ini: ini_state}
+    # the heuristic is admissible but not consistent: a closed marking is reopened when reached with a lower cost
+    closed = {}
+    best = ini_state
+    # maximum number of events explained by a visited marking
+    max_events = 0
+    while not len(open_set) == 0:
+        if max_visited_states is not None and stats['visited'] >= max_visited_states:
+            return False, __reconstruct_alignment(best, stats, budget_exceeded=BUDGET_MAX_VISITED_STATES)
+        if deadline is not None and time.time() > deadline:
+            return False, __reconstruct_alignment(best, stats, budget_exceeded=BUDGET_TIME)
+        curr = heapq.heappop(open_set)
+        if open_index.get(curr.m) is not curr:
+            continue
+        if not curr.trust:
+            if 0 < max_events < trace_length and max_events not in split_points:
+                split_points.append(max_events)
+                split_points.sort()
+                return True, None
+            h, x = __compute_exact_heuristic(lp_model, curr.m, stats)
+            tp = SearchTuple(curr.g + h, curr.g, h, curr.m, curr.p, curr.t, x, __trust_solution(x))
+            open_index[curr.m] = tp
+            heapq.heappush(open_set, tp)
+            continue
+
+        del open_index[curr.m]
+        stats['visited'] += 1
+        current_marking = curr.m
+        closed[current_marking] = curr.g
+        if curr.h < best.h or (curr.h == best.h and curr.g > best.g):
+            best = curr
+        for p in current_marking:
+            if p in lp_model['trace_places']:
+                max_events = max(max_events, lp_model['trace_places'][p])
+        if current_marking == fin:
+            return False, __reconstruct_alignment(curr, stats)
+        for t in petri.semantics.enabled_transitions(sync_net, current_marking, consumers_index=consumers_index):
+            if curr.t is not None and __is_log_move(curr.t, skip) and __is_model_move(t, skip):
+                continue
+            stats['traversed'] += 1
+            new_marking = petri.semantics.execute(t, sync_net, current_marking)
+            g = curr.g + cost_function[t]
+            if new_marking in closed:
+                if g >= closed[new_marking]:
+                    continue
+                del closed[new_marking]
+
+            alt = open_index.get(new_marking)
+            if alt is not None and g >= alt.g:
+                continue
+            stats['queued'] += 1
+            h, x = __derive_heuristic(lp_model, curr.x, t, curr.h)
+            tp = SearchTuple(g + h, g, h, new_marking, curr, t, x, __trust_solution(x))
+            open_index[new_marking] = tp
+            heapq.heappush(open_set, tp)
+    return False, None
+
+
+def __build_lp_model(incidence_matrix, ini, fin, cost_function, event_indexes, trace_place_indexes):
+    """
+    Builds the matrices shared by the LPs solved during the search: incidence matrix, consumption matrix,
+    costs, and the transitions explaining each event of the trace (given by the template of the synchronous
+    product, see SynchronousProductTemplate.event_indexes and trace_place_indexes)
+    """
+    transitions = incidence_matrix.transitions
+    cost_vec = np.zeros(len(transitions))
+    # transitions of the synchronous product explaining each event (log moves and synchronous moves)
+    event_transitions = {}
+    for t in transitions:
+        cost_vec[transitions[t]] = cost_function[t]
+        if t in event_indexes:
+            event = event_indexes[t]
+            if event not in event_transitions:
+                event_transitions[event] = []
+            event_transitions[event].append(transitions[t])
+    # number of events explained when each place of the trace part holds the token
+    trace_places = dict(trace_place_indexes)
+    # the matrices are kept as lists of entries (COO), that are shifted in the blocks of the LPs
+    return {'a_matrix': incidence_matrix.a_matrix.tocoo(), 'pre_matrix': incidence_matrix.pre_matrix.tocoo(),
+            'cost_vec': cost_vec, 'ini_vec': incidence_matrix.encode_marking(ini),
+            'fin_vec': incidence_matrix.encode_marking(fin),
+            'event_transitions': event_transitions, 'trace_places': trace_places,
+            'incidence_matrix': incidence_matrix}
+
+
+def __solve_lp(c, g_rows, h_vec, a_rows, b_vec, no_variables, stats):
+    """
+    Solves min c*x subject to G*x <= h, A*x = b (G and A given as lists of (row, column, value) entries)
+    """
+    g_vals, g_i, g_j = zip(*[(v, i, j) for (i, j, v) in g_rows]) if g_rows else ((), (), ())
+    a_vals, a_i, a_j = zip(*[(v, i, j) for (i, j, v) in a_rows]) if a_rows else ((), (), ())
+    g_matrix = spmatrix(list(g_vals), list(g_i), list(g_j), size=(len(h_vec), no_variables))
+    a_matrix = spmatrix(list(a_vals), list(a_i), list(a_j), size=(len(b_vec), no_variables))
+    lp_start = time.time()
+    sol = solvers.lp(matrix(c), g_matrix, matrix(np.asarray(h_vec, dtype=float)), a_matrix,
+                     matrix(np.asarray(b_vec, dtype=float)), solver='glpk',
+                     options={'glpk': {'msg_lev': 'GLP_MSG_OFF'}})
+    stats['lp_solved'] += 1
+    stats['lp_time'] += time.time() - lp_start
+    if sol['x'] is None:
+        return None, None
+    return sol['primal objective'], np.array(sol['x']).flatten()
+
+
+def __sparse_entries(sparse, row_offset, col_offset, sign=1.0, columns=None):
+    entries = []
+    for i, j, v in zip(sparse.row.tolist(), sparse.col.tolist(), sparse.data.tolist()):
+        if columns is None:
+            entries.append((row_offset + i, col_offset + j, sign * v))
+        elif j in columns:
+            entries.append((row_offset + i, col_offset + columns[j], sign * v))
+    return entries
+
+
+def __compute_extended_heuristic(lp_model, split_points, stats):
+    """
+    Computes the heuristic of the initial marking using the extended marking equation with the given split points.
+
+    The variables are the (real valued) firing vectors x_0, ..., x_k of the segments and, for each split point a,
+    the vector y_a of the transitions explaining the first event of the segment (only the transitions explaining
+    that event are variables). Constraints:
+    - ini + C * (x_0 + y_1 + x_1 + ... + y_k + x_k) = fin
+    - for each split point a: ini + C * (x_0 + y_1 + ... + x_{a-1}) - Pre * y_a >= 0
+    - for each split point a: sum(y_a) = 1
+    - all the variables are non-negative
+    """
+    a_matrix, pre_matrix, cost_vec = lp_model['a_matrix'], lp_model['pre_matrix'], lp_model['cost_vec']
+    no_places, no_transitions = a_matrix.shape
+    # blocks of variables: (offset, mapping from transition index to variable index or None for full blocks)
+    blocks = [(0, None)]
+    no_variables = no_transitions
+    for split_point in split_points:
+        columns = {t: idx for idx, t in enumerate(lp_model['event_transitions'][split_point])}
+        blocks.append((no_variables, columns))
+        no_variables = no_variables + len(columns)
+        blocks.append((no_variables, None))
+        no_variables = no_variables + no_transitions
+
+    c = np.zeros(no_variables)
+    for offset, columns in blocks:
+        if columns is None:
+            c[offset:offset + no_transitions] = cost_vec
+        else:
+            for t, idx in columns.items():
+                c[offset + idx] = cost_vec[t]
+
+    a_rows = []
+    for offset, columns in blocks:
+        a_rows.extend(__sparse_entries(a_matrix, 0, offset, columns=columns))
+    b_vec = list(lp_model['fin_vec'] - lp_model['ini_vec'])
+
+    g_rows = [(i, i, -1.0) for i in range(no_variables)]
+    h_vec = [0.0] * no_variables
+    for index, split_point in enumerate(split_points):
+        y_block = 1 + 2 * index
+        row_offset = len(h_vec)
+        for offset, columns in blocks[:y_block]:
+            g_rows.extend(__sparse_entries(a_matrix, row_offset, offset, sign=-1.0, columns=columns))
+        g_rows.extend(__sparse_entries(pre_matrix, row_offset, blocks[y_block][0], columns=blocks[y_block][1]))
+        h_vec.extend(lp_model['ini_vec'].tolist())
+        row = len(b_vec)
+        for idx in blocks[y_block][1].values():
+            a_rows.append((row, blocks[y_block][0] + idx, 1.0))
+        b_vec.append(1.0)
+
+    h, sol = __solve_lp(c, g_rows, h_vec, a_rows, b_vec, no_variables, stats)
+    if h is None:
+        return math.inf, [0.0] * no_transitions
+    x = np.zeros(no_transitions)
+    for offset, columns in blocks:
+        if columns is None:
+            x = x + sol[offset:offset + no_transitions]
+        else:
+            for t, idx in columns.items():
+                x[t] += sol[offset + idx]
+    return h, list(x)
+
+
+def __compute_exact_heuristic(lp_model, marking, stats):
+    """
+    Computes the heuristic of a marking using the (plain) marking equation
+    """
+    a_matrix, cost_vec = lp_model['a_matrix'], lp_model['cost_vec']
+    no_transitions = a_matrix.shape[1]
+    m_vec = lp_model['incidence_matrix'].encode_marking(marking)
+    h, x = __solve_lp(cost_vec, [(i, i, -1.0) for i in range(no_transitions)], [0.0] * no_transitions,
+                      __sparse_entries(a_matrix, 0, 0), list(lp_model['fin_vec'] - m_vec), no_transitions, stats)
+    if h is None:
+        return math.inf, [0.0] * no_transitions
+    return h, list(x)
+
+
+def __derive_heuristic(lp_model, x, t, h):
+    index = lp_model['incidence_matrix'].transitions[t]
+    x_prime = list(x)
+    x_prime[index] -= 1
+    return max(0, h - lp_model['cost_vec'][index]), x_prime
+
+
+def __is_model_move(t, skip):
+    return t.label[0] == skip and t.label[1] != skip
+
+
+def __is_log_move(t, skip):
+    return t.label[0] != skip and t.label[1] == skip
+
+
+def __trust_solution(x):
+    for v in x:
+        if v < -0.001:
+            return False
+    return True
+
+
+def __reconstruct_alignment(state, stats, budget_exceeded=None):
+    alignment = []
+    curr = state
+    while curr.p is not None:
+        alignment.append(curr.t.label)
+        curr = curr.p
+    alignment.reverse()
+    result = {'alignment': alignment, 'cost': state.g, 'visited_states': stats['visited'],
+              'queued_states': stats['queued'], 'traversed_arcs': stats['traversed'],
+              'lp_solved': stats['lp_solved'], 'lp_time': stats['lp_time']}
+    if budget_exceeded is not None:
+        # the heuristic of a state may be negative (e.g. an untrusted solution of the LP), while the cost of an
+        # alignment is not
+        result['cost'] = max(0, state.g + state.h)
+        result['partial'] = True
+        result['budget_exceeded'] = budget_exceeded
+    return result
+
+
+@dataclass
+class SearchTuple:
+    f: float
+    g: float
+    h: float
+    m: petri.petrinet.Marking
+    p: Any
+    t: petri.petrinet.PetriNet.Transition
+    x: Any
+    trust: bool
+
+    def __lt__(self, other):
+        if self.f < other.f:
+            return True
+        elif other.f < self.f:
+            return False
+        else:
+            if self.trust == other.trust:
+                if self.h < other.h:
+                    return True
+                else:
+                    return False
+            else:
+                return self.trust
+
+    def __get_firing_sequence(self):
+        ret = []
+        if self.p is not None:
+            ret = ret + self.p.__get_firing_sequence()
+        if self.t is not None:
+            ret.append(self.t)
+        return ret
+
+    def __repr__(self):
+        string_build = ["\nm=" + str(self.m), " f=" + str(self.f), ' g=' + str(self.g), " h=" + str(self.h),
+                        " path=" + str(self.__get_firing_sequence()) + "\n\n"]
+        return " ".join(string_build)
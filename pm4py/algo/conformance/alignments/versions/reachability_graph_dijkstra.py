@@ -0,0 +1,285 @@
+"""
+This module contains code that allows us to compute alignments on the basis of a shortest path search (Dijkstra) on
+the product between a trace and the reachability graph of the model.
+The reachability graph is built only once for each model (and cached), so this version is much cheaper than
+building a synchronous product net and solving LPs for each trace, as long as the model is small and bounded.
+"""
+import heapq
+import time
+
+from pm4py import util as pm4pyutil
+from pm4py.algo.conformance import alignments
+from pm4py.objects.log import log as log_implementation
+from pm4py.objects.log.util.xes import DEFAULT_NAME_KEY
+from pm4py.objects.petri import net_cache
+from pm4py.objects.petri import reachability_graph
+from pm4py.util.constants import PARAMETER_CONSTANT_ACTIVITY_KEY
+
+PARAM_TRACE_COST_FUNCTION = 'trace_cost_function'
+PARAM_MODEL_COST_FUNCTION = 'model_cost_function'
+PARAM_SYNC_COST_FUNCTION = 'sync_cost_function'
+PARAM_MAX_VISITED_STATES = 'max_visited_states'
+PARAM_MAX_TRACE_TIME = 'max_trace_time'
+PARAM_DEADLINE = 'deadline'
+PARAM_MAX_AUTOMATON_STATES = 'max_automaton_states'
+
+PARAMETERS = [PARAM_TRACE_COST_FUNCTION, PARAM_MODEL_COST_FUNCTION, PARAM_SYNC_COST_FUNCTION,
+              pm4pyutil.constants.PARAMETER_CONSTANT_ACTIVITY_KEY, PARAM_MAX_VISITED_STATES, PARAM_MAX_TRACE_TIME,
+              PARAM_DEADLINE, PARAM_MAX_AUTOMATON_STATES]
+
+BUDGET_MAX_VISITED_STATES = 'max_visited_states'
+BUDGET_TIME = 'time'
+
+# maximum number of states of the reachability graph of the models aligned by this version
+DEFAULT_MAX_AUTOMATON_STATES = 2000
+
+
+class Automaton(object):
+    """
+    Compiled reachability graph of a model: states are numbered (0 is the initial state), and for each state
+    the list of the outgoing arcs (as couples of Petri net transition and target state) is kept
+    """
+
+    def __init__(self, outgoing, final_states):
+        self.outgoing = outgoing
+        self.final_states = final_states
+
+
+def build_automaton(petri_net, initial_marking, final_marking, max_states=DEFAULT_MAX_AUTOMATON_STATES):
+    """
+    Builds the automaton (compiled reachability graph) of a model
+
+    Parameters
+    ----------
+    petri_net: :class:`pm4py.objects.petri.net.PetriNet` the Petri net
+    initial_marking: :class:`pm4py.objects.petri.net.Marking` initial marking in the Petri net
+    final_marking: :class:`pm4py.objects.petri.net.Marking` final marking in the Petri net
+    max_states: :class:`int` maximum number of states of the reachability graph
+
+    Returns
+    -------
+    automaton: :class:`Automaton` the automaton, or None if the reachability graph has more than max_states states
+    or the final marking is not reachable
+    """
+    automaton = None
+    try:
+        re_gr = reachability_graph.construct_reachability_graph(petri_net, initial_marking, max_states=max_states)
+        states_idx = {}
+        for state in re_gr.states:
+            states_idx[state] = 0 if state.data['marking'] == initial_marking else None
+        counter = 1
+        for state in states_idx:
+            if states_idx[state] is None:
+                states_idx[state] = counter
+                counter = counter + 1
+        outgoing = [[] for _ in range(len(states_idx))]
+        final_states = set()
+        for state in states_idx:
+            if state.data['marking'] == final_marking:
+                final_states.add(states_idx[state])
+            for arc in state.outgoing:
+                outgoing[states_idx[state]].append((arc.data['transition'], states_idx[arc.to_state]))
+        if final_states:
+            automaton = Automaton(outgoing, final_states)
+    except reachability_graph.StateSpaceTooLargeException:
+        pass
+    return automaton
+
+
+def get_automaton(petri_net, initial_marking, final_marking, max_states=DEFAULT_MAX_AUTOMATON_STATES):
+    """
+    Gets the automaton (compiled reachability graph) of a model from the cache of pm4py.objects.petri.net_cache,
+    building it only if the model, its markings or the maximum number of states changed since the last call
+
+    Parameters
+    ----------
+    petri_net: :class:`pm4py.objects.petri.net.PetriNet` the Petri net
+    initial_marking: :class:`pm4py.objects.petri.net.Marking` initial marking in the Petri net
+    final_marking: :class:`pm4py.objects.petri.net.Marking` final marking in the Petri net
+    max_states: :class:`int` maximum number of states of the reachability graph
+
+    Returns
+    -------
+    automaton: :class:`Automaton` the automaton, or None if the reachability graph has more than max_states states
+    or the final marking is not reachable
+    """
+    return net_cache.get(petri_net, initial_marking, final_marking, ("automaton", max_states),
+                         lambda: build_automaton(petri_net, initial_marking, final_marking, max_states=max_states),
+                         bound_to_net=True)
+
+
+def get_best_worst_cost(petri_net, initial_marking, final_marking):
+    """
+    Gets the best worst cost of an alignment
+
+    Parameters
+    -----------
+    petri_net
+        Petri net
+    initial_marking
+        Initial marking
+    final_marking
+        Final marking
+
+    Returns
+    -----------
+    best_worst_cost
+        Best worst cost of alignment
+    """
+    best_worst = apply(log_implementation.Trace(), petri_net, initial_marking, final_marking)
+    return best_worst['cost'] // alignments.utils.STD_MODEL_LOG_MOVE_COST
+
+
+def apply(trace, petri_net, initial_marking, final_marking, parameters=None):
+    """
+    Performs the alignment search on the product between the trace and the reachability graph of the net.
+
+    Parameters
+    ----------
+    trace: :class:`list` input trace, assumed to be a list of events (i.e. the code will use the activity key
+    to get the attributes)
+    petri_net: :class:`pm4py.objects.petri.net.PetriNet` the Petri net to use in the alignment
+    initial_marking: :class:`pm4py.objects.petri.net.Marking` initial marking in the Petri net
+    final_marking: :class:`pm4py.objects.petri.net.Marking` final marking in the Petri net
+    parameters: :class:`dict` (optional) dictionary containing one of the following:
+        PARAM_TRACE_COST_FUNCTION: :class:`list` (parameter) mapping of each index of the trace to a positive cost value
+        PARAM_MODEL_COST_FUNCTION: :class:`dict` (parameter) mapping of each transition in the model to corresponding
+        model cost
+        PARAM_SYNC_COST_FUNCTION: :class:`dict` (parameter) mapping of each transition in the model to corresponding
+        synchronous costs
+        PARAM_ACTIVITY_KEY: :class:`str` (parameter) key to use to identify the activity described by the events
+        PARAM_MAX_VISITED_STATES: :class:`int` (parameter) maximum number of states visited by the search
+        PARAM_MAX_TRACE_TIME: :class:`float` (parameter) maximum time (in seconds) spent in the search
+        PARAM_DEADLINE: :class:`float` (parameter) timestamp (as returned by time.time()) at which the search
+        shall be stopped
+        PARAM_MAX_AUTOMATON_STATES: :class:`int` (parameter) maximum number of states of the reachability graph
+        (default: DEFAULT_MAX_AUTOMATON_STATES)
+
+    Returns
+    -------
+    dictionary: `dict` with keys **alignment**, **cost**, **visited_states**, **queued_states** and
+    **traversed_arcs**. If a budget is exceeded, the search is stopped and the dictionary also contains
+    **partial** (True) and **budget_exceeded** (BUDGET_MAX_VISITED_STATES or BUDGET_TIME): the alignment is then
+    the prefix alignment leading to the visited state that is the furthest in the trace
+    """
+    if parameters is None:
+        parameters = {}
+    activity_key = parameters[
+        PARAMETER_CONSTANT_ACTIVITY_KEY] if PARAMETER_CONSTANT_ACTIVITY_KEY in parameters else DEFAULT_NAME_KEY
+    max_visited_states = parameters[PARAM_MAX_VISITED_STATES] if PARAM_MAX_VISITED_STATES in parameters else None
+    deadline = parameters[PARAM_DEADLINE] if PARAM_DEADLINE in parameters else None
+    if PARAM_MAX_TRACE_TIME in parameters and parameters[PARAM_MAX_TRACE_TIME] is not None:
+        trace_deadline = time.time() + parameters[PARAM_MAX_TRACE_TIME]
+        deadline = trace_deadline if deadline is None else min(deadline, trace_deadline)
+    max_automaton_states = parameters[
+        PARAM_MAX_AUTOMATON_STATES] if PARAM_MAX_AUTOMATON_STATES in parameters else DEFAULT_MAX_AUTOMATON_STATES
+
+    if PARAM_TRACE_COST_FUNCTION not in parameters or PARAM_MODEL_COST_FUNCTION not in parameters or \
+            PARAM_SYNC_COST_FUNCTION not in parameters:
+        trace_costs = [alignments.utils.STD_MODEL_LOG_MOVE_COST] * len(trace)
+        model_costs = {}
+        sync_costs = {}
+        for t in petri_net.transitions:
+            if t.label is not None:
+                model_costs[t] = alignments.utils.STD_MODEL_LOG_MOVE_COST
+                sync_costs[t] = alignments.utils.STD_SYNC_COST
+            else:
+                model_costs[t] = alignments.utils.STD_TAU_COST
+    else:
+        trace_costs = parameters[PARAM_TRACE_COST_FUNCTION]
+        model_costs = parameters[PARAM_MODEL_COST_FUNCTION]
+        sync_costs = parameters[PARAM_SYNC_COST_FUNCTION]
+
+    automaton = get_automaton(petri_net, initial_marking, final_marking, max_states=max_automaton_states)
+    if automaton is None:
+        raise Exception("the reachability graph of the model is too large, or the final marking is not reachable")
+
+    return apply_automaton([event[activity_key] for event in trace], automaton, trace_costs, model_costs,
+                           sync_costs, alignments.utils.SKIP, max_visited_states=max_visited_states,
+                           deadline=deadline)
+
+
+def apply_automaton(activities, automaton, trace_costs, model_costs, sync_costs, skip, max_visited_states=None,
+                    deadline=None):
+    """
+    Performs a Dijkstra search on the product between the trace and the automaton of the model.
+    A state of the product is a couple (state of the automaton, number of activities of the trace already aligned)
+
+    Parameters
+    ----------
+    activities: :class:`list` activities of the trace
+    automaton: :class:`Automaton` automaton of the model
+    trace_costs: :class:`list` mapping of each index of the trace to the cost of the log move
+    model_costs: :class:`dict` mapping of each transition in the model to corresponding model cost
+    sync_costs: :class:`dict` mapping of each transition in the model to corresponding synchronous costs
+    skip: :class:`Any` symbol to use for skips in the alignment
+    max_visited_states: :class:`int` maximum number of states visited by the search
+    deadline: :class:`float` timestamp (as returned by time.time()) at which the search shall be stopped
+
+    Returns
+    -------
+    dictionary : :class:`dict` with keys **alignment**, **cost**, **visited_states**, **queued_states**
+    and **traversed_arcs** (and **partial** and **budget_exceeded** if a budget is exceeded, see apply)
+    """
+    trace_length = len(activities)
+    # predecessor of each reached state of the product: (previous state, label of the move)
+    predecessors = {(0, 0): None}
+    distances = {(0, 0): 0}
+    closed = set()
+    open_set = [(0, 0, 0, 0)]
+    counter = 1
+    visited = 0
+    queued = 0
+    traversed = 0
+    best = (0, 0)
+    while open_set:
+        if max_visited_states is not None and visited >= max_visited_states:
+            return __reconstruct_alignment(best, predecessors, distances, visited, queued, traversed,
+                                           budget_exceeded=BUDGET_MAX_VISITED_STATES)
+        if deadline is not None and time.time() > deadline:
+            return __reconstruct_alignment(best, predecessors, distances, visited, queued, traversed,
+                                           budget_exceeded=BUDGET_TIME)
+        g, _, state, i = heapq.heappop(open_set)
+        if (state, i) in closed:
+            continue
+        closed.add((state, i))
+        visited += 1
+        if i > best[1]:
+            best = (state, i)
+        if i == trace_length and state in automaton.final_states:
+            return __reconstruct_alignment((state, i), predecessors, distances, visited, queued, traversed)
+
+        successors = []
+        if i < trace_length:
+            successors.append((state, i + 1, trace_costs[i], (activities[i], skip)))
+        for t, next_state in automaton.outgoing[state]:
+            successors.append((next_state, i, model_costs[t], (skip, t.label)))
+            if i < trace_length and t.label == activities[i]:
+                successors.append((next_state, i + 1, sync_costs[t], (activities[i], t.label)))
+        for next_state, next_i, cost, label in successors:
+            traversed += 1
+            new_g = g + cost
+            if (next_state, next_i) in closed or new_g >= distances.get((next_state, next_i), float("inf")):
+                continue
+            queued += 1
+            distances[(next_state, next_i)] = new_g
+            predecessors[(next_state, next_i)] = ((state, i), label)
+            heapq.heappush(open_set, (new_g, counter, next_state, next_i))
+            counter += 1
+    return None
+
+
+def __reconstruct_alignment(product_state, predecessors, distances, visited, queued, traversed,
+                            budget_exceeded=None):
+    alignment = []
+    curr = product_state
+    while predecessors[curr] is not None:
+        curr, label = predecessors[curr]
+        alignment.append(label)
+    alignment.reverse()
+    result = {'alignment': alignment, 'cost': distances[product_state], 'visited_states': visited,
+              'queued_states': queued, 'traversed_arcs': traversed}
+    if budget_exceeded is not None:
+        result['partial'] = True
+        result['budget_exceeded'] = budget_exceeded
+    return result
@@ -2,7 +2,8 @@
 This module contains code that allows us to compute alignments on the basis of a regular A* search on the state-space
 of the synchronous product net of a trace and a Petri net.
 The main algorithm follows [1]_.
-When running the log-based variant, the code is running in parallel on a trace based level.
+When running the log-based variant, the traces can be aligned in parallel by a pool of worker processes
+(see the parallel parameter of pm4py.algo.conformance.alignments.factory.apply_log).
 Furthermore, by default, the code applies heuristic estimation, and prefers those states that have the smallest h-value
 in case the f-value of two states is equal.
 
@@ -13,11 +14,13 @@ References
 
 """
 import heapq
-from typing import Any
+import math
+import threading
+import time
 
 import numpy as np
-from cvxopt import matrix, solvers
-from dataclasses import dataclass
+from cvxopt import matrix, solvers, spmatrix
+from scipy.optimize import linprog
 
 import pm4py
 from pm4py import util as pm4pyutil
@@ -25,16 +28,31 @@ from pm4py.algo.conformance import alignments
 from pm4py.objects import petri
 from pm4py.objects.log import log as log_implementation
 from pm4py.objects.log.util.xes import DEFAULT_NAME_KEY
-from pm4py.objects.petri.synchronous_product import construct_cost_aware
-from pm4py.objects.petri.utils import construct_trace_net_cost_aware
+from pm4py.objects.petri import net_cache
+from pm4py.objects.petri.synchronous_product import construct_template
 from pm4py.util.constants import PARAMETER_CONSTANT_ACTIVITY_KEY
 
 PARAM_TRACE_COST_FUNCTION = 'trace_cost_function'
 PARAM_MODEL_COST_FUNCTION = 'model_cost_function'
 PARAM_SYNC_COST_FUNCTION = 'sync_cost_function'
+PARAM_LP_SOLVER = 'lp_solver'
+PARAM_MAX_VISITED_STATES = 'max_visited_states'
+PARAM_MAX_TRACE_TIME = 'max_trace_time'
+PARAM_DEADLINE = 'deadline'
 
 PARAMETERS = [PARAM_TRACE_COST_FUNCTION, PARAM_MODEL_COST_FUNCTION, PARAM_SYNC_COST_FUNCTION,
-              pm4pyutil.constants.PARAMETER_CONSTANT_ACTIVITY_KEY]
+              pm4pyutil.constants.PARAMETER_CONSTANT_ACTIVITY_KEY, PARAM_LP_SOLVER, PARAM_MAX_VISITED_STATES,
+              PARAM_MAX_TRACE_TIME, PARAM_DEADLINE]
+
+BUDGET_MAX_VISITED_STATES = 'max_visited_states'
+BUDGET_TIME = 'time'
+
+LP_SOLVER_CVXOPT_GLPK = 'cvxopt_glpk'
+LP_SOLVER_SCIPY_HIGHS = 'scipy_highs'
+LP_SOLVERS = [LP_SOLVER_CVXOPT_GLPK, LP_SOLVER_SCIPY_HIGHS]
+
+# tolerance on the negative components of the solution vector, for the heuristic to be trusted
+TRUST_TOLERANCE = 0.001
 
 
 def get_best_worst_cost(petri_net, initial_marking, final_marking):
@@ -79,43 +97,87 @@ def apply(trace, petri_net, initial_marking, final_marking, parameters=None):
         PARAM_SYNC_COST_FUNCTION: :class:`dict` (parameter) mapping of each transition in the model to corresponding
         synchronous costs
         PARAM_ACTIVITY_KEY: :class:`str` (parameter) key to use to identify the activity described by the events
+        PARAM_LP_SOLVER: :class:`str` (parameter) solver of the LPs of the heuristic, one of LP_SOLVERS
+        (default: LP_SOLVER_CVXOPT_GLPK)
+        PARAM_MAX_VISITED_STATES: :class:`int` (parameter) maximum number of states visited by the search
+        PARAM_MAX_TRACE_TIME: :class:`float` (parameter) maximum time (in seconds) spent in the search
+        PARAM_DEADLINE: :class:`float` (parameter) timestamp (as returned by time.time()) at which the search
+        shall be stopped, used to enforce a total time budget on several traces
 
     Returns
     -------
-    dictionary: `dict` with keys **alignment**, **cost**, **visited_states**, **queued_states** and **traversed_arcs**
+    dictionary: `dict` with keys **alignment**, **cost**, **visited_states**, **queued_states**, **traversed_arcs**,
+    **lp_solved** and **lp_time**. If a budget is exceeded, the search is stopped and the dictionary also contains
+    **partial** (True) and **budget_exceeded** (BUDGET_MAX_VISITED_STATES or BUDGET_TIME): the alignment is then
+    the prefix alignment leading to the most promising visited state (the one having the smallest heuristic
+    value) and the cost is the estimated cost of the complete alignment (g + h of that state)
     """
     activity_key = DEFAULT_NAME_KEY if parameters is None or PARAMETER_CONSTANT_ACTIVITY_KEY not in parameters else \
         parameters[
             pm4pyutil.constants.PARAMETER_CONSTANT_ACTIVITY_KEY]
+    lp_solver = LP_SOLVER_CVXOPT_GLPK if parameters is None or PARAM_LP_SOLVER not in parameters else parameters[
+        PARAM_LP_SOLVER]
+    max_visited_states = None if parameters is None or PARAM_MAX_VISITED_STATES not in parameters else parameters[
+        PARAM_MAX_VISITED_STATES]
+    deadline = None if parameters is None or PARAM_DEADLINE not in parameters else parameters[PARAM_DEADLINE]
+    if parameters is not None and PARAM_MAX_TRACE_TIME in parameters and parameters[PARAM_MAX_TRACE_TIME] is not None:
+        trace_deadline = time.time() + parameters[PARAM_MAX_TRACE_TIME]
+        deadline = trace_deadline if deadline is None else min(deadline, trace_deadline)
     if parameters is None or PARAM_TRACE_COST_FUNCTION not in parameters or PARAM_MODEL_COST_FUNCTION not in parameters or PARAM_SYNC_COST_FUNCTION not in parameters:
-
-        trace_net, trace_im, trace_fm = petri.utils.construct_trace_net(trace, activity_key=activity_key)
-        sync_prod, sync_initial_marking, sync_final_marking = petri.synchronous_product.construct(trace_net, trace_im,
-                                                                                                  trace_fm, petri_net,
-                                                                                                  initial_marking,
-                                                                                                  final_marking,
-                                                                                                  alignments.utils.SKIP)
-        cost_function = alignments.utils.construct_standard_cost_function(sync_prod, alignments.utils.SKIP)
+        trace_costs = [alignments.utils.STD_MODEL_LOG_MOVE_COST] * len(trace)
+        model_costs = {}
+        sync_costs = {}
+        for t in petri_net.transitions:
+            if t.label is not None:
+                model_costs[t] = alignments.utils.STD_MODEL_LOG_MOVE_COST
+                sync_costs[t] = alignments.utils.STD_SYNC_COST
+            else:
+                model_costs[t] = alignments.utils.STD_TAU_COST
     else:
-        trace_net, trace_im, trace_fm, trace_net_costs = construct_trace_net_cost_aware(trace,
-                                                                                        parameters[
-                                                                                            PARAM_TRACE_COST_FUNCTION],
-                                                                                        activity_key=activity_key)
-        revised_sync = dict()
-        for t_trace in trace_net.transitions:
-            for t_model in petri_net.transitions:
-                if t_trace.label == t_model.label:
-                    revised_sync[(t_trace, t_model)] = parameters[PARAM_SYNC_COST_FUNCTION][t_model]
+        trace_costs = parameters[PARAM_TRACE_COST_FUNCTION]
+        model_costs = parameters[PARAM_MODEL_COST_FUNCTION]
+        sync_costs = parameters[PARAM_SYNC_COST_FUNCTION]
+
+    template = get_sync_product_template(petri_net, initial_marking, final_marking, model_costs, sync_costs)
+    sync_prod, sync_initial_marking, sync_final_marking, cost_function = template.construct(
+        [event[activity_key] for event in trace], trace_costs)
+    try:
+        incidence_matrix = petri.incidence_matrix.construct(sync_prod, columns=template.incidence_columns)
+        return __search(sync_prod, sync_initial_marking, sync_final_marking, cost_function, alignments.utils.SKIP,
+                        lp_solver, incidence_matrix=incidence_matrix, max_visited_states=max_visited_states,
+                        deadline=deadline)
+    finally:
+        template.release()
+
+
+def get_sync_product_template(petri_net, initial_marking, final_marking, model_costs, sync_costs):
+    """
+    Gets the template of the synchronous product nets between the traces and the model, reusing the one
+    built for the previous trace if the model, its markings and the cost functions did not change.
+    Since a template is not thread-safe, each thread gets its own template
 
-        sync_prod, sync_initial_marking, sync_final_marking, cost_function = construct_cost_aware(
-            trace_net, trace_im, trace_fm, petri_net, initial_marking, final_marking, alignments.utils.SKIP,
-            trace_net_costs, parameters[PARAM_MODEL_COST_FUNCTION], revised_sync)
+    Parameters
+    ----------
+    petri_net: :class:`pm4py.objects.petri.net.PetriNet` the Petri net to use in the alignment
+    initial_marking: :class:`pm4py.objects.petri.net.Marking` initial marking in the Petri net
+    final_marking: :class:`pm4py.objects.petri.net.Marking` final marking in the Petri net
+    model_costs: :class:`dict` mapping of each transition in the model to corresponding model cost
+    sync_costs: :class:`dict` mapping of each visible transition in the model to corresponding synchronous cost
 
-    return apply_sync_prod(sync_prod, sync_initial_marking, sync_final_marking, cost_function,
-                           alignments.utils.SKIP)
+    Returns
+    -------
+    template: :class:`pm4py.objects.petri.synchronous_product.SynchronousProductTemplate` template of the
+    synchronous product nets
+    """
+    artefact = ("sync_product_template", frozenset(model_costs.items()), frozenset(sync_costs.items()),
+                threading.get_ident())
+    return net_cache.get(petri_net, initial_marking, final_marking, artefact,
+                         lambda: construct_template(petri_net, initial_marking, final_marking, alignments.utils.SKIP,
+                                                    model_costs, sync_costs), bound_to_net=True)
 
 
-def apply_sync_prod(sync_prod, initial_marking, final_marking, cost_function, skip):
+def apply_sync_prod(sync_prod, initial_marking, final_marking, cost_function, skip, lp_solver=LP_SOLVER_CVXOPT_GLPK,
+                    max_visited_states=None, deadline=None):
     """
     Performs the basic alignment search on top of the synchronous product net, given a cost function and skip-symbol
 
@@ -126,76 +188,196 @@ def apply_sync_prod(sync_prod, initial_marking, final_marking, cost_function, sk
     final_marking: :class:`pm4py.objects.petri.net.Marking` final marking in the synchronous product net
     cost_function: :class:`dict` cost function mapping transitions to the synchronous product net
     skip: :class:`Any` symbol to use for skips in the alignment
+    lp_solver: :class:`str` solver of the LPs of the heuristic, one of LP_SOLVERS
+    max_visited_states: :class:`int` maximum number of states visited by the search
+    deadline: :class:`float` timestamp (as returned by time.time()) at which the search shall be stopped
 
     Returns
     -------
-    dictionary : :class:`dict` with keys **alignment**, **cost**, **visited_states**, **queued_states**
-    and **traversed_arcs**
+    dictionary : :class:`dict` with keys **alignment**, **cost**, **visited_states**, **queued_states**,
+    **traversed_arcs**, **lp_solved** and **lp_time** (and **partial** and **budget_exceeded** if a budget
+    is exceeded, see apply)
     """
-    return __search(sync_prod, initial_marking, final_marking, cost_function, skip)
+    return __search(sync_prod, initial_marking, final_marking, cost_function, skip, lp_solver,
+                    max_visited_states=max_visited_states, deadline=deadline)
 
 
-def __search(sync_net, ini, fin, cost_function, skip):
-    incidence_matrix = petri.incidence_matrix.construct(sync_net)
+def __search(sync_net, ini, fin, cost_function, skip, lp_solver, incidence_matrix=None, max_visited_states=None,
+             deadline=None):
+    if incidence_matrix is None:
+        incidence_matrix = petri.incidence_matrix.construct(sync_net)
     ini_vec, fin_vec, cost_vec = __vectorize_initial_final_cost(incidence_matrix, ini, fin, cost_function)
+    lp_model = __build_lp_model(incidence_matrix, cost_vec, fin_vec, lp_solver)
+    lp_stats = {'lp_solved': 0, 'lp_time': 0.0}
+    net_model = __compile_net(incidence_matrix, skip)
+    transitions, pre, post, consumers, sources, is_log_move, is_model_move = net_model
+    no_places = len(incidence_matrix.places)
+    ini_m = __pack_marking(incidence_matrix, ini)
+    fin_m = __pack_marking(incidence_matrix, fin)
 
     closed = set()
-    h, x = __compute_exact_heuristic(sync_net, incidence_matrix, ini, cost_vec, fin_vec)
-    ini_state = SearchTuple(0 + h, 0, h, ini, None, None, x, True)
-    open_set = [ini_state]
+    h, x = __compute_exact_heuristic(lp_model, __unpack_marking(ini_m, no_places), lp_stats)
+    ini_state = SearchState(0, h, ini_m, None, None, x, True)
+    # the entries of the heap are tuples (f, not trust, h, sequence number, state), so that the ties are broken
+    # (trusted states first, then smallest h) by the comparison of tuples, and the states are never compared
+    sequence = 0
+    open_set = [(h, False, h, sequence, ini_state)]
+    # index of the open set: marking -> state that is currently valid for the marking.
+    # Entries of the heap whose state is no more in the index (replaced by a better one) are skipped when popped
+    open_index = {ini_m: ini_state}
     visited = 0
     queued = 0
     traversed = 0
+    # most promising visited state, returned (as a prefix alignment) when a budget is exceeded
+    best = ini_state
     while not len(open_set) == 0:
-        curr = heapq.heappop(open_set)
+        if max_visited_states is not None and visited >= max_visited_states:
+            return __reconstruct_partial_alignment(best, transitions, visited, queued, traversed, lp_stats,
+                                                   BUDGET_MAX_VISITED_STATES)
+        if deadline is not None and time.time() > deadline:
+            return __reconstruct_partial_alignment(best, transitions, visited, queued, traversed, lp_stats,
+                                                   BUDGET_TIME)
+        curr = heapq.heappop(open_set)[4]
+        if open_index.get(curr.m) is not curr:
+            continue
         if not curr.trust:
-            h, x = __compute_exact_heuristic(sync_net, incidence_matrix, curr.m, cost_vec, fin_vec)
-            tp = SearchTuple(curr.g + h, curr.g, h, curr.m, curr.p, curr.t, x, __trust_solution(x))
-            heapq.heappush(open_set, tp)
-            heapq.heapify(open_set)
+            h, x = __compute_exact_heuristic(lp_model, __unpack_marking(curr.m, no_places), lp_stats)
+            tp = SearchState(curr.g, h, curr.m, curr.p, curr.t, x, __trust_solution(x))
+            open_index[curr.m] = tp
+            sequence += 1
+            heapq.heappush(open_set, (tp.g + h, not tp.trust, h, sequence, tp))
             continue
 
+        del open_index[curr.m]
         visited += 1
+        if curr.h < best.h or (curr.h == best.h and curr.g > best.g):
+            best = curr
         current_marking = curr.m
         closed.add(current_marking)
-        if current_marking == fin:
-            return __reconstruct_alignment(curr, visited, queued, traversed)
-        for t in petri.semantics.enabled_transitions(sync_net, current_marking):
-            if curr.t is not None and __is_log_move(curr.t, skip) and __is_model_move(t, skip):
+        if current_marking == fin_m:
+            return __reconstruct_alignment(curr, transitions, visited, queued, traversed, lp_stats)
+        # the solution vector of a derived state is not stored: it is the one of the closest ancestor having
+        # a solution vector (computed by the LP), minus the transitions fired since the ancestor
+        fired = {}
+        base = curr
+        while base.x is None:
+            fired[base.t] = fired.get(base.t, 0) + 1
+            base = base.p
+        tokens = {}
+        for p in current_marking:
+            tokens[p] = tokens.get(p, 0) + 1
+        after_log_move = curr.t is not None and is_log_move[curr.t]
+        for t in __enabled_transitions(tokens, pre, consumers, sources):
+            if after_log_move and is_model_move[t]:
                 continue
             traversed += 1
-            new_marking = petri.semantics.execute(t, sync_net, current_marking)
+            new_marking = __fire(tokens, pre[t], post[t])
             if new_marking in closed:
                 continue
-            g = curr.g + cost_function[t]
-
-            alt = next((enum[1] for enum in enumerate(open_set) if enum[1].m == new_marking), None)
-            if alt is not None:
-                if g >= alt.g:
-                    continue
-                open_set.remove(alt)
-                heapq.heapify(open_set)
+            g = curr.g + cost_vec[t]
+
+            alt = open_index.get(new_marking)
+            if alt is not None and g >= alt.g:
+                continue
             queued += 1
-            h, x = __derive_heuristic(incidence_matrix, cost_vec, curr.x, t, curr.h)
-            tp = SearchTuple(g + h, g, h, new_marking, curr, t, x, __trust_solution(x))
-            heapq.heappush(open_set, tp)
-            heapq.heapify(open_set)
-
-
-def __reconstruct_alignment(state, visited, queued, traversed):
-    parent = state.p
-    alignment = [state.t.label]
-    while parent.p is not None:
-        alignment = [parent.t.label] + alignment
-        parent = parent.p
+            h = max(0, curr.h - cost_vec[t])
+            tp = SearchState(g, h, new_marking, curr, t, None, base.x[t] - fired.get(t, 0) >= 1 - TRUST_TOLERANCE)
+            open_index[new_marking] = tp
+            sequence += 1
+            heapq.heappush(open_set, (g + h, not tp.trust, h, sequence, tp))
+
+
+def __compile_net(incidence_matrix, skip):
+    """
+    Compiles the synchronous product net for the search, identifying places and transitions by their index
+    in the incidence matrix
+
+    Returns
+    -------
+    transitions: list of the transitions (by index)
+    pre: for each transition, tuple of couples (place index, weight) of its input arcs
+    post: for each transition, tuple of couples (place index, weight) of its output arcs
+    consumers: for each place, list of the transitions having the place in input
+    sources: list of the transitions without input places
+    is_log_move: for each transition, boolean telling if it is a log move
+    is_model_move: for each transition, boolean telling if it is a model move
+    """
+    places = incidence_matrix.places
+    transitions = incidence_matrix.transitions_array.tolist()
+    pre = [tuple((places[a.source], a.weight) for a in t.in_arcs) for t in transitions]
+    post = [tuple((places[a.target], a.weight) for a in t.out_arcs) for t in transitions]
+    consumers = [[] for _ in range(len(places))]
+    for index, t_pre in enumerate(pre):
+        for p, _ in t_pre:
+            consumers[p].append(index)
+    sources = [index for index, t_pre in enumerate(pre) if not t_pre]
+    is_log_move = [__is_log_move(t, skip) for t in transitions]
+    is_model_move = [__is_model_move(t, skip) for t in transitions]
+    return transitions, pre, post, consumers, sources, is_log_move, is_model_move
+
+
+def __pack_marking(incidence_matrix, marking):
+    """
+    Packs a marking in a sorted tuple of place indices (each place repeated as many times as its tokens)
+    """
+    packed = []
+    for p in marking:
+        packed.extend([incidence_matrix.places[p]] * marking[p])
+    return tuple(sorted(packed))
+
+
+def __unpack_marking(packed, no_places):
+    m_vec = np.zeros(no_places)
+    for p in packed:
+        m_vec[p] += 1
+    return m_vec
+
+
+def __enabled_transitions(tokens, pre, consumers, sources):
+    # transitions without input places are always enabled
+    enabled = set(sources)
+    for p in tokens:
+        for t in consumers[p]:
+            if t not in enabled and all(tokens.get(q, 0) >= w for q, w in pre[t]):
+                enabled.add(t)
+    return enabled
+
+
+def __fire(tokens, t_pre, t_post):
+    new_tokens = dict(tokens)
+    for p, w in t_pre:
+        new_tokens[p] -= w
+    for p, w in t_post:
+        new_tokens[p] = new_tokens.get(p, 0) + w
+    packed = []
+    for p, n in new_tokens.items():
+        if n == 1:
+            packed.append(p)
+        elif n > 1:
+            packed.extend([p] * n)
+    packed.sort()
+    return tuple(packed)
+
+
+def __reconstruct_alignment(state, transitions, visited, queued, traversed, lp_stats):
+    alignment = []
+    curr = state
+    while curr.p is not None:
+        alignment.append(transitions[curr.t].label)
+        curr = curr.p
+    alignment.reverse()
     return {'alignment': alignment, 'cost': state.g, 'visited_states': visited, 'queued_states': queued,
-            'traversed_arcs': traversed}
+            'traversed_arcs': traversed, 'lp_solved': lp_stats['lp_solved'], 'lp_time': lp_stats['lp_time']}
 
 
-def __derive_heuristic(incidence_matrix, cost_vec, x, t, h):
-    x_prime = x.copy()
-    x_prime[incidence_matrix.transitions[t]] -= 1
-    return max(0, h - cost_vec[incidence_matrix.transitions[t]]), x_prime
+def __reconstruct_partial_alignment(state, transitions, visited, queued, traversed, lp_stats, budget_exceeded):
+    result = __reconstruct_alignment(state, transitions, visited, queued, traversed, lp_stats)
+    # the heuristic of a state may be negative (e.g. an untrusted solution of the LP), while the cost of an
+    # alignment is not
+    result['cost'] = max(0, state.g + state.h)
+    result['partial'] = True
+    result['budget_exceeded'] = budget_exceeded
+    return result
 
 
 def __is_model_move(t, skip):
@@ -207,44 +389,74 @@ def __is_log_move(t, skip):
 
 
 def __trust_solution(x):
-    for v in x:
-        if v < -0.001:
-            return False
-    return True
+    return bool(np.all(x >= -TRUST_TOLERANCE))
 
 
-def __compute_exact_heuristic(sync_net, incidence_matrix, marking, cost_vec, fin_vec):
+def __build_lp_model(incidence_matrix, cost_vec, fin_vec, lp_solver):
     """
-    Computes an exact heuristic using an LP based on the marking equation.
+    Builds (once for each synchronous product net) the matrices of the LP based on the marking equation,
+    in the form expected by the chosen solver. Between the solves, only the right-hand side of the
+    equality constraints (final marking minus current marking) changes.
 
     Parameters
     ----------
-    :param sync_net: synchronous product net
     :param incidence_matrix: incidence matrix
-    :param marking: marking to start from
     :param cost_vec: cost vector
     :param fin_vec: marking to reach
+    :param lp_solver: solver of the LPs, one of LP_SOLVERS
 
     Returns
     -------
-    :return: h: heuristic value, x: solution vector
+    :return: lp_model: dictionary containing the solver and the matrices of the LP
+    """
+    if lp_solver not in LP_SOLVERS:
+        raise Exception("unsupported LP solver: " + str(lp_solver))
+    a_matrix = incidence_matrix.a_matrix
+    lp_model = {'solver': lp_solver, 'fin_vec': np.asarray(fin_vec, dtype=float),
+                'no_transitions': len(cost_vec)}
+    if lp_solver == LP_SOLVER_SCIPY_HIGHS:
+        lp_model['c'] = np.asarray(cost_vec, dtype=float)
+        lp_model['a_matrix'] = a_matrix
+    else:
+        no_transitions = len(cost_vec)
+        entries = a_matrix.tocoo()
+        lp_model['c'] = matrix(np.asarray(cost_vec, dtype=float))
+        lp_model['g_matrix'] = spmatrix(-1.0, range(no_transitions), range(no_transitions))
+        lp_model['h_cvx'] = matrix(np.zeros(no_transitions))
+        lp_model['a_matrix'] = spmatrix(entries.data.tolist(), entries.row.tolist(), entries.col.tolist(),
+                                        size=a_matrix.shape)
+    return lp_model
+
+
+def __compute_exact_heuristic(lp_model, m_vec, lp_stats):
     """
-    m_vec = incidence_matrix.encode_marking(marking)
-    g_matrix = matrix(-np.eye(len(sync_net.transitions)))
-    h_cvx = matrix(np.zeros(len(sync_net.transitions)))
-    a_matrix = matrix(incidence_matrix.a_matrix, tc='d')
-    h_obj = solvers.lp(matrix(cost_vec, tc='d'), g_matrix, h_cvx, a_matrix.trans(),
-                       matrix([i - j for i, j in zip(fin_vec, m_vec)], tc='d'), solver='glpk',
-                       options={'glpk': {'msg_lev': 'GLP_MSG_OFF'}})
-    h = h_obj['primal objective']
-    return h, [xi for xi in h_obj['x']]
+    Computes an exact heuristic using an LP based on the marking equation.
 
+    Parameters
+    ----------
+    :param lp_model: matrices of the LP (built once for the synchronous product net)
+    :param m_vec: marking to start from (as a vector of tokens indexed like the places of the incidence matrix)
+    :param lp_stats: dictionary counting the LPs solved and the time spent solving them (updated in place)
 
-def __get_tuple_from_queue(marking, queue):
-    for t in queue:
-        if t.m == marking:
-            return t
-    return None
+    Returns
+    -------
+    :return: h: heuristic value, x: solution vector (numpy array)
+    """
+    b_vec = lp_model['fin_vec'] - m_vec
+    lp_start = time.time()
+    if lp_model['solver'] == LP_SOLVER_SCIPY_HIGHS:
+        sol = linprog(lp_model['c'], A_eq=lp_model['a_matrix'], b_eq=b_vec, bounds=(0, None), method='highs')
+        h, x = (sol.fun, sol.x) if sol.status == 0 else (None, None)
+    else:
+        sol = solvers.lp(lp_model['c'], lp_model['g_matrix'], lp_model['h_cvx'], lp_model['a_matrix'],
+                         matrix(b_vec), solver='glpk', options={'glpk': {'msg_lev': 'GLP_MSG_OFF'}})
+        h, x = (sol['primal objective'], np.array(sol['x']).flatten()) if sol['x'] is not None else (None, None)
+    lp_stats['lp_solved'] += 1
+    lp_stats['lp_time'] += time.time() - lp_start
+    if h is None:
+        # the final marking cannot be reached according to the marking equation
+        return math.inf, np.zeros(lp_model['no_transitions'])
+    return h, x
 
 
 def __vectorize_initial_final_cost(incidence_matrix, ini, fin, cost_function):
@@ -256,40 +468,23 @@ def __vectorize_initial_final_cost(incidence_matrix, ini, fin, cost_function):
     return ini_vec, fini_vec, cost_vec
 
 
-@dataclass
-class SearchTuple:
-    f: float
-    g: float
-    h: float
-    m: petri.petrinet.Marking
-    p: Any
-    t: petri.petrinet.PetriNet.Transition
-    x: Any
-    trust: bool
-
-    def __lt__(self, other):
-        if self.f < other.f:
-            return True
-        elif other.f < self.f:
-            return False
-        else:
-            if self.trust == other.trust:
-                if self.h < other.h:
-                    return True
-                else:
-                    return False
-            else:
-                return self.trust
+class SearchState(object):
+    """
+    State of the A* search (used by __search, that keeps the heap ordering in the heap entries).
+    The marking is packed in a sorted tuple of place indices, the transition is identified by its index in the
+    incidence matrix, and the solution vector x (numpy array) is stored only for the states for which the LP
+    has been solved (it is None for the derived states)
+    """
+    __slots__ = ['g', 'h', 'm', 'p', 't', 'x', 'trust']
 
-    def __get_firing_sequence(self):
-        ret = []
-        if self.p is not None:
-            ret = ret + self.p.__get_firing_sequence()
-        if self.t is not None:
-            ret.append(self.t)
-        return ret
+    def __init__(self, g, h, m, p, t, x, trust):
+        self.g = g
+        self.h = h
+        self.m = m
+        self.p = p
+        self.t = t
+        self.x = x
+        self.trust = trust
 
     def __repr__(self):
-        string_build = ["\nm=" + str(self.m), " f=" + str(self.f), ' g=' + str(self.g), " h=" + str(self.h),
-                        " path=" + str(self.__get_firing_sequence()) + "\n\n"]
-        return " ".join(string_build)
+        return "\nm=" + str(self.m) + " g=" + str(self.g) + " h=" + str(self.h) + " trust=" + str(self.trust)
@@ -0,0 +1 @@
+from pm4py.algo.conformance.tokenreplay.adapters import pandas
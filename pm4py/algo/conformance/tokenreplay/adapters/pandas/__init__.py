@@ -0,0 +1 @@
+from pm4py.algo.conformance.tokenreplay.adapters.pandas import df_token_replay
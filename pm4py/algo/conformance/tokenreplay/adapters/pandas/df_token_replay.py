@@ -0,0 +1,131 @@
+import pandas as pd
+
+from pm4py.algo.conformance.tokenreplay.versions import token_replay
+from pm4py.algo.filtering.common.filtering_constants import CASE_CONCEPT_NAME
+from pm4py.objects.log.util import variants_trie
+from pm4py.objects.log.util import xes
+from pm4py.statistics.traces.pandas import case_statistics
+from pm4py.util.constants import PARAMETER_CONSTANT_ACTIVITY_KEY
+from pm4py.util.constants import PARAMETER_CONSTANT_CASEID_KEY
+from pm4py.util.constants import PARAMETER_CONSTANT_TIMESTAMP_KEY
+
+
+def get_variants_from_df(df, case_id_glue=CASE_CONCEPT_NAME, activity_key=xes.DEFAULT_NAME_KEY,
+                         timestamp_key=xes.DEFAULT_TIMESTAMP_KEY, sort_required=True):
+    """
+    Gets the variant of each case of a Pandas dataframe
+
+    Parameters
+    -----------
+    df
+        Dataframe
+    case_id_glue
+        Column that contains the Case ID
+    activity_key
+        Column that contains the activity
+    timestamp_key
+        Column that contains the timestamp
+    sort_required
+        Specify if a (stable) sort on the Case ID and the timestamp is required
+
+    Returns
+    -----------
+    variants_df
+        Dataframe having the Case ID as index and the variant (activities separated by comma) in the variant column
+    """
+    df = df[[case_id_glue, activity_key, timestamp_key]]
+    if sort_required:
+        df = df.sort_values([case_id_glue, timestamp_key], kind="mergesort")
+    if not pd.api.types.is_string_dtype(df[activity_key]):
+        df = df.assign(**{activity_key: df[activity_key].astype(str)})
+    return case_statistics.get_variants_df(df, parameters={PARAMETER_CONSTANT_CASEID_KEY: case_id_glue,
+                                                           PARAMETER_CONSTANT_ACTIVITY_KEY: activity_key})
+
+
+def apply(df, net, initial_marking, final_marking, parameters=None):
+    """
+    Apply token-based replay directly to a Pandas dataframe: the variants are extracted from the dataframe,
+    only the unique variants are replayed (without converting the dataframe to a log) and the results are
+    associated back to the cases
+
+    Parameters
+    -----------
+    df
+        Dataframe
+    net
+        Petri net
+    initial_marking
+        Initial marking
+    final_marking
+        Final marking
+    parameters
+        Parameters of the algorithm, including:
+            case_id_glue -> Column that contains the Case ID
+            pm4py.util.constants.PARAMETER_CONSTANT_ACTIVITY_KEY -> Column that contains the activity
+            pm4py.util.constants.PARAMETER_CONSTANT_TIMESTAMP_KEY -> Column that contains the timestamp
+            sort_required -> Specify if a sort on the Case ID and the timestamp is required (default: True)
+            consider_remaining_in_fitness -> Boolean value telling if the remaining tokens should be considered
+            in fitness evaluation
+            try_to_reach_final_marking_through_hidden -> Boolean value that decides if we shall try to reach
+            the final marking through hidden transitions
+            stop_immediately_unfit -> Boolean value that decides if we shall stop immediately when a
+            non-conformance is detected
+            walk_through_hidden_trans -> Boolean value that decides if we shall walk through hidden transitions
+            in order to enable visible transitions
+            result_fields -> Fields of the result that should be computed for each case
+            (default: token_replay.FITNESS_RESULT_FIELDS)
+
+    Returns
+    -----------
+    cases_df
+        Dataframe having the Case ID as index, the variant of the case in the variant column and the fields of the
+        result of the replay as other columns
+    """
+    if parameters is None:
+        parameters = {}
+
+    case_id_glue = parameters[
+        PARAMETER_CONSTANT_CASEID_KEY] if PARAMETER_CONSTANT_CASEID_KEY in parameters else CASE_CONCEPT_NAME
+    activity_key = parameters[
+        PARAMETER_CONSTANT_ACTIVITY_KEY] if PARAMETER_CONSTANT_ACTIVITY_KEY in parameters else xes.DEFAULT_NAME_KEY
+    timestamp_key = parameters[
+        PARAMETER_CONSTANT_TIMESTAMP_KEY] if PARAMETER_CONSTANT_TIMESTAMP_KEY in parameters else \
+        xes.DEFAULT_TIMESTAMP_KEY
+    sort_required = parameters["sort_required"] if "sort_required" in parameters else True
+    consider_remaining_in_fitness = parameters[
+        "consider_remaining_in_fitness"] if "consider_remaining_in_fitness" in parameters else False
+    try_to_reach_final_marking_through_hidden = parameters[
+        "try_to_reach_final_marking_through_hidden"] if "try_to_reach_final_marking_through_hidden" in parameters \
+        else True
+    stop_immediately_unfit = parameters["stop_immediately_unfit"] if "stop_immediately_unfit" in parameters else False
+    walk_through_hidden_trans = parameters[
+        "walk_through_hidden_trans"] if "walk_through_hidden_trans" in parameters else True
+    result_fields = parameters[
+        "result_fields"] if "result_fields" in parameters else token_replay.FITNESS_RESULT_FIELDS
+
+    variants_df = get_variants_from_df(df, case_id_glue=case_id_glue, activity_key=activity_key,
+                                       timestamp_key=timestamp_key, sort_required=sort_required)
+
+    variants_activities = {}
+    for variant in variants_df["variant"].unique():
+        variants_activities[variant] = variant.split(",")
+    trie = variants_trie.build_trie(variants_activities)
+
+    trans_map = {}
+    for t in net.transitions:
+        trans_map[t.label] = t
+    places_shortest_path_by_hidden = token_replay.get_places_shortest_path_by_hidden(net)
+
+    variants_results, _ = token_replay.apply_trie(trie, net, initial_marking, final_marking, trans_map,
+                                                  places_shortest_path_by_hidden,
+                                                  consider_remaining_in_fitness=consider_remaining_in_fitness,
+                                                  try_to_reach_final_marking_through_hidden=
+                                                  try_to_reach_final_marking_through_hidden,
+                                                  stop_immediately_unfit=stop_immediately_unfit,
+                                                  walk_through_hidden_trans=walk_through_hidden_trans,
+                                                  result_fields=result_fields)
+
+    results_df = pd.DataFrame.from_dict(variants_results, orient="index", columns=result_fields)
+    results_df.index.name = "variant"
+
+    return variants_df.join(results_df, on="variant")
@@ -1,13 +1,19 @@
+from copy import copy
+
 from pm4py.algo.conformance.tokenreplay.versions import token_replay
+from pm4py.objects.petri import net_cache
+from pm4py.objects.petri import reduction
 
 TOKEN_REPLAY = "token_replay"
 VERSIONS = {TOKEN_REPLAY: token_replay.apply}
 
+PARAM_REDUCE_NET = "reduce_net"
+
 
 def apply(log, net, initial_marking, final_marking, parameters=None, variant="token_replay"):
     """
     Factory method to apply token-based replay
-    
+
     Parameters
     -----------
     log
@@ -21,8 +27,29 @@ def apply(log, net, initial_marking, final_marking, parameters=None, variant="to
     parameters
         Parameters of the algorithm, including:
             pm4py.util.constants.PARAMETER_CONSTANT_ACTIVITY_KEY -> Activity key
+            pm4py.algo.conformance.tokenreplay.factory.PARAM_REDUCE_NET -> boolean value telling if the net shall
+            be reduced (see pm4py.objects.petri.reduction) before the replay (default: False); the activated
+            transitions and the transitions with problems are mapped back to the transitions of the original net,
+            while the markings and the token counts refer to the reduced net
 
     variant
         Variant of the algorithm to use
     """
+    if parameters is not None and PARAM_REDUCE_NET in parameters and parameters[PARAM_REDUCE_NET]:
+        reduced_net, reduced_im, reduced_fm, corr = net_cache.get(
+            net, initial_marking, final_marking, "reduction",
+            lambda: reduction.apply(net, initial_marking, final_marking), bound_to_net=True)
+        parameters = copy(parameters)
+        del parameters[PARAM_REDUCE_NET]
+        replayed_traces = VERSIONS[variant](log, reduced_net, reduced_im, reduced_fm, parameters=parameters)
+        # the traces of the same variant may share the same result
+        mapped = set()
+        for replayed_trace in replayed_traces:
+            if id(replayed_trace) in mapped:
+                continue
+            mapped.add(id(replayed_trace))
+            for field in ["activated_transitions", "transitions_with_problems"]:
+                if field in replayed_trace:
+                    replayed_trace[field] = reduction.map_transitions(replayed_trace[field], corr)
+        return replayed_traces
     return VERSIONS[variant](log, net, initial_marking, final_marking, parameters=parameters)
@@ -0,0 +1,189 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from pm4py.algo.conformance.tokenreplay.versions import token_replay
+from pm4py.algo.filtering.tracelog.variants import variants_filter
+from pm4py.objects.log.util import variants_trie
+from pm4py.objects.log.util import xes as xes_util
+from pm4py.util import constants
+
+PARAM_MAX_WORKERS = "max_workers"
+PARAM_CONSIDER_REMAINING_IN_FITNESS = "consider_remaining_in_fitness"
+
+FITNESS_COLUMNS = ["perc_fit_traces", "average_trace_fitness", "log_fitness"]
+
+# prefix trie of the variants of the log, set once for each worker process
+WORKER_TRIE = None
+
+
+def get_variants_structure(log, activity_key=xes_util.DEFAULT_NAME_KEY):
+    """
+    Gets the structure of the variants of a log, that is shared by the replay of all the models
+
+    Parameters
+    -----------
+    log
+        Trace log
+    activity_key
+        Attribute that contains the activity
+
+    Returns
+    -----------
+    variants_activities
+        Dictionary associating to each variant the list of its activities
+    variants_count
+        Dictionary associating to each variant the number of traces of the log belonging to it
+    """
+    variants = variants_filter.get_variants(log, parameters={constants.PARAMETER_CONSTANT_ACTIVITY_KEY: activity_key})
+    variants_activities = {}
+    variants_count = {}
+    for variant in variants:
+        variants_activities[variant] = [x[activity_key] for x in variants[variant][0]]
+        variants_count[variant] = len(variants[variant])
+    return variants_activities, variants_count
+
+
+def evaluate_variants(variants_results, variants_count):
+    """
+    Gets the fitness metrics of a model, given the result of the replay of each variant and the number of
+    traces belonging to each variant (see pm4py.evaluation.replay_fitness.versions.token_replay.evaluate)
+
+    Parameters
+    -----------
+    variants_results
+        Dictionary associating to each variant the result of its replay
+    variants_count
+        Dictionary associating to each variant the number of traces of the log belonging to it
+
+    Returns
+    -----------
+    dictionary
+        Dictionary containing perc_fit_traces, average_trace_fitness and log_fitness
+    """
+    # imported here, since pm4py.evaluation imports the conformance checking algorithms
+    from pm4py.evaluation.replay_fitness.versions import token_replay as replay_fitness
+    return replay_fitness.evaluate([dict(variants_results[variant], count=variants_count[variant])
+                                    for variant in variants_results])
+
+
+def replay_model_on_trie(trie, net, initial_marking, final_marking, consider_remaining_in_fitness=True):
+    """
+    Replays the variants contained in the prefix trie on a model, computing only the fields needed by the fitness
+
+    Parameters
+    -----------
+    trie
+        Prefix trie of the variants
+    net
+        Petri net
+    initial_marking
+        Initial marking
+    final_marking
+        Final marking
+    consider_remaining_in_fitness
+        Boolean value telling if the remaining tokens should be considered in fitness evaluation
+
+    Returns
+    -----------
+    variants_results
+        Dictionary associating to each variant the result of its replay
+    """
+    trans_map = {}
+    for t in net.transitions:
+        trans_map[t.label] = t
+    places_shortest_path_by_hidden = token_replay.get_places_shortest_path_by_hidden(net)
+    variants_results, _ = token_replay.apply_trie(trie, net, initial_marking, final_marking, trans_map,
+                                                  places_shortest_path_by_hidden,
+                                                  consider_remaining_in_fitness=consider_remaining_in_fitness,
+                                                  result_fields=token_replay.FITNESS_RESULT_FIELDS)
+    return variants_results
+
+
+def initialize_worker(variants_activities):
+    """
+    Initializes a worker process, building once the prefix trie of the variants
+
+    Parameters
+    -----------
+    variants_activities
+        Dictionary associating to each variant the list of its activities
+    """
+    global WORKER_TRIE
+    WORKER_TRIE = variants_trie.build_trie(variants_activities)
+
+
+def replay_model_in_worker(model, consider_remaining_in_fitness):
+    """
+    Replays the variants of the log (sent when the worker has been initialized) on a model
+
+    Parameters
+    -----------
+    model
+        Tuple (net, initial marking, final marking)
+    consider_remaining_in_fitness
+        Boolean value telling if the remaining tokens should be considered in fitness evaluation
+
+    Returns
+    -----------
+    variants_results
+        Dictionary associating to each variant the result of its replay
+    """
+    net, initial_marking, final_marking = model
+    return replay_model_on_trie(WORKER_TRIE, net, initial_marking, final_marking,
+                                consider_remaining_in_fitness=consider_remaining_in_fitness)
+
+
+def apply(log, models, parameters=None):
+    """
+    Replays the same log on several models, computing the variants of the log only once and distributing the models
+    between several worker processes
+
+    Parameters
+    -----------
+    log
+        Trace log
+    models
+        List of tuples (net, initial marking, final marking)
+    parameters
+        Parameters of the algorithm, including:
+            pm4py.util.constants.PARAMETER_CONSTANT_ACTIVITY_KEY -> Activity key
+            max_workers -> Maximum number of worker processes (default: number of CPUs;
+            if 1, the models are replayed in the current process)
+            consider_remaining_in_fitness -> Boolean value telling if the remaining tokens should be considered
+            in fitness evaluation (default: True)
+
+    Returns
+    -----------
+    comparison_table
+        Dataframe having a row for each model (in the same order of the list, so the index is the position
+        of the model in the list) and the fitness metrics (perc_fit_traces, average_trace_fitness, log_fitness)
+        as columns
+    """
+    if parameters is None:
+        parameters = {}
+
+    activity_key = parameters[
+        constants.PARAMETER_CONSTANT_ACTIVITY_KEY] if constants.PARAMETER_CONSTANT_ACTIVITY_KEY in parameters else \
+        xes_util.DEFAULT_NAME_KEY
+    max_workers = parameters[PARAM_MAX_WORKERS] if PARAM_MAX_WORKERS in parameters else os.cpu_count()
+    consider_remaining_in_fitness = parameters[
+        PARAM_CONSIDER_REMAINING_IN_FITNESS] if PARAM_CONSIDER_REMAINING_IN_FITNESS in parameters else True
+
+    variants_activities, variants_count = get_variants_structure(log, activity_key=activity_key)
+
+    max_workers = max(1, min(max_workers if max_workers is not None else 1, len(models)))
+    if max_workers == 1:
+        trie = variants_trie.build_trie(variants_activities)
+        models_results = [replay_model_on_trie(trie, net, im, fm,
+                                               consider_remaining_in_fitness=consider_remaining_in_fitness)
+                          for (net, im, fm) in models]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=initialize_worker,
+                                 initargs=(variants_activities,)) as executor:
+            models_results = list(executor.map(replay_model_in_worker, models,
+                                               [consider_remaining_in_fitness] * len(models)))
+
+    return pd.DataFrame([evaluate_variants(variants_results, variants_count) for variants_results in models_results],
+                        columns=FITNESS_COLUMNS)
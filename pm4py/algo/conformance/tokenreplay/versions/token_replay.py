@@ -1,9 +1,12 @@
+from collections import deque
 from copy import copy
 from threading import Thread
 
 from pm4py import util as pmutil
 from pm4py.algo.filtering.tracelog.variants import variants_filter as variants_module
+from pm4py.objects.log.util import variants_trie
 from pm4py.objects.log.util import xes as xes_util
+from pm4py.objects.petri import net_cache
 from pm4py.objects.petri import semantics
 from pm4py.util import constants
 
@@ -15,6 +18,12 @@ MAX_NO_THREADS = 1000
 ENABLE_POSTFIX_CACHE = False
 ENABLE_MARKTOACT_CACHE = False
 
+ALL_RESULT_FIELDS = ["trace_is_fit", "trace_fitness", "activated_transitions", "reached_marking",
+                     "enabled_transitions_in_marking", "transitions_with_problems", "missing_tokens",
+                     "consumed_tokens", "remaining_tokens", "produced_tokens"]
+FITNESS_RESULT_FIELDS = ["trace_is_fit", "trace_fitness", "missing_tokens", "consumed_tokens", "remaining_tokens",
+                         "produced_tokens"]
+
 
 class NoConceptNameException(Exception):
     def __init__(self, message):
@@ -136,9 +145,10 @@ def get_places_with_missing_tokens(t, marking):
     return places_with_missing
 
 
-def get_places_shortest_path(net, place_to_populate, current_place, places_shortest_path, actual_list, rec_depth):
+def get_places_shortest_path(net, place_to_populate, places_shortest_path):
     """
-    Get shortest path between places lead by hidden transitions
+    Get shortest path between places lead by hidden transitions, through a breadth-first search
+    on the subgraph of the Petri net that contains only the hidden transitions
 
     Parameters
     ----------
@@ -146,36 +156,43 @@ def get_places_shortest_path(net, place_to_populate, current_place, places_short
         Petri net
     place_to_populate
         Place that we are populating the shortest map of
-    current_place
-        Current visited place (must explore its transitions)
     places_shortest_path
         Current dictionary
-    actual_list
-        Actual list of transitions to enable
-    rec_depth
-        Recursion depth
     """
-    if rec_depth > MAX_REC_DEPTH:
-        return places_shortest_path
-    if place_to_populate not in places_shortest_path:
-        places_shortest_path[place_to_populate] = {}
-    for t in current_place.out_arcs:
-        if t.target.label is None:
-            for p2 in t.target.out_arcs:
-                if p2.target not in places_shortest_path[place_to_populate] or len(actual_list) + 1 < len(
-                        places_shortest_path[place_to_populate][p2.target]):
-                    new_actual_list = copy(actual_list)
-                    new_actual_list.append(t.target)
-                    places_shortest_path[place_to_populate][p2.target] = copy(new_actual_list)
-                    places_shortest_path = get_places_shortest_path(net, place_to_populate, p2.target,
-                                                                    places_shortest_path, new_actual_list,
-                                                                    rec_depth + 1)
+    # for each reached place, keep the hidden transition that reached it and the place it has been reached from
+    # (the lists of transitions are built only at the end, avoiding to copy partial paths during the visit)
+    predecessors = {}
+    expanded = {place_to_populate}
+    queue = deque([place_to_populate])
+    while queue:
+        current_place = queue.popleft()
+        for a1 in current_place.out_arcs:
+            t = a1.target
+            if t.label is None:
+                for a2 in t.out_arcs:
+                    p2 = a2.target
+                    if p2 not in predecessors:
+                        predecessors[p2] = (current_place, t)
+                    if p2 not in expanded:
+                        expanded.add(p2)
+                        queue.append(p2)
+    places_shortest_path[place_to_populate] = {}
+    for p2 in predecessors:
+        path = []
+        current_place = p2
+        while True:
+            current_place, t = predecessors[current_place]
+            path.append(t)
+            if current_place == place_to_populate:
+                break
+        path.reverse()
+        places_shortest_path[place_to_populate][p2] = path
     return places_shortest_path
 
 
-def get_places_shortest_path_by_hidden(net):
+def compute_places_shortest_path_by_hidden(net):
     """
-    Get shortest path between places lead by hidden transitions
+    Compute the shortest paths between places lead by hidden transitions
 
     Parameters
     ----------
@@ -184,10 +201,25 @@ def get_places_shortest_path_by_hidden(net):
     """
     places_shortest_path = {}
     for p in net.places:
-        places_shortest_path = get_places_shortest_path(net, p, p, places_shortest_path, [], 0)
+        places_shortest_path = get_places_shortest_path(net, p, places_shortest_path)
     return places_shortest_path
 
 
+def get_places_shortest_path_by_hidden(net):
+    """
+    Get shortest path between places lead by hidden transitions.
+    The result is kept in the cache of pm4py.objects.petri.net_cache, and recalculated only if the structure
+    of the net changes
+
+    Parameters
+    ----------
+    net
+        Petri net
+    """
+    return net_cache.get(net, None, None, "places_shortest_path_by_hidden",
+                         lambda: compute_places_shortest_path_by_hidden(net), bound_to_net=True)
+
+
 def get_hidden_transitions_to_enable(marking, places_with_missing, places_shortest_path_by_hidden):
     """
     Calculate an ordered list of transitions to visit in order to enable a given transition
@@ -377,12 +409,18 @@ def get_visible_transitions_eventually_enabled_by_marking(net, marking):
     marking
         Current marking
     """
-    all_enabled_transitions = list(semantics.enabled_transitions(net, marking))
+    # the net is not modified during the visit
+    consumers_index = semantics.get_consumers_index(net)
+    enabled_transitions = semantics.enabled_transitions(net, marking, consumers_index=consumers_index)
+    all_enabled_transitions = list(enabled_transitions)
     initial_all_enabled_transitions_marking_dictio = {}
     all_enabled_transitions_marking_dictio = {}
+    # set of the transitions enabled in the marking associated to each transition, to update it incrementally
+    all_enabled_transitions_enabled_dictio = {}
     for trans in all_enabled_transitions:
         all_enabled_transitions_marking_dictio[trans] = marking
         initial_all_enabled_transitions_marking_dictio[trans] = marking
+        all_enabled_transitions_enabled_dictio[trans] = enabled_transitions
     visible_transitions = set()
     visited_transitions = set()
 
@@ -397,10 +435,13 @@ def get_visible_transitions_eventually_enabled_by_marking(net, marking):
             else:
                 if semantics.is_enabled(t, net, marking_copy):
                     new_marking = semantics.execute(t, net, marking_copy)
-                    new_enabled_transitions = list(semantics.enabled_transitions(net, new_marking))
+                    new_enabled_transitions = semantics.enabled_transitions_after_firing(
+                        net, t, new_marking, all_enabled_transitions_enabled_dictio[t],
+                        consumers_index=consumers_index)
                     for t2 in new_enabled_transitions:
                         all_enabled_transitions.append(t2)
                         all_enabled_transitions_marking_dictio[t2] = new_marking
+                        all_enabled_transitions_enabled_dictio[t2] = new_enabled_transitions
             visited_transitions.add(repr([t, marking_copy]))
         i = i + 1
 
@@ -426,11 +467,217 @@ def break_condition_final_marking(marking, final_marking):
     return final_marking_dict_keys.issubset(marking_dict_keys)
 
 
+def replay_activity(activity, net, marking, trans_map, places_shortest_path_by_hidden, act_trans, vis_mark,
+                    transitions_with_problems, walk_through_hidden_trans=True, stop_immediately_unfit=False):
+    """
+    Replay a single activity of a trace, starting from the given marking
+
+    Parameters
+    ----------
+    activity
+        Activity to replay
+    net
+        Petri net
+    marking
+        Current marking (it could be modified when tokens are missing)
+    trans_map
+        Map between transitions labels and transitions
+    places_shortest_path_by_hidden
+        Shortest paths between places by hidden transitions
+    act_trans
+        All activated transitions during the replay (updated by the method)
+    vis_mark
+        All visited markings (updated by the method)
+    transitions_with_problems
+        Transitions that could not be enabled during the replay (updated by the method)
+    walk_through_hidden_trans
+        Boolean value that decides if we shall walk through hidden transitions in order to enable visible transitions
+    stop_immediately_unfit
+        Boolean value that decides if we shall stop immediately when a non-conformance is detected
+
+    Returns
+    ----------
+    marking
+        Marking reached after the replay of the activity
+    missing
+        Number of missing tokens
+    consumed
+        Number of consumed tokens
+    produced
+        Number of produced tokens
+    tokens_added
+        Places to which the missing tokens have been added
+    stopped
+        Boolean value that is True when the replay should be stopped (non-conformance while stop_immediately_unfit)
+    """
+    missing = 0
+    consumed = 0
+    produced = 0
+    tokens_added = {}
+    if activity in trans_map:
+        t = trans_map[activity]
+        if walk_through_hidden_trans and not semantics.is_enabled(t, net, marking):
+            visited_transitions = set()
+            [net, marking, act_trans, vis_mark] = apply_hidden_trans(t, net,
+                                                                     marking,
+                                                                     places_shortest_path_by_hidden,
+                                                                     act_trans,
+                                                                     0,
+                                                                     visited_transitions,
+                                                                     vis_mark)
+        if not semantics.is_enabled(t, net, marking):
+            transitions_with_problems.append(t)
+            if stop_immediately_unfit:
+                return [marking, 1, 0, 0, tokens_added, True]
+            [missing, tokens_added] = add_missing_tokens(t, marking)
+        consumed = get_consumed_tokens(t)
+        produced = get_produced_tokens(t)
+        if semantics.is_enabled(t, net, marking):
+            marking = semantics.execute(t, net, marking)
+            act_trans.append(t)
+            vis_mark.append(marking)
+    return [marking, missing, consumed, produced, tokens_added, False]
+
+
+def reach_final_marking_through_hidden(net, marking, final_marking, places_shortest_path_by_hidden, act_trans,
+                                       vis_mark):
+    """
+    Try to reach the final marking at the end of the replay, firing hidden transitions
+
+    Parameters
+    ----------
+    net
+        Petri net
+    marking
+        Current marking
+    final_marking
+        Final marking
+    places_shortest_path_by_hidden
+        Shortest paths between places by hidden transitions
+    act_trans
+        All activated transitions during the replay (updated by the method)
+    vis_mark
+        All visited markings (updated by the method)
+
+    Returns
+    ----------
+    marking
+        Reached marking
+    """
+    for i in range(MAX_IT_FINAL):
+        if not break_condition_final_marking(marking, final_marking):
+            hidden_transitions_to_enable = get_req_transitions_for_final_marking(marking, final_marking,
+                                                                                 places_shortest_path_by_hidden)
+
+            for group in hidden_transitions_to_enable:
+                for t in group:
+                    if semantics.is_enabled(t, net, marking):
+                        marking = semantics.execute(t, net, marking)
+                        act_trans.append(t)
+                        vis_mark.append(marking)
+                if break_condition_final_marking(marking, final_marking):
+                    break
+        else:
+            break
+
+    # try to reach the final marking in a different fashion, if not already reached
+    if not break_condition_final_marking(marking, final_marking):
+        if len(final_marking) == 1:
+            sink_place = list(final_marking)[0]
+
+            connections_to_sink = []
+            for place in marking:
+                if place in places_shortest_path_by_hidden and sink_place in places_shortest_path_by_hidden[place]:
+                    connections_to_sink.append([place, places_shortest_path_by_hidden[place][sink_place]])
+            connections_to_sink = sorted(connections_to_sink, key=lambda x: len(x[1]))
+
+            for i in range(MAX_IT_FINAL):
+                for j in range(len(connections_to_sink)):
+                    for z in range(len(connections_to_sink[j][1])):
+                        t = connections_to_sink[j][1][z]
+                        if semantics.is_enabled(t, net, marking):
+                            marking = semantics.execute(t, net, marking)
+                            act_trans.append(t)
+                            vis_mark.append(marking)
+                            continue
+                        else:
+                            break
+    return marking
+
+
+def get_remaining_tokens(marking, final_marking, trace, enable_place_fitness, place_fitness):
+    """
+    Count the tokens remaining in the marking reached at the end of the replay, removing
+    the ones of the final marking (the marking is modified accordingly)
+
+    Parameters
+    ----------
+    marking
+        Marking reached at the end of the replay
+    final_marking
+        Final marking
+    trace
+        Trace in the event log
+    enable_place_fitness
+        Enable fitness calculation at place level
+    place_fitness
+        Current dictionary of places associated with unfit traces
+    """
+    remaining = 0
+    for p in marking:
+        if p in final_marking:
+            marking[p] = max(0, marking[p] - final_marking[p])
+            if enable_place_fitness:
+                if marking[p] > 0:
+                    if p in place_fitness:
+                        if trace not in place_fitness[p]["underfed_traces"]:
+                            place_fitness[p]["overfed_traces"].add(trace)
+        remaining = remaining + marking[p]
+    return remaining
+
+
+def get_trace_fitness(missing, consumed, remaining, produced, consider_remaining_in_fitness):
+    """
+    Get the fitness of a replayed trace from the token counts
+
+    Parameters
+    ----------
+    missing
+        Number of missing tokens
+    consumed
+        Number of consumed tokens
+    remaining
+        Number of remaining tokens
+    produced
+        Number of produced tokens
+    consider_remaining_in_fitness
+        Boolean value telling if the remaining tokens should be considered in fitness evaluation
+
+    Returns
+    ----------
+    is_fit
+        Boolean value telling if the trace is fit
+    trace_fitness
+        Fitness value of the trace
+    """
+    if consider_remaining_in_fitness:
+        is_fit = (missing == 0) and (remaining == 0)
+    else:
+        is_fit = (missing == 0)
+
+    if consumed > 0 and produced > 0:
+        trace_fitness = (1.0 - float(missing) / float(consumed)) * (1.0 - float(remaining) / float(produced))
+    else:
+        trace_fitness = 1.0
+
+    return is_fit, trace_fitness
+
+
 def apply_trace(trace, net, initial_marking, final_marking, trans_map, enable_place_fitness, place_fitness,
                 places_shortest_path_by_hidden, consider_remaining_in_fitness, activity_key="concept:name",
                 try_to_reach_final_marking_through_hidden=True, stop_immediately_unfit=False,
                 walk_through_hidden_trans=True, post_fix_caching=None,
-                marking_to_activity_caching=None):
+                marking_to_activity_caching=None, compute_enabled_transitions_in_marking=True):
     """
     Apply the token replaying algorithm to a trace
 
@@ -466,6 +713,9 @@ def apply_trace(trace, net, initial_marking, final_marking, trans_map, enable_pl
         Stores the post fix caching object
     marking_to_activity_caching
         Stores the marking-to-activity cache
+    compute_enabled_transitions_in_marking
+        Boolean value that decides if the visible transitions eventually enabled in the reached marking
+        shall be computed (otherwise, None is returned in their place)
     """
     trace_activities = [event[activity_key] for event in trace]
     act_trans = []
@@ -506,38 +756,24 @@ def apply_trace(trace, net, initial_marking, final_marking, trans_map, enable_pl
                 vis_mark = vis_mark + this_vis_markings
                 marking = copy(this_end_marking)
             else:
-                if trace[i][activity_key] in trans_map:
-                    t = trans_map[trace[i][activity_key]]
-                    if walk_through_hidden_trans and not semantics.is_enabled(t, net,
-                                                                              marking):
-                        visited_transitions = set()
-                        prev_len_activated_transitions = len(act_trans)
-                        [net, marking, act_trans, vis_mark] = apply_hidden_trans(t, net,
-                                                                                 marking,
-                                                                                 places_shortest_path_by_hidden,
-                                                                                 act_trans,
-                                                                                 0,
-                                                                                 visited_transitions,
-                                                                                 vis_mark)
-                    if not semantics.is_enabled(t, net, marking):
-                        transitions_with_problems.append(t)
-                        if stop_immediately_unfit:
-                            missing = missing + 1
-                            break
-                        [m, tokens_added] = add_missing_tokens(t, marking)
-                        missing = missing + m
-                        if enable_place_fitness:
-                            for place in tokens_added.keys():
-                                if place in place_fitness:
-                                    place_fitness[place]["underfed_traces"].add(trace)
-                    c = get_consumed_tokens(t)
-                    p = get_produced_tokens(t)
-                    consumed = consumed + c
-                    produced = produced + p
-                    if semantics.is_enabled(t, net, marking):
-                        marking = semantics.execute(t, net, marking)
-                        act_trans.append(t)
-                        vis_mark.append(marking)
+                [marking, m, c, p, tokens_added, stopped] = replay_activity(trace[i][activity_key], net, marking,
+                                                                            trans_map,
+                                                                            places_shortest_path_by_hidden,
+                                                                            act_trans, vis_mark,
+                                                                            transitions_with_problems,
+                                                                            walk_through_hidden_trans=
+                                                                            walk_through_hidden_trans,
+                                                                            stop_immediately_unfit=
+                                                                            stop_immediately_unfit)
+                missing = missing + m
+                consumed = consumed + c
+                produced = produced + p
+                if stopped:
+                    break
+                if enable_place_fitness:
+                    for place in tokens_added.keys():
+                        if place in place_fitness:
+                            place_fitness[place]["underfed_traces"].add(trace)
             del trace_activities[0]
             if len(trace_activities) < MAX_POSTFIX_SUFFIX_LENGTH:
                 activating_transition_index[str(trace_activities)] = {"index": len(act_trans),
@@ -552,68 +788,15 @@ def apply_trace(trace, net, initial_marking, final_marking, trans_map, enable_pl
                      ""])
 
     if try_to_reach_final_marking_through_hidden and not used_postfix_cache:
-        for i in range(MAX_IT_FINAL):
-            if not break_condition_final_marking(marking, final_marking):
-                hidden_transitions_to_enable = get_req_transitions_for_final_marking(marking, final_marking,
-                                                                                     places_shortest_path_by_hidden)
-
-                for group in hidden_transitions_to_enable:
-                    for t in group:
-                        if semantics.is_enabled(t, net, marking):
-                            marking = semantics.execute(t, net, marking)
-                            act_trans.append(t)
-                            vis_mark.append(marking)
-                    if break_condition_final_marking(marking, final_marking):
-                        break
-            else:
-                break
-
-        # try to reach the final marking in a different fashion, if not already reached
-        if not break_condition_final_marking(marking, final_marking):
-            if len(final_marking) == 1:
-                sink_place = list(final_marking)[0]
-
-                connections_to_sink = []
-                for place in marking:
-                    if place in places_shortest_path_by_hidden and sink_place in places_shortest_path_by_hidden[place]:
-                        connections_to_sink.append([place, places_shortest_path_by_hidden[place][sink_place]])
-                connections_to_sink = sorted(connections_to_sink, key=lambda x: len(x[1]))
-
-                for i in range(MAX_IT_FINAL):
-                    for j in range(len(connections_to_sink)):
-                        for z in range(len(connections_to_sink[j][1])):
-                            t = connections_to_sink[j][1][z]
-                            if semantics.is_enabled(t, net, marking):
-                                marking = semantics.execute(t, net, marking)
-                                act_trans.append(t)
-                                vis_mark.append(marking)
-                                continue
-                            else:
-                                break
+        marking = reach_final_marking_through_hidden(net, marking, final_marking, places_shortest_path_by_hidden,
+                                                     act_trans, vis_mark)
 
     marking_before_cleaning = copy(marking)
 
-    remaining = 0
-    for p in marking:
-        if p in final_marking:
-            marking[p] = max(0, marking[p] - final_marking[p])
-            if enable_place_fitness:
-                if marking[p] > 0:
-                    if p in place_fitness:
-                        if trace not in place_fitness[p]["underfed_traces"]:
-                            place_fitness[p]["overfed_traces"].add(trace)
-        remaining = remaining + marking[p]
-    if consider_remaining_in_fitness:
-        is_fit = (missing == 0) and (remaining == 0)
-    else:
-        is_fit = (missing == 0)
-
-    if consumed > 0 and produced > 0:
-        trace_fitness = (1.0 - float(missing) / float(consumed)) * (1.0 - float(remaining) / float(produced))
-    else:
-        trace_fitness = 1.0
+    remaining = get_remaining_tokens(marking, final_marking, trace, enable_place_fitness, place_fitness)
+    is_fit, trace_fitness = get_trace_fitness(missing, consumed, remaining, produced, consider_remaining_in_fitness)
 
-    if is_fit:
+    if is_fit and ENABLE_POSTFIX_CACHE:
         for suffix in activating_transition_index:
             if suffix not in post_fix_caching.cache:
                 post_fix_caching.cache[suffix] = {}
@@ -621,6 +804,7 @@ def apply_trace(trace, net, initial_marking, final_marking, trans_map, enable_pl
                 post_fix_caching.cache[suffix][activating_transition_index[suffix]["marking"]] = \
                     {"trans_to_activate": act_trans[activating_transition_index[suffix]["index"]:],
                      "final_marking": marking}
+    if is_fit and ENABLE_MARKTOACT_CACHE:
         for trans in activating_transition_interval:
             activity = trans[0]
             start_marking_index = trans[1]
@@ -643,9 +827,14 @@ def apply_trace(trace, net, initial_marking, final_marking, trans_map, enable_pl
                             "this_visited_markings": this_visited_markings,
                             "previousActivity": previous_activity}
 
+    if compute_enabled_transitions_in_marking:
+        enabled_transitions_in_marking = get_visible_transitions_eventually_enabled_by_marking(net,
+                                                                                              marking_before_cleaning)
+    else:
+        enabled_transitions_in_marking = None
+
     return [is_fit, trace_fitness, act_trans, transitions_with_problems, marking_before_cleaning,
-            get_visible_transitions_eventually_enabled_by_marking(net, marking_before_cleaning), missing, consumed,
-            remaining, produced]
+            enabled_transitions_in_marking, missing, consumed, remaining, produced]
 
 
 class ApplyTraceTokenReplay(Thread):
@@ -653,7 +842,7 @@ class ApplyTraceTokenReplay(Thread):
                  places_shortest_path_by_hidden, consider_remaining_in_fitness, activity_key="concept:name",
                  reach_mark_through_hidden=True, stop_immediately_when_unfit=False,
                  walk_through_hidden_trans=True, post_fix_caching=None,
-                 marking_to_activity_caching=None):
+                 marking_to_activity_caching=None, compute_enabled_transitions_in_marking=True):
         """
         Constructor
         """
@@ -672,6 +861,7 @@ class ApplyTraceTokenReplay(Thread):
         self.walk_through_hidden_trans = walk_through_hidden_trans
         self.post_fix_caching = post_fix_caching
         self.marking_to_activity_caching = marking_to_activity_caching
+        self.compute_enabled_transitions_in_marking = compute_enabled_transitions_in_marking
         self.t_fit = None
         self.t_value = None
         self.act_trans = None
@@ -698,7 +888,25 @@ class ApplyTraceTokenReplay(Thread):
                         stop_immediately_unfit=self.stop_immediately_when_unfit,
                         walk_through_hidden_trans=self.walk_through_hidden_trans,
                         post_fix_caching=self.post_fix_caching,
-                        marking_to_activity_caching=self.marking_to_activity_caching)
+                        marking_to_activity_caching=self.marking_to_activity_caching,
+                        compute_enabled_transitions_in_marking=self.compute_enabled_transitions_in_marking)
+
+    def get_result(self, result_fields):
+        """
+        Gets the result of the replay of the trace, restricted to the provided fields
+
+        Parameters
+        ------------
+        result_fields
+            Fields of the result that should be returned
+        """
+        result = {"trace_is_fit": self.t_fit, "trace_fitness": self.t_value, "activated_transitions": self.act_trans,
+                  "reached_marking": self.reached_marking,
+                  "enabled_transitions_in_marking": self.enabled_trans_in_mark,
+                  "transitions_with_problems": self.trans_probl, "missing_tokens": self.missing,
+                  "consumed_tokens": self.consumed, "remaining_tokens": self.remaining,
+                  "produced_tokens": self.produced}
+        return {field: result[field] for field in result_fields}
 
 
 class PostFixCaching:
@@ -753,10 +961,137 @@ class MarkingToActivityCaching:
         """
 
 
+def apply_trie(trie, net, initial_marking, final_marking, trans_map, places_shortest_path_by_hidden,
+               enable_place_fitness=False, place_fitness=None, consider_remaining_in_fitness=False,
+               try_to_reach_final_marking_through_hidden=True, stop_immediately_unfit=False,
+               walk_through_hidden_trans=True, result_fields=None, representative_traces=None,
+               compute_prefixes_results=False):
+    """
+    Apply the token replaying algorithm walking a prefix trie of the variants of a log, so that
+    each prefix shared by different variants is replayed only once (the marking and the token counts are
+    carried down the trie)
+
+    Parameters
+    ----------
+    trie
+        Root of the prefix trie of the variants (see pm4py.objects.log.util.variants_trie)
+    net
+        Petri net
+    initial_marking
+        Initial marking
+    final_marking
+        Final marking
+    trans_map
+        Map between transitions labels and transitions
+    places_shortest_path_by_hidden
+        Shortest paths between places by hidden transitions
+    enable_place_fitness
+        Enable fitness calculation at place level
+    place_fitness
+        Current dictionary of places associated with unfit traces
+    consider_remaining_in_fitness
+        Boolean value telling if the remaining tokens should be considered in fitness evaluation
+    try_to_reach_final_marking_through_hidden
+        Boolean value that decides if we shall try to reach the final marking through hidden transitions
+    stop_immediately_unfit
+        Boolean value that decides if we shall stop immediately when a non-conformance is detected
+    walk_through_hidden_trans
+        Boolean value that decides if we shall walk through hidden transitions in order to enable visible transitions
+    result_fields
+        Fields of the result that should be computed and returned
+    representative_traces
+        Dictionary associating to each variant a trace of the log (used for the fitness at place level)
+    compute_prefixes_results
+        Boolean value that decides if the result shall be computed also for each prefix
+        (as if the prefix were a trace of the log)
+
+    Returns
+    ----------
+    variants_results
+        Dictionary associating to each variant the result of its replay
+    prefixes_results
+        Dictionary associating to each prefix the result of its replay (empty if compute_prefixes_results is False)
+    """
+    if result_fields is None:
+        result_fields = ALL_RESULT_FIELDS
+    variants_results = {}
+    prefixes_results = {}
+
+    # the activated transitions, the transitions with problems and the underfed places are kept in lists
+    # shared by the whole visit, that are truncated when the visit goes back to a different branch of the trie
+    act_trans = []
+    transitions_with_problems = []
+    underfed_places = []
+    path = []
+
+    # each entry of the stack: node, marking reached by the parent, missing, consumed, produced, stopped,
+    # lengths of the shared lists for the parent
+    stack = [(trie, initial_marking, 0, 0, 0, False, 0, 0, 0)]
+    while stack:
+        node, marking, missing, consumed, produced, stopped, len_act, len_probl, len_underfed = stack.pop()
+        del act_trans[len_act:]
+        del transitions_with_problems[len_probl:]
+        del underfed_places[len_underfed:]
+        if node.parent is not None:
+            del path[node.depth - 1:]
+            path.append(node.activity)
+
+        if node.parent is not None and not stopped:
+            [marking, m, c, p, tokens_added, stopped] = replay_activity(node.activity, net, copy(marking), trans_map,
+                                                                        places_shortest_path_by_hidden, act_trans,
+                                                                        [], transitions_with_problems,
+                                                                        walk_through_hidden_trans=
+                                                                        walk_through_hidden_trans,
+                                                                        stop_immediately_unfit=
+                                                                        stop_immediately_unfit)
+            missing = missing + m
+            consumed = consumed + c
+            produced = produced + p
+            underfed_places.extend(tokens_added.keys())
+
+        if node.variants or (compute_prefixes_results and node.parent is not None):
+            trace = None
+            if enable_place_fitness and node.variants:
+                trace = representative_traces[node.variants[0]]
+                for place in underfed_places:
+                    if place in place_fitness:
+                        place_fitness[place]["underfed_traces"].add(trace)
+            this_act_trans = list(act_trans) if "activated_transitions" in result_fields else []
+            final_reached_marking = copy(marking)
+            if try_to_reach_final_marking_through_hidden:
+                final_reached_marking = reach_final_marking_through_hidden(net, final_reached_marking,
+                                                                           final_marking,
+                                                                           places_shortest_path_by_hidden,
+                                                                           this_act_trans, [])
+            marking_before_cleaning = copy(final_reached_marking)
+            remaining = get_remaining_tokens(final_reached_marking, final_marking, trace,
+                                             enable_place_fitness and trace is not None, place_fitness)
+            is_fit, trace_fitness = get_trace_fitness(missing, consumed, remaining, produced,
+                                                      consider_remaining_in_fitness)
+            result = {"trace_is_fit": is_fit, "trace_fitness": trace_fitness,
+                      "activated_transitions": this_act_trans, "reached_marking": marking_before_cleaning,
+                      "transitions_with_problems": list(transitions_with_problems), "missing_tokens": missing,
+                      "consumed_tokens": consumed, "remaining_tokens": remaining, "produced_tokens": produced}
+            if "enabled_transitions_in_marking" in result_fields:
+                result["enabled_transitions_in_marking"] = get_visible_transitions_eventually_enabled_by_marking(
+                    net, marking_before_cleaning)
+            result = {field: result[field] for field in result_fields}
+            for variant in node.variants:
+                variants_results[variant] = result
+            if compute_prefixes_results:
+                prefixes_results[",".join(path)] = result
+
+        for child in node.children.values():
+            stack.append((child, marking, missing, consumed, produced, stopped, len(act_trans),
+                          len(transitions_with_problems), len(underfed_places)))
+
+    return variants_results, prefixes_results
+
+
 def apply_log(log, net, initial_marking, final_marking, enable_place_fitness=False, consider_remaining_in_fitness=False,
               activity_key="concept:name", reach_mark_through_hidden=True, stop_immediately_unfit=False,
               walk_through_hidden_trans=True, places_shortest_path_by_hidden=None,
-              variants=None):
+              variants=None, result_fields=None, use_prefix_trie=False):
     """
     Apply token-based replay to a log
 
@@ -786,7 +1121,22 @@ def apply_log(log, net, initial_marking, final_marking, enable_place_fitness=Fal
         Shortest paths between places by hidden transitions
     variants
         List of variants contained in the event log
+    result_fields
+        Fields of the result that should be computed and returned for each trace (default: ALL_RESULT_FIELDS;
+        FITNESS_RESULT_FIELDS is enough to evaluate the fitness)
+    use_prefix_trie
+        Boolean value that decides if the variants shall be replayed walking their prefix trie, so that the prefixes
+        shared by different variants are replayed only once
+
+    Returns
+    ----------
+    aligned_traces
+        List (one item per trace of the log) of the results of the replay. Traces belonging to the same variant
+        share the same result object
     """
+    if result_fields is None:
+        result_fields = ALL_RESULT_FIELDS
+    compute_enabled_transitions_in_marking = "enabled_transitions_in_marking" in result_fields
     post_fix_cache = PostFixCaching()
     marking_to_activity_cache = MarkingToActivityCaching()
     if places_shortest_path_by_hidden is None:
@@ -808,62 +1158,62 @@ def apply_log(log, net, initial_marking, final_marking, enable_place_fitness=Fal
                 if variants is None:
                     parameters_variants = {constants.PARAMETER_CONSTANT_ACTIVITY_KEY: activity_key}
                     variants = variants_module.get_variants(log, parameters=parameters_variants)
-                vc = variants_module.get_variants_sorted_by_count(variants)
-                threads = {}
-                threads_results = {}
-
-                for i in range(len(vc)):
-                    variant = vc[i][0]
+                if use_prefix_trie:
+                    variants_activities = {}
+                    representative_traces = {}
+                    for variant in variants:
+                        representative_traces[variant] = variants[variant][0]
+                        variants_activities[variant] = [x[activity_key] for x in variants[variant][0]]
+                    trie = variants_trie.build_trie(variants_activities)
+                    threads_results, _ = apply_trie(trie, net, initial_marking, final_marking, trans_map,
+                                                    places_shortest_path_by_hidden,
+                                                    enable_place_fitness=enable_place_fitness,
+                                                    place_fitness=place_fitness_per_trace,
+                                                    consider_remaining_in_fitness=consider_remaining_in_fitness,
+                                                    try_to_reach_final_marking_through_hidden=
+                                                    reach_mark_through_hidden,
+                                                    stop_immediately_unfit=stop_immediately_unfit,
+                                                    walk_through_hidden_trans=walk_through_hidden_trans,
+                                                    result_fields=result_fields,
+                                                    representative_traces=representative_traces)
+                else:
+                    vc = variants_module.get_variants_sorted_by_count(variants)
+                    threads = {}
+                    threads_results = {}
+
+                    for i in range(len(vc)):
+                        variant = vc[i][0]
+                        threads_keys = list(threads.keys())
+                        if len(threads_keys) > MAX_NO_THREADS:
+                            for j in range(len(threads_keys)):
+                                t = threads[threads_keys[j]]
+                                t.join()
+                                threads_results[threads_keys[j]] = t.get_result(result_fields)
+                                del threads[threads_keys[j]]
+                            del threads_keys
+                        threads[variant] = ApplyTraceTokenReplay(variants[variant][0], net, initial_marking,
+                                                                 final_marking, trans_map, enable_place_fitness,
+                                                                 place_fitness_per_trace,
+                                                                 places_shortest_path_by_hidden,
+                                                                 consider_remaining_in_fitness,
+                                                                 activity_key=activity_key,
+                                                                 reach_mark_through_hidden=reach_mark_through_hidden,
+                                                                 stop_immediately_when_unfit=stop_immediately_unfit,
+                                                                 walk_through_hidden_trans=walk_through_hidden_trans,
+                                                                 post_fix_caching=post_fix_cache,
+                                                                 marking_to_activity_caching=marking_to_activity_cache,
+                                                                 compute_enabled_transitions_in_marking=
+                                                                 compute_enabled_transitions_in_marking)
+                        threads[variant].start()
                     threads_keys = list(threads.keys())
-                    if len(threads_keys) > MAX_NO_THREADS:
-                        for j in range(len(threads_keys)):
-                            t = threads[threads_keys[j]]
-                            t.join()
-                            threads_results[threads_keys[j]] = {"trace_is_fit": copy(t.t_fit),
-                                                                "trace_fitness": copy(t.t_value),
-                                                                "activated_transitions": copy(t.act_trans),
-                                                                "reached_marking": copy(t.reached_marking),
-                                                                "enabled_transitions_in_marking": copy(
-                                                                    t.enabled_trans_in_mark),
-                                                                "transitions_with_problems": copy(
-                                                                    t.trans_probl),
-                                                                "missing_tokens": t.missing,
-                                                                "consumed_tokens": t.consumed,
-                                                                "remaining_tokens": t.remaining,
-                                                                "produced_tokens": t.produced}
-                            del threads[threads_keys[j]]
-                        del threads_keys
-                    threads[variant] = ApplyTraceTokenReplay(variants[variant][0], net, initial_marking, final_marking,
-                                                             trans_map, enable_place_fitness, place_fitness_per_trace,
-                                                             places_shortest_path_by_hidden,
-                                                             consider_remaining_in_fitness,
-                                                             activity_key=activity_key,
-                                                             reach_mark_through_hidden=reach_mark_through_hidden,
-                                                             stop_immediately_when_unfit=stop_immediately_unfit,
-                                                             walk_through_hidden_trans=walk_through_hidden_trans,
-                                                             post_fix_caching=post_fix_cache,
-                                                             marking_to_activity_caching=marking_to_activity_cache)
-                    threads[variant].start()
-                threads_keys = list(threads.keys())
-                for j in range(len(threads_keys)):
-                    t = threads[threads_keys[j]]
-                    t.join()
-                    threads_results[threads_keys[j]] = {"trace_is_fit": copy(t.t_fit), "trace_fitness": copy(t.t_value),
-                                                        "activated_transitions": copy(t.act_trans),
-                                                        "reached_marking": copy(t.reached_marking),
-                                                        "enabled_transitions_in_marking": copy(
-                                                            t.enabled_trans_in_mark),
-                                                        "transitions_with_problems": copy(t.trans_probl),
-                                                        "missing_tokens": t.missing,
-                                                        "consumed_tokens": t.consumed,
-                                                        "remaining_tokens": t.remaining,
-                                                        "produced_tokens": t.produced}
-                    del threads[threads_keys[j]]
+                    for j in range(len(threads_keys)):
+                        t = threads[threads_keys[j]]
+                        t.join()
+                        threads_results[threads_keys[j]] = t.get_result(result_fields)
+                        del threads[threads_keys[j]]
                 for trace in log:
                     trace_variant = ",".join([x[activity_key] for x in trace])
-                    t = threads_results[trace_variant]
-
-                    aligned_traces.append(t)
+                    aligned_traces.append(threads_results[trace_variant])
             else:
                 raise NoConceptNameException("at least an event is without " + activity_key)
 
@@ -901,6 +1251,8 @@ def apply(log, net, initial_marking, final_marking, parameters=None):
     places_shortest_path_by_hidden = None
     activity_key = xes_util.DEFAULT_NAME_KEY
     variants = None
+    result_fields = None
+    use_prefix_trie = False
 
     if "enable_place_fitness" in parameters:
         enable_place_fitness = parameters["enable_place_fitness"]
@@ -917,6 +1269,10 @@ def apply(log, net, initial_marking, final_marking, parameters=None):
         places_shortest_path_by_hidden = parameters["places_shortest_path_by_hidden"]
     if "variants" in parameters:
         variants = parameters["variants"]
+    if "result_fields" in parameters:
+        result_fields = parameters["result_fields"]
+    if "use_prefix_trie" in parameters:
+        use_prefix_trie = parameters["use_prefix_trie"]
     if pmutil.constants.PARAMETER_CONSTANT_ACTIVITY_KEY in parameters:
         activity_key = parameters[pmutil.constants.PARAMETER_CONSTANT_ACTIVITY_KEY]
 
@@ -926,4 +1282,4 @@ def apply(log, net, initial_marking, final_marking, parameters=None):
                      stop_immediately_unfit=stop_immediately_unfit,
                      walk_through_hidden_trans=walk_through_hidden_trans,
                      places_shortest_path_by_hidden=places_shortest_path_by_hidden, activity_key=activity_key,
-                     variants=variants)
+                     variants=variants, result_fields=result_fields, use_prefix_trie=use_prefix_trie)
@@ -2,6 +2,7 @@ from pm4py.algo.other.playout.versions import basic_playout
 
 BASIC_PLAYOUT = "basic_playout"
 VERSIONS = {BASIC_PLAYOUT: basic_playout.apply}
+VERSIONS_XES = {BASIC_PLAYOUT: basic_playout.apply_to_xes}
 
 
 def apply(net, initial_marking, parameters=None, variant="basic_playout"):
@@ -18,7 +19,34 @@ def apply(net, initial_marking, parameters=None, variant="basic_playout"):
         Parameters of the algorithm:
             noTraces -> Number of traces of the log to generate
             maxTraceLength -> Maximum trace length
+            seed -> Seed of the playout (the same seed gives the same log)
+            max_workers -> Number of worker processes generating the traces
     variant
         Variant of the algorithm to use
     """
     return VERSIONS[variant](net, initial_marking, parameters=parameters)
+
+
+def apply_to_xes(net, initial_marking, output_file_path, parameters=None, variant="basic_playout"):
+    """
+    Do the playout of a Petrinet writing the generated traces directly to a XES file
+
+    Parameters
+    -----------
+    net
+        Petri net to play-out
+    initial_marking
+        Initial marking of the Petri net
+    output_file_path
+        Output file path
+    parameters
+        Parameters of the algorithm:
+            noTraces -> Number of traces of the log to generate
+            maxTraceLength -> Maximum trace length
+            seed -> Seed of the playout (the same seed gives the same log)
+            max_workers -> Number of worker processes generating the traces
+            compress -> Indicates that the XES file must be compressed
+    variant
+        Variant of the algorithm to use
+    """
+    return VERSIONS_XES[variant](net, initial_marking, output_file_path, parameters=parameters)
@@ -1,13 +1,166 @@
-from copy import copy
-from random import shuffle
+import random
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 import pm4py.objects.log.log as log_instance
-from pm4py.objects.petri import semantics
+from pm4py.objects.log.exporter.xes import factory as xes_exporter
+from pm4py.objects.petri import state_space
 
+PARAM_NO_TRACES = "noTraces"
+PARAM_MAX_TRACE_LENGTH = "maxTraceLength"
+PARAM_SEED = "seed"
+PARAM_MAX_WORKERS = "max_workers"
 
-def apply_playout(net, initial_marking, no_traces=100, max_trace_length=100):
+# maximum number of transitions fired in a trace
+MAX_STEPS = 100000
+# the traces are generated in chunks of consecutive traces, each one with its own random generator (seeded from the
+# seed of the playout and the index of the chunk), so the generated log does not depend on the number of workers
+TRACES_PER_CHUNK = 1000
+# maximum number of chunks submitted to the workers and not yet consumed, per worker (bounds the memory used by the
+# parallel playout when the traces are consumed more slowly than they are generated, e.g. when exported)
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+# context of the worker processes of the parallel playout (set by initialize_worker)
+WORKER_CONTEXT = None
+
+
+def compile_playout(net, initial_marking):
     """
-    Do the playout of a Petrinet generating a log
+    Compiles a Petri net for the playout (see pm4py.objects.petri.state_space.compile_net)
+
+    Parameters
+    -----------
+    net
+        Petri net to play-out
+    initial_marking
+        Initial marking of the Petri net
+
+    Returns
+    -----------
+    playout_net
+        Picklable tuple (labels, delta, consumers, marking, missing) where labels[t] is the label of the transition t
+        (None if silent), delta[t] is the tuple of (place index, variation of the tokens) when t fires, consumers[p]
+        is the tuple of (transition, weight) consuming from the place p, marking is the vector of tokens of the
+        initial marking and missing[t] is the number of input places of t not having enough tokens in it
+    """
+    places, transitions, (pre, post, consumers, sources) = state_space.compile_net(net)
+    labels = tuple(t.label for t in transitions)
+    delta = []
+    for t in range(len(transitions)):
+        variation = {}
+        for p, w in pre[t]:
+            variation[p] = variation.get(p, 0) - w
+        for p, w in post[t]:
+            variation[p] = variation.get(p, 0) + w
+        delta.append(tuple((p, v) for p, v in variation.items() if v != 0))
+    consumers_weights = tuple(tuple((t, w) for t in consumers[p] for p2, w in pre[t] if p2 == p)
+                              for p in range(len(places)))
+    marking = [0] * len(places)
+    for index, place in enumerate(places):
+        marking[index] = initial_marking[place]
+    missing = [sum(1 for p, w in pre[t] if marking[p] < w) for t in range(len(transitions))]
+    return labels, tuple(delta), consumers_weights, marking, missing
+
+
+def play_out_chunk(playout_net, chunk_index, no_traces, max_trace_length, seed):
+    """
+    Generates the traces of a chunk: a transition is chosen uniformly among the enabled ones, until no transition
+    is enabled or the trace is longer than the maximum length. The list of the enabled transitions is updated only
+    for the transitions consuming from the places whose tokens are changed by the fired transition
+
+    Parameters
+    -----------
+    playout_net
+        Compiled net (see compile_playout)
+    chunk_index
+        Index of the chunk (its traces are the ones from chunk_index * TRACES_PER_CHUNK)
+    no_traces
+        Total number of traces of the playout
+    max_trace_length
+        Maximum number of events per trace (do break)
+    seed
+        Seed of the playout
+
+    Returns
+    -----------
+    traces
+        List of couples (index of the trace, tuple of the activities of the trace), for the non-empty traces
+    """
+    labels, delta, consumers, initial_marking, initial_missing = playout_net
+    initial_enabled = [t for t in range(len(labels)) if initial_missing[t] == 0]
+    rng = random.Random(str(seed) + "-" + str(chunk_index))
+    traces = []
+    first_trace = chunk_index * TRACES_PER_CHUNK
+    for i in range(first_trace, min(first_trace + TRACES_PER_CHUNK, no_traces)):
+        marking = list(initial_marking)
+        missing = list(initial_missing)
+        enabled = list(initial_enabled)
+        position = [-1] * len(labels)
+        for index, t in enumerate(enabled):
+            position[t] = index
+        trace = []
+        for j in range(MAX_STEPS):
+            if not enabled:
+                break
+            t = rng.choice(enabled)
+            for p, variation in delta[t]:
+                old = marking[p]
+                new = old + variation
+                marking[p] = new
+                for t2, w2 in consumers[p]:
+                    if old >= w2 > new:
+                        # the place has not enough tokens anymore for t2
+                        if missing[t2] == 0:
+                            last = enabled.pop()
+                            if last != t2:
+                                enabled[position[t2]] = last
+                                position[last] = position[t2]
+                            position[t2] = -1
+                        missing[t2] += 1
+                    elif new >= w2 > old:
+                        missing[t2] -= 1
+                        if missing[t2] == 0:
+                            position[t2] = len(enabled)
+                            enabled.append(t2)
+            if labels[t] is not None:
+                trace.append(labels[t])
+                if len(trace) > max_trace_length:
+                    break
+        if trace:
+            traces.append((i, tuple(trace)))
+    return traces
+
+
+def initialize_worker(playout_net, no_traces, max_trace_length, seed):
+    """
+    Stores the compiled net and the settings of the playout in a worker process
+
+    Parameters
+    -----------
+    playout_net
+        Compiled net (see compile_playout)
+    no_traces
+        Total number of traces of the playout
+    max_trace_length
+        Maximum number of events per trace
+    seed
+        Seed of the playout
+    """
+    global WORKER_CONTEXT
+    WORKER_CONTEXT = (playout_net, no_traces, max_trace_length, seed)
+
+
+def play_out_chunk_in_worker(chunk_index):
+    """
+    Generates the traces of a chunk in a worker process (see play_out_chunk)
+    """
+    playout_net, no_traces, max_trace_length, seed = WORKER_CONTEXT
+    return play_out_chunk(playout_net, chunk_index, no_traces, max_trace_length, seed)
+
+
+def generate_traces(net, initial_marking, no_traces=100, max_trace_length=100, seed=None, max_workers=1):
+    """
+    Lazily generates the traces of the playout of a Petri net, in the order of their index
 
     Parameters
     ----------
@@ -19,29 +172,95 @@ def apply_playout(net, initial_marking, no_traces=100, max_trace_length=100):
         Number of traces to generate
     max_trace_length
         Maximum number of events per trace (do break)
+    seed
+        Seed of the playout (the same seed gives the same traces, whatever the number of workers); if not provided,
+        it is taken from the random module
+    max_workers
+        Number of worker processes generating the chunks of traces
+
+    Returns
+    ----------
+    traces
+        Generator of traces (the empty traces are skipped)
     """
-    log = log_instance.TraceLog()
-    for i in range(no_traces):
+    if seed is None:
+        seed = random.getrandbits(64)
+    playout_net = compile_playout(net, initial_marking)
+    no_chunks = (no_traces + TRACES_PER_CHUNK - 1) // TRACES_PER_CHUNK
+    if max_workers is not None and max_workers > 1 and no_chunks > 1:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=initialize_worker,
+                                 initargs=(playout_net, no_traces, max_trace_length, seed)) as executor:
+            pending = deque()
+            next_chunk = 0
+            while next_chunk < no_chunks or pending:
+                while next_chunk < no_chunks and len(pending) < CHUNKS_IN_FLIGHT_PER_WORKER * max_workers:
+                    pending.append(executor.submit(play_out_chunk_in_worker, next_chunk))
+                    next_chunk += 1
+                yield from __to_traces(pending.popleft().result())
+    else:
+        for chunk_index in range(no_chunks):
+            yield from __to_traces(play_out_chunk(playout_net, chunk_index, no_traces, max_trace_length, seed))
+
+
+def __to_traces(chunk):
+    """
+    Converts the traces of a chunk, expressed as couples (index of the trace, activities), to trace objects
+    """
+    for index, activities in chunk:
         trace = log_instance.Trace()
-        trace.attributes["concept:name"] = str(i)
-        marking = copy(initial_marking)
-        for j in range(100000):
-            if not semantics.enabled_transitions(net, marking):
-                break
-            all_enabled_trans = semantics.enabled_transitions(net, marking)
-            all_enabled_trans = list(all_enabled_trans)
-            shuffle(all_enabled_trans)
-            trans = all_enabled_trans[0]
-            if trans.label is not None:
-                event = log_instance.Event()
-                event["concept:name"] = trans.label
-                trace.append(event)
-            marking = semantics.execute(trans, net, marking)
-            if len(trace) > max_trace_length:
-                break
-        if len(trace) > 0:
-            log.append(trace)
-    return log
+        trace.attributes["concept:name"] = str(index)
+        for activity in activities:
+            event = log_instance.Event()
+            event["concept:name"] = activity
+            trace.append(event)
+        yield trace
+
+
+def apply_playout(net, initial_marking, no_traces=100, max_trace_length=100, seed=None, max_workers=1):
+    """
+    Do the playout of a Petrinet generating a log
+
+    Parameters
+    ----------
+    net
+        Petri net to play-out
+    initial_marking
+        Initial marking of the Petri net
+    no_traces
+        Number of traces to generate
+    max_trace_length
+        Maximum number of events per trace (do break)
+    seed
+        Seed of the playout
+    max_workers
+        Number of worker processes
+    """
+    return log_instance.TraceLog(generate_traces(net, initial_marking, no_traces=no_traces,
+                                                 max_trace_length=max_trace_length, seed=seed,
+                                                 max_workers=max_workers))
+
+
+def get_settings(parameters):
+    """
+    Gets the settings of the playout from the parameters
+
+    Parameters
+    -----------
+    parameters
+        Parameters of the algorithm
+
+    Returns
+    -----------
+    settings
+        Dictionary of the keyword arguments of apply_playout
+    """
+    if parameters is None:
+        parameters = {}
+    no_traces = parameters[PARAM_NO_TRACES] if PARAM_NO_TRACES in parameters else 100
+    max_trace_length = parameters[PARAM_MAX_TRACE_LENGTH] if PARAM_MAX_TRACE_LENGTH in parameters else 100
+    seed = parameters[PARAM_SEED] if PARAM_SEED in parameters else None
+    max_workers = parameters[PARAM_MAX_WORKERS] if PARAM_MAX_WORKERS in parameters else 1
+    return {"no_traces": no_traces, "max_trace_length": max_trace_length, "seed": seed, "max_workers": max_workers}
 
 
 def apply(net, initial_marking, parameters=None):
@@ -58,14 +277,27 @@ def apply(net, initial_marking, parameters=None):
         Parameters of the algorithm:
             noTraces -> Number of traces of the log to generate
             maxTraceLength -> Maximum trace length
+            seed -> Seed of the playout (the same seed gives the same log)
+            max_workers -> Number of worker processes generating the traces (default: 1)
     """
-    if parameters is None:
-        parameters = {}
-    no_traces = 100
-    max_trace_length = 100
-    if "noTraces" in parameters:
-        no_traces = parameters["noTraces"]
-    if "maxTraceLength" in parameters:
-        max_trace_length = parameters["maxTraceLength"]
-
-    return apply_playout(net, initial_marking, max_trace_length=max_trace_length, no_traces=no_traces)
+    return apply_playout(net, initial_marking, **get_settings(parameters))
+
+
+def apply_to_xes(net, initial_marking, output_file_path, parameters=None):
+    """
+    Do the playout of a Petrinet writing the generated traces to a XES file as soon as they are generated
+    (without keeping the log in memory)
+
+    Parameters
+    -----------
+    net
+        Petri net to play-out
+    initial_marking
+        Initial marking of the Petri net
+    output_file_path
+        Output file path
+    parameters
+        Parameters of the algorithm (see apply), and of the XES exporter (e.g. compress)
+    """
+    traces = generate_traces(net, initial_marking, **get_settings(parameters))
+    xes_exporter.export_log_stream(log_instance.TraceLog(), traces, output_file_path, parameters=parameters)
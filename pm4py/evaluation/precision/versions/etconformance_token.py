@@ -2,8 +2,10 @@ from collections import Counter
 
 from pm4py import util as pmutil
 from pm4py.algo.conformance.tokenreplay import factory as token_replay
+from pm4py.algo.conformance.tokenreplay.versions import token_replay as token_replay_version
 from pm4py.objects import log as log_lib
 from pm4py.objects.log.log import TraceLog, Event, Trace
+from pm4py.objects.log.util import variants_trie
 from pm4py.objects.log.util import xes as xes_util
 
 """
@@ -25,8 +27,9 @@ although the implementation seems to follow the paper concept
 """
 
 PARAM_ACTIVITY_KEY = pmutil.constants.PARAMETER_CONSTANT_ACTIVITY_KEY
+PARAM_USE_PREFIX_TRIE = "use_prefix_trie"
 
-PARAMETERS = [PARAM_ACTIVITY_KEY]
+PARAMETERS = [PARAM_ACTIVITY_KEY, PARAM_USE_PREFIX_TRIE]
 
 
 def get_log_prefixes(log, activity_key=xes_util.DEFAULT_NAME_KEY):
@@ -77,6 +80,51 @@ def form_fake_log(prefixes_keys, activity_key=xes_util.DEFAULT_NAME_KEY):
     return fake_log
 
 
+def replay_prefixes_trie(log, net, marking, final_marking, prefixes_keys, activity_key=xes_util.DEFAULT_NAME_KEY):
+    """
+    Replay the prefixes of the log walking the prefix trie of its variants (each prefix is replayed only once)
+
+    Parameters
+    ----------
+    log
+        Trace log
+    net
+        Petri net
+    marking
+        Initial marking
+    final_marking
+        Final marking
+    prefixes_keys
+        Keys of the prefixes (the results are returned in the same order)
+    activity_key
+        Activity key (must be provided if different from concept:name)
+
+    Returns
+    ----------
+    aligned_traces
+        Result of the replay of each prefix
+    """
+    variants_activities = {}
+    for trace in log:
+        activities = [x[activity_key] for x in trace]
+        variants_activities[",".join(activities)] = activities
+    trie = variants_trie.build_trie(variants_activities)
+    trans_map = {}
+    for t in net.transitions:
+        trans_map[t.label] = t
+    places_shortest_path_by_hidden = token_replay_version.get_places_shortest_path_by_hidden(net)
+    _, prefixes_results = token_replay_version.apply_trie(trie, net, marking, final_marking, trans_map,
+                                                          places_shortest_path_by_hidden,
+                                                          consider_remaining_in_fitness=False,
+                                                          try_to_reach_final_marking_through_hidden=False,
+                                                          stop_immediately_unfit=True,
+                                                          walk_through_hidden_trans=True,
+                                                          result_fields=["trace_is_fit",
+                                                                         "enabled_transitions_in_marking"],
+                                                          compute_prefixes_results=True)
+    return [prefixes_results[prefix] for prefix in prefixes_keys]
+
+
 def apply(log, net, marking, final_marking, parameters=None):
     """
     Get ET Conformance precision
@@ -94,6 +142,8 @@ def apply(log, net, marking, final_marking, parameters=None):
     parameters
         Parameters of the algorithm, including:
             pm4py.util.constants.PARAMETER_CONSTANT_ACTIVITY_KEY -> Activity key
+            use_prefix_trie -> Replay the prefixes walking the prefix trie of the variants of the log,
+            so that each prefix is replayed only once (default: True)
     """
 
     if parameters is None:
@@ -101,22 +151,29 @@ def apply(log, net, marking, final_marking, parameters=None):
 
     activity_key = parameters[
         PARAM_ACTIVITY_KEY] if PARAM_ACTIVITY_KEY in parameters else log_lib.util.xes.DEFAULT_NAME_KEY
+    use_prefix_trie = parameters[PARAM_USE_PREFIX_TRIE] if PARAM_USE_PREFIX_TRIE in parameters else True
     precision = 0.0
     sum_ee = 0
     sum_at = 0
     prefixes, prefix_count = get_log_prefixes(log, activity_key=activity_key)
     prefixes_keys = list(prefixes.keys())
-    fake_log = form_fake_log(prefixes_keys, activity_key=activity_key)
-
-    parameters_tr = {
-        "consider_remaining_in_fitness": False,
-        "try_to_reach_final_marking_through_hidden": False,
-        "stop_immediately_unfit": True,
-        "walk_through_hidden_trans": True,
-        PARAM_ACTIVITY_KEY: activity_key
-    }
 
-    aligned_traces = token_replay.apply(fake_log, net, marking, final_marking, parameters=parameters_tr)
+    if use_prefix_trie:
+        aligned_traces = replay_prefixes_trie(log, net, marking, final_marking, prefixes_keys,
+                                              activity_key=activity_key)
+    else:
+        fake_log = form_fake_log(prefixes_keys, activity_key=activity_key)
+
+        parameters_tr = {
+            "consider_remaining_in_fitness": False,
+            "try_to_reach_final_marking_through_hidden": False,
+            "stop_immediately_unfit": True,
+            "walk_through_hidden_trans": True,
+            "result_fields": ["trace_is_fit", "enabled_transitions_in_marking"],
+            PARAM_ACTIVITY_KEY: activity_key
+        }
+
+        aligned_traces = token_replay.apply(fake_log, net, marking, final_marking, parameters=parameters_tr)
 
     for i in range(len(aligned_traces)):
         if aligned_traces[i]["trace_is_fit"]:
@@ -17,7 +17,8 @@ def evaluate(aligned_traces, parameters=None):
     Parameters
     ----------
     aligned_traces
-        Alignments calculated for the traces in the log
+        Alignments calculated for the traces in the log; an alignment may stand for several traces (e.g. the
+        alignment of a variant), whose number is given by its key **count** (default: 1)
     parameters
         Possible parameters of the evaluation
 
@@ -29,21 +30,30 @@ def evaluate(aligned_traces, parameters=None):
     if parameters is None:
         parameters = {}
     str(parameters)
-    no_traces = len(aligned_traces)
+    no_traces = 0
     no_fit_traces = 0
     sum_fitness = 0.0
+    no_evaluated_traces = 0
 
     for tr in aligned_traces:
+        count = tr["count"] if "count" in tr else 1
+        no_traces = no_traces + count
+        # the traces having a partial alignment (fitness None) are not fitting, and do not contribute to the
+        # average fitness
+        if tr["fitness"] is None:
+            continue
+        no_evaluated_traces = no_evaluated_traces + count
         if tr["fitness"] == 1.0:
-            no_fit_traces = no_fit_traces + 1
-        sum_fitness = sum_fitness + tr["fitness"]
+            no_fit_traces = no_fit_traces + count
+        sum_fitness = sum_fitness + count * tr["fitness"]
 
     perc_fit_traces = 0.0
     average_fitness = 0.0
 
     if no_traces > 0:
         perc_fit_traces = (100.0 * float(no_fit_traces)) / (float(no_traces))
-        average_fitness = float(sum_fitness) / float(no_traces)
+    if no_evaluated_traces > 0:
+        average_fitness = float(sum_fitness) / float(no_evaluated_traces)
 
     return {"percFitTraces": perc_fit_traces, "averageFitness": average_fitness}
 
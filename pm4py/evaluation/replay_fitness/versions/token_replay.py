@@ -1,4 +1,5 @@
 from pm4py.algo.conformance.tokenreplay import factory as token_replay
+from pm4py.algo.conformance.tokenreplay.versions.token_replay import FITNESS_RESULT_FIELDS
 from pm4py.objects.log.util.xes import DEFAULT_NAME_KEY
 from pm4py.util.constants import PARAMETER_CONSTANT_ACTIVITY_KEY
 
@@ -11,7 +12,8 @@ def evaluate(aligned_traces, parameters=None):
     Parameters
     ------------
     aligned_traces
-        Result of the token-based replayer
+        Result of the token-based replayer; a result may stand for several traces (e.g. the replay of a variant),
+        whose number is given by its key **count** (default: 1)
     parameters
         Possible parameters of the evaluation
 
@@ -23,16 +25,17 @@ def evaluate(aligned_traces, parameters=None):
     if parameters is None:
         parameters = {}
     str(parameters)
-    no_traces = len(aligned_traces)
-    fit_traces = len([x for x in aligned_traces if x["trace_is_fit"]])
-    sum_of_fitness = sum([x["trace_fitness"] for x in aligned_traces])
+    counts = [x["count"] if "count" in x else 1 for x in aligned_traces]
+    no_traces = sum(counts)
+    fit_traces = sum([c for x, c in zip(aligned_traces, counts) if x["trace_is_fit"]])
+    sum_of_fitness = sum([c * x["trace_fitness"] for x, c in zip(aligned_traces, counts)])
     perc_fit_traces = 0.0
     average_fitness = 0.0
     log_fitness = 0
-    total_m = sum([x["missing_tokens"] for x in aligned_traces])
-    total_c = sum([x["consumed_tokens"] for x in aligned_traces])
-    total_r = sum([x["remaining_tokens"] for x in aligned_traces])
-    total_p = sum([x["produced_tokens"] for x in aligned_traces])
+    total_m = sum([c * x["missing_tokens"] for x, c in zip(aligned_traces, counts)])
+    total_c = sum([c * x["consumed_tokens"] for x, c in zip(aligned_traces, counts)])
+    total_r = sum([c * x["remaining_tokens"] for x, c in zip(aligned_traces, counts)])
+    total_p = sum([c * x["produced_tokens"] for x, c in zip(aligned_traces, counts)])
     if no_traces > 0 and total_c > 0 and total_p > 0:
         perc_fit_traces = float(100.0 * fit_traces) / float(no_traces)
         average_fitness = float(sum_of_fitness) / float(no_traces)
@@ -69,7 +72,8 @@ def apply(log, petri_net, initial_marking, final_marking, parameters=None):
         PARAMETER_CONSTANT_ACTIVITY_KEY] if PARAMETER_CONSTANT_ACTIVITY_KEY in parameters else DEFAULT_NAME_KEY
 
     parameters_tr = {PARAMETER_CONSTANT_ACTIVITY_KEY: activity_key,
-                     "consider_remaining_in_fitness": True}
+                     "consider_remaining_in_fitness": True,
+                     "result_fields": FITNESS_RESULT_FIELDS}
 
     aligned_traces = token_replay.apply(log, petri_net, initial_marking, final_marking, parameters=parameters_tr)
 
@@ -4,6 +4,7 @@ from pm4py.objects.log.util import compression
 ETREE = "etree"
 VERSIONS_STRING = {ETREE: etree_xes_exp.export_log_as_string}
 VERSIONS = {ETREE: etree_xes_exp.export_log}
+VERSIONS_STREAM = {ETREE: etree_xes_exp.export_log_stream}
 
 
 def export_log_as_string(log, variant="etree", parameters=None):
@@ -50,6 +51,31 @@ def export_log(log, output_file_path, variant="etree", parameters=None):
         compression.compress(output_file_path)
 
 
+def export_log_stream(log, traces, output_file_path, variant="etree", parameters=None):
+    """
+    Factory method to export a XES incrementally, writing the traces as soon as they are provided
+
+    Parameters
+    -----------
+    log
+        Trace log providing the header of the XES (attributes, extensions, globals and classifiers)
+    traces
+        Iterable of traces (e.g. a generator)
+    output_file_path
+        Output file path
+    variant
+        Selected variant of the algorithm
+    parameters
+        Parameters of the algorithm:
+            compress -> Indicates that the XES file must be compressed
+    """
+    if parameters is None:
+        parameters = {}
+    VERSIONS_STREAM[variant](log, traces, output_file_path, parameters=parameters)
+    if "compress" in parameters and parameters["compress"]:
+        compression.compress(output_file_path)
+
+
 def apply(log, output_file_path, variant="etree", parameters=None):
     """
     Factory method to export a XES from an trace log
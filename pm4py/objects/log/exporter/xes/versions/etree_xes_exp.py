@@ -297,3 +297,43 @@ def export_log(log, output_file_path, parameters=None):
     tree = export_log_tree(log)
     # Effectively do the export of the event log
     tree.write(output_file_path, pretty_print=True, xml_declaration=True, encoding="utf-8")
+
+
+def export_log_stream(log, traces, output_file_path, parameters=None):
+    """
+    Export XES log incrementally: the header of the log (attributes, extensions, globals and classifiers) is written
+    first, then each trace is written as soon as it is provided, without building the tree of the whole log
+
+    Parameters
+    ----------
+    log: :class:`pm4py.log.log.TraceLog`
+        PM4PY trace log providing the header of the XES (its traces are not exported)
+    traces
+        Iterable of traces (e.g. a generator)
+    output_file_path:
+        Output file path
+    parameters
+        Parameters of the algorithm
+
+    """
+    if parameters is None:
+        parameters = {}
+    del parameters
+
+    header = etree.Element(xes_util.TAG_LOG)
+    export_attributes(log, header)
+    export_extensions(log, header)
+    export_globals(log, header)
+    export_classifiers(log, header)
+
+    with etree.xmlfile(output_file_path, encoding="utf-8") as xf:
+        xf.write_declaration()
+        with xf.element(xes_util.TAG_LOG):
+            xf.write("\n")
+            for child in header:
+                xf.write(child, pretty_print=True)
+            for tr in traces:
+                trace = etree.Element(xes_util.TAG_TRACE)
+                export_attributes_element(tr, trace)
+                export_traces_events(tr, trace)
+                xf.write(trace, pretty_print=True)
@@ -1 +1,2 @@
-from pm4py.objects.log.util import compression, general, insert_classifier, string_to_file, trace_log, xes
+from pm4py.objects.log.util import compression, general, insert_classifier, string_to_file, trace_log, xes, \
+    variants_trie
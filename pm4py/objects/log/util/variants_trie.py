@@ -0,0 +1,59 @@
+class TrieNode(object):
+    """
+    Node of a prefix trie of the variants of a log. Each node corresponds to a prefix
+    (the sequence of activities on the path from the root)
+    """
+
+    def __init__(self, activity=None, parent=None):
+        self.activity = activity
+        self.parent = parent
+        self.children = {}
+        self.depth = 0 if parent is None else parent.depth + 1
+        self.variants = []
+
+    def get_activities(self):
+        """
+        Gets the activities of the prefix corresponding to the node
+        """
+        activities = []
+        node = self
+        while node.parent is not None:
+            activities.append(node.activity)
+            node = node.parent
+        activities.reverse()
+        return activities
+
+    def get_prefix(self):
+        """
+        Gets the prefix corresponding to the node, in the same form of the variants (activities separated by comma)
+        """
+        return ",".join(self.get_activities())
+
+    def __repr__(self):
+        return self.get_prefix()
+
+
+def build_trie(variants_activities):
+    """
+    Builds a prefix trie of the variants of a log
+
+    Parameters
+    ------------
+    variants_activities
+        Dictionary associating to each variant the list of its activities
+
+    Returns
+    ------------
+    root
+        Root of the trie (corresponding to the empty prefix). The variants ending in a node are
+        stored in its variants attribute
+    """
+    root = TrieNode()
+    for variant in variants_activities:
+        node = root
+        for activity in variants_activities[variant]:
+            if activity not in node.children:
+                node.children[activity] = TrieNode(activity=activity, parent=node)
+            node = node.children[activity]
+        node.variants.append(variant)
+    return root
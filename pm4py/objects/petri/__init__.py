@@ -1,2 +1,3 @@
-from pm4py.objects.petri import common, exporter, importer, incidence_matrix, petrinet, \
-    reachability_graph, semantics, synchronous_product, utils, check_soundness, networkx_graph
+from pm4py.objects.petri import net_cache, common, exporter, importer, incidence_matrix, petrinet, \
+    reachability_graph, semantics, synchronous_product, utils, check_soundness, networkx_graph, \
+    decomposition, state_space, reduction
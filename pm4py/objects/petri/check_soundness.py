@@ -1,8 +1,9 @@
 import networkx as nx
 import numpy as np
 from scipy.optimize import linprog
+from scipy.sparse import identity, vstack
 
-from pm4py.objects.petri import incidence_matrix
+from pm4py.objects.petri import incidence_matrix, net_cache, state_space
 from pm4py.objects.petri.networkx_graph import create_networkx_undirected_graph
 
 
@@ -110,6 +111,7 @@ def check_wfnet(net):
 def check_soundness_wfnet(net):
     """
     Check if a workflow net is sound by using the incidence matrix
+    (the result is kept in the cache of pm4py.objects.petri.net_cache)
 
     Parameters
     -------------
@@ -121,10 +123,26 @@ def check_soundness_wfnet(net):
     boolean
         Boolean value (True if the WFNet is sound; False if it is not sound)
     """
-    matrix = np.asmatrix(incidence_matrix.construct(net).a_matrix)
-    matrix = np.transpose(matrix)
-    id_matrix = np.identity(matrix.shape[1]) * -1
-    vstack_matrix = np.vstack((matrix, id_matrix))
+    return net_cache.get(net, None, None, "soundness_wfnet", lambda: compute_soundness_wfnet(net))
+
+
+def compute_soundness_wfnet(net):
+    """
+    Check if a workflow net is sound by using the incidence matrix (not cached)
+
+    Parameters
+    -------------
+    net
+        Petri net
+
+    Returns
+    -------------
+    boolean
+        Boolean value (True if the WFNet is sound; False if it is not sound)
+    """
+    matrix = incidence_matrix.construct(net).a_matrix.transpose()
+    id_matrix = identity(matrix.shape[1]) * -1
+    vstack_matrix = vstack((matrix, id_matrix)).tocsr()
     c = np.ones(matrix.shape[1])
     bub = np.zeros(matrix.shape[0] + matrix.shape[1])
     i = matrix.shape[0]
@@ -161,3 +179,30 @@ def check_petri_wfnet_and_soundness(net):
     if is_wfnet:
         return check_soundness_wfnet(net)
     return False
+
+
+def check_soundness_state_space(net, initial_marking, final_marking, parameters=None):
+    """
+    Check if a workflow net is sound by exploring its state space (see pm4py.objects.petri.state_space.explore):
+    the net must be bounded, the final marking must be reachable from every reachable marking, no reachable marking
+    must strictly cover the final marking and every transition must be enabled in some reachable marking.
+    If a place gets more tokens than the bound of the exploration before the net is proved to be unbounded,
+    a BoundExceededException is raised
+
+    Parameters
+    -------------
+    net
+        Petri net
+    initial_marking
+        Initial marking
+    final_marking
+        Final marking
+    parameters
+        Parameters of the exploration (see pm4py.objects.petri.state_space.explore)
+
+    Returns
+    -------------
+    boolean
+        Boolean value (True if the WFNet is sound; False if it is not sound)
+    """
+    return state_space.explore(net, initial_marking, final_marking, parameters=parameters)["sound"]
@@ -0,0 +1,119 @@
+from pm4py.objects.petri.petrinet import PetriNet, Marking
+from pm4py.objects.petri.utils import add_arc_from_to
+
+
+def __find(parents, x):
+    while parents[x] is not x:
+        parents[x] = parents[parents[x]]
+        x = parents[x]
+    return x
+
+
+def __union(parents, x, y):
+    root_x = __find(parents, x)
+    root_y = __find(parents, y)
+    if root_x is not root_y:
+        parents[root_y] = root_x
+
+
+def get_shared_labels(net):
+    """
+    Gets the labels of the net that can be shared between the fragments of a decomposition, i.e. the labels
+    of visible transitions that are unique in the net
+
+    Parameters
+    -------------
+    net
+        Petri net
+
+    Returns
+    -------------
+    shared_labels
+        Set of labels
+    """
+    count = {}
+    for t in net.transitions:
+        if t.label is not None:
+            count[t.label] = count.get(t.label, 0) + 1
+    return {label for label in count if count[label] == 1}
+
+
+def decompose(net, initial_marking, final_marking):
+    """
+    Computes the maximal decomposition of a Petri net (W.M.P. van der Aalst, "Decomposing Petri nets for process
+    mining: A generic approach", Distributed and Parallel Databases 31(4), 2013).
+    Each place, invisible transition and transition with a duplicate label belongs to exactly one fragment,
+    while a visible transition with a unique label is copied in all the fragments containing one of its places
+    (the fragments interact only through these transitions).
+
+    Parameters
+    -------------
+    net
+        Petri net
+    initial_marking
+        Initial marking
+    final_marking
+        Final marking
+
+    Returns
+    -------------
+    fragments
+        List of fragments, each one described by a list [subnet, initial marking, final marking, corr],
+        where corr associates to each transition of the subnet the corresponding transition of the original net
+    """
+    shared_labels = get_shared_labels(net)
+    parents = {p: p for p in net.places}
+    label_places = {}
+    for t in net.transitions:
+        places = [a.source for a in t.in_arcs] + [a.target for a in t.out_arcs]
+        if t.label in shared_labels:
+            continue
+        if t.label is not None:
+            # the transitions sharing a label must belong to the same fragment
+            places = places + label_places.get(t.label, [])
+            label_places[t.label] = places[:1]
+        for p in places[1:]:
+            __union(parents, places[0], p)
+
+    components = {}
+    for p in net.places:
+        root = __find(parents, p)
+        if root not in components:
+            components[root] = []
+        components[root].append(p)
+
+    fragments = []
+    fragment_of_place = {}
+    for root in components:
+        fragment = [PetriNet(net.name), Marking(), Marking(), {}]
+        fragments.append(fragment)
+        for p in components[root]:
+            fragment_of_place[p] = (fragment, PetriNet.Place(p.name))
+            fragment[0].places.add(fragment_of_place[p][1])
+            if p in initial_marking:
+                fragment[1][fragment_of_place[p][1]] = initial_marking[p]
+            if p in final_marking:
+                fragment[2][fragment_of_place[p][1]] = final_marking[p]
+
+    for t in net.transitions:
+        corr = {}
+        for a in t.in_arcs:
+            fragment, place = fragment_of_place[a.source]
+            if id(fragment) not in corr:
+                corr[id(fragment)] = (fragment, PetriNet.Transition(t.name, t.label))
+            add_arc_from_to(place, corr[id(fragment)][1], fragment[0], weight=a.weight)
+        for a in t.out_arcs:
+            fragment, place = fragment_of_place[a.target]
+            if id(fragment) not in corr:
+                corr[id(fragment)] = (fragment, PetriNet.Transition(t.name, t.label))
+            add_arc_from_to(corr[id(fragment)][1], place, fragment[0], weight=a.weight)
+        if not corr and t.label is not None:
+            # visible transition without places: it forms a fragment on its own
+            fragment = [PetriNet(net.name), Marking(), Marking(), {}]
+            fragments.append(fragment)
+            corr[id(fragment)] = (fragment, PetriNet.Transition(t.name, t.label))
+        for fragment, new_trans in corr.values():
+            fragment[0].transitions.add(new_trans)
+            fragment[3][new_trans] = t
+
+    return fragments
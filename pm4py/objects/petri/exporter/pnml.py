@@ -1,10 +1,15 @@
 import uuid
+from io import BytesIO
+from xml.sax.saxutils import escape, quoteattr
 
 from lxml import etree
 
-import pm4py
 from pm4py.objects.petri.petrinet import Marking
 
+PNML_NET_TYPE = "http://www.pnml.org/version-2009/grammar/pnmlcoremodel"
+# number of lines (places, transitions, arcs) written to the output at once by the streaming exporter
+WRITE_CHUNK_SIZE = 10000
+
 
 def export_petri_tree(petrinet, marking, final_marking=None, export_prom5=False):
     """
@@ -26,81 +31,100 @@ def export_petri_tree(petrinet, marking, final_marking=None, export_prom5=False)
     tree
         XML tree
     """
+    root = etree.fromstring(
+        export_petri_as_string(petrinet, marking, final_marking=final_marking, export_prom5=export_prom5))
+    tree = etree.ElementTree(root)
+
+    return tree
+
+
+def export_petri_stream(petrinet, marking, output, final_marking=None, export_prom5=False):
+    """
+    Writes a Petri net as PNML to a file (or a file-like object) incrementally, i.e. the document is written in chunks
+    of lines (a line for each place, transition and arc) as soon as they are produced, without building its tree
+
+    Parameters
+    ----------
+    petrinet: :class:`pm4py.entities.petri.petrinet.PetriNet`
+        Petri net
+    marking: :class:`pm4py.entities.petri.petrinet.Marking`
+        Marking
+    output
+        Output file name, or file-like object (opened in binary mode)
+    final_marking: :class:`pm4py.entities.petri.petrinet.Marking`
+        Final marking (optional)
+    export_prom5
+        Enables exporting PNML files in a format that is ProM5-friendly
+    """
     if final_marking is None:
         final_marking = Marking()
 
-    root = etree.Element("pnml")
-    net = etree.SubElement(root, "net")
-    net.set("id", "net1")
-    net.set("type", "http://www.pnml.org/version-2009/grammar/pnmlcoremodel")
-    if export_prom5 is True:
-        page = net
+    if isinstance(output, str):
+        with open(output, "wb") as f:
+            __write_lines(f, __iterate_lines(petrinet, marking, final_marking, export_prom5))
     else:
-        page = etree.SubElement(net, "page")
-        page.set("id", "n0")
-    places_map = {}
+        __write_lines(output, __iterate_lines(petrinet, marking, final_marking, export_prom5))
+
+
+def __write_lines(f, lines):
+    """
+    Writes the lines of the document, encoded in UTF-8, in chunks of WRITE_CHUNK_SIZE lines
+    """
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= WRITE_CHUNK_SIZE:
+            f.write("".join(chunk).encode("utf-8"))
+            chunk = []
+    f.write("".join(chunk).encode("utf-8"))
+
+
+def __iterate_lines(petrinet, marking, final_marking, export_prom5):
+    """
+    Iterates over the lines of the PNML document of a Petri net
+    """
+    yield "<?xml version='1.0' encoding='UTF-8'?>\n"
+    yield "<pnml>\n<net id=\"net1\" type=%s>\n" % quoteattr(PNML_NET_TYPE)
+    if export_prom5 is not True:
+        yield "<page id=\"n0\">\n"
     for place in petrinet.places:
-        places_map[place] = place.name
-        pl = etree.SubElement(page, "place")
-        pl.set("id", place.name)
-        pl_name = etree.SubElement(pl, "name")
-        pl_name_text = etree.SubElement(pl_name, "text")
-        pl_name_text.text = place.name
+        initial_marking = ""
         if place in marking:
-            pl_initial_marking = etree.SubElement(pl, "initialMarking")
-            pl_initial_marking_text = etree.SubElement(pl_initial_marking, "text")
-            pl_initial_marking_text.text = str(marking[place])
-    transitions_map = {}
+            initial_marking = "<initialMarking><text>%s</text></initialMarking>" % str(marking[place])
+        yield "<place id=%s><name><text>%s</text></name>%s</place>\n" % (
+            quoteattr(place.name), escape(place.name), initial_marking)
     for transition in petrinet.transitions:
-        transitions_map[transition] = transition.name
-        trans = etree.SubElement(page, "transition")
-        trans.set("id", transition.name)
-        trans_name = etree.SubElement(trans, "name")
-        trans_text = etree.SubElement(trans_name, "text")
         if transition.label is not None:
-            trans_text.text = transition.label
-        else:
-            trans_text.text = transition.name
-            tool_specific = etree.SubElement(trans, "toolspecific")
-            tool_specific.set("tool", "ProM")
-            tool_specific.set("version", "6.4")
-            tool_specific.set("activity", "$invisible$")
-            tool_specific.set("localNodeID", str(uuid.uuid4()))
-        if export_prom5 is True:
-            if transition.label is not None:
-                prom5_specific = etree.SubElement(trans, "toolspecific")
-                prom5_specific.set("tool", "ProM")
-                prom5_specific.set("version", "5.2")
-                log_event_prom5 = etree.SubElement(prom5_specific, "logevent")
+            tool_specific = ""
+            if export_prom5 is True:
                 event_name = transition.label.split("+")[0]
                 event_transition = transition.label.split("+")[1] if len(
                     transition.label.split("+")) > 1 else "complete"
-                log_event_prom5_name = etree.SubElement(log_event_prom5, "name")
-                log_event_prom5_name.text = event_name
-                log_event_prom5_type = etree.SubElement(log_event_prom5, "type")
-                log_event_prom5_type.text = event_transition
+                tool_specific = "<toolspecific tool=\"ProM\" version=\"5.2\"><logevent><name>%s</name>" \
+                                "<type>%s</type></logevent></toolspecific>" % (escape(event_name),
+                                                                                escape(event_transition))
+            yield "<transition id=%s><name><text>%s</text></name>%s</transition>\n" % (
+                quoteattr(transition.name), escape(transition.label), tool_specific)
+        else:
+            yield "<transition id=%s><name><text>%s</text></name><toolspecific tool=\"ProM\" version=\"6.4\" " \
+                  "activity=\"$invisible$\" localNodeID=\"%s\"/></transition>\n" % (
+                      quoteattr(transition.name), escape(transition.name), uuid.uuid4())
     for arc in petrinet.arcs:
-        arc_el = etree.SubElement(page, "arc")
-        arc_el.set("id", str(hash(arc)))
-        if type(arc.source) is pm4py.objects.petri.petrinet.PetriNet.Place:
-            arc_el.set("source", str(places_map[arc.source]))
-            arc_el.set("target", str(transitions_map[arc.target]))
+        # the weight is exported only when it is different from 1
+        if arc.weight != 1:
+            yield "<arc id=\"%d\" source=%s target=%s><inscription><text>%s</text></inscription></arc>\n" % (
+                hash(arc), quoteattr(str(arc.source.name)), quoteattr(str(arc.target.name)), str(arc.weight))
         else:
-            arc_el.set("source", str(transitions_map[arc.source]))
-            arc_el.set("target", str(places_map[arc.target]))
-
+            yield "<arc id=\"%d\" source=%s target=%s/>\n" % (
+                hash(arc), quoteattr(str(arc.source.name)), quoteattr(str(arc.target.name)))
+    if export_prom5 is not True:
+        yield "</page>\n"
     if len(final_marking) > 0:
-        finalmarkings = etree.SubElement(net, "finalmarkings")
-        marking = etree.SubElement(finalmarkings, "marking")
-
+        yield "<finalmarkings>\n<marking>\n"
         for place in final_marking:
-            placem = etree.SubElement(marking, "place")
-            placem.set("idref", place.name)
-            placem_text = etree.SubElement(placem, "text")
-            placem_text.text = str(final_marking[place])
-    tree = etree.ElementTree(root)
-
-    return tree
+            yield "<place idref=%s><text>%s</text></place>\n" % (quoteattr(place.name), str(final_marking[place]))
+        yield "</marking>\n</finalmarkings>\n"
+    yield "</net>\n</pnml>\n"
 
 
 def export_petri_as_string(petrinet, marking, final_marking=None, export_prom5=False):
@@ -121,11 +145,10 @@ def export_petri_as_string(petrinet, marking, final_marking=None, export_prom5=F
     string
         Petri net as string
     """
+    output = BytesIO()
+    export_petri_stream(petrinet, marking, output, final_marking=final_marking, export_prom5=export_prom5)
 
-    # gets the XML tree
-    tree = export_petri_tree(petrinet, marking, final_marking=final_marking, export_prom5=export_prom5)
-
-    return etree.tostring(tree, xml_declaration=True, encoding="utf-8")
+    return output.getvalue()
 
 
 def export_net(petrinet, marking, output_filename, final_marking=None, export_prom5=False):
@@ -145,8 +168,4 @@ def export_net(petrinet, marking, output_filename, final_marking=None, export_pr
     export_prom5
         Enables exporting PNML files in a format that is ProM5-friendly
     """
-
-    # gets the XML tree
-    tree = export_petri_tree(petrinet, marking, final_marking=final_marking, export_prom5=export_prom5)
-    # write the tree to a file
-    tree.write(output_filename, pretty_print=True, xml_declaration=True, encoding="utf-8")
+    export_petri_stream(petrinet, marking, output_filename, final_marking=final_marking, export_prom5=export_prom5)
@@ -1,12 +1,14 @@
-import os
-import tempfile
 import time
+from io import BytesIO
 
 from lxml import etree
 
 from pm4py.objects import petri
 from pm4py.objects.petri.common import final_marking
 
+# elements of the document that are processed (at their end) during the parsing
+PARSED_TAGS = ("{*}place", "{*}transition", "{*}arc")
+
 
 def import_petri_from_string(petri_string):
     """
@@ -15,116 +17,115 @@ def import_petri_from_string(petri_string):
     Parameters
     ----------
     petri_string
-        Petri net expressed as PNML string
+        Petri net expressed as PNML string (or bytes)
     """
-    fp = tempfile.NamedTemporaryFile(suffix='.pnml')
-    fp.close()
-    with open(fp.name, 'w') as f:
-        f.write(petri_string)
-    net, initial_marking, this_final_marking = import_net(fp.name)
-    os.remove(fp.name)
-    return net, initial_marking, this_final_marking
+    if isinstance(petri_string, str):
+        petri_string = petri_string.encode("utf-8")
+    return import_net(BytesIO(petri_string))
 
 
 def import_net(input_file_path):
     """
-    Import a Petri net from a PNML file
+    Import a Petri net from a PNML file.
+    The document is parsed incrementally (each place, transition and arc is converted and discarded as soon as it
+    has been read), and the arcs are resolved at the end through the identifiers of the places and transitions
 
     Parameters
     ----------
     input_file_path
-        Input file path
+        Input file path (or file-like object providing the bytes of the document)
     """
-    tree = etree.parse(input_file_path)
-    root = tree.getroot()
-
     net = petri.petrinet.PetriNet('imported_' + str(time.time()))
     marking = petri.petrinet.Marking()
     fmarking = petri.petrinet.Marking()
 
-    nett = None
-    page = None
-    finalmarkings = None
-
-    for child in root:
-        nett = child
-
     places_dict = {}
     trans_dict = {}
-
-    if nett is not None:
-        for child in nett:
-            if "page" in child.tag:
-                page = child
-            if "finalmarkings" in child.tag:
-                finalmarkings = child
-
-    if page is not None:
-        for child in page:
-            if "place" in child.tag:
-                place_id = child.get("id")
-                place_name = place_id
-                number = 0
-                for child2 in child:
-                    if "name" in child2.tag:
-                        for child3 in child2:
-                            if child3.text:
-                                place_name = child3.text
-                    if "initialMarking" in child2.tag:
-                        for child3 in child2:
-                            if child3.tag == "text":
-                                number = int(child3.text)
+    arcs = []
+    final_places = {}
+
+    for tree_event, elem in etree.iterparse(input_file_path, events=("end",), tag=PARSED_TAGS):
+        tag = elem.tag
+        if tag.endswith("place"):
+            if elem.get("idref") is not None:
+                # reference to a place in the final marking
+                number = int(__get_text(elem, (), "0"))
+                if number > 0:
+                    final_places[elem.get("idref")] = number
+            else:
+                place_id = elem.get("id")
                 places_dict[place_id] = petri.petrinet.PetriNet.Place(place_id)
                 net.places.add(places_dict[place_id])
+                number = int(__get_text(elem, ("initialMarking",), "0"))
                 if number > 0:
                     marking[places_dict[place_id]] = number
-                del place_name
-
-    if page is not None:
-        for child in page:
-            if "transition" in child.tag:
-                trans_name = child.get("id")
-                trans_label = trans_name
-                trans_visible = True
-                for child2 in child:
-                    if child2.tag == "name":
-                        for child3 in child2:
-                            if child3.text:
-                                trans_label = child3.text
-                    if "toolspecific" in child2.tag:
-                        tool = child2.get("tool")
-                        if "ProM" in tool:
-                            activity = child2.get("activity")
-                            if "invisible" in activity:
-                                trans_visible = False
-                if not trans_visible:
+        elif tag.endswith("transition"):
+            trans_name = elem.get("id")
+            trans_label = __get_text(elem, ("name",), trans_name)
+            for child in elem:
+                if child.tag.endswith("toolspecific") and "ProM" in child.get("tool", "") and \
+                        "invisible" in child.get("activity", ""):
                     trans_label = None
-                trans_dict[trans_name] = petri.petrinet.PetriNet.Transition(trans_name, trans_label)
-                net.transitions.add(trans_dict[trans_name])
-
-    if page is not None:
-        for child in page:
-            if "arc" in child.tag:
-                arc_source = child.get("source")
-                arc_target = child.get("target")
-
-                if arc_source in places_dict and arc_target in trans_dict:
-                    petri.utils.add_arc_from_to(places_dict[arc_source], trans_dict[arc_target], net)
-                elif arc_target in places_dict and arc_source in trans_dict:
-                    petri.utils.add_arc_from_to(trans_dict[arc_source], places_dict[arc_target], net)
-
-    if finalmarkings is not None:
-        for child in finalmarkings:
-            for child2 in child:
-                place_id = child2.get("idref")
-                for child3 in child2:
-                    if "text" in child3.tag:
-                        number = int(child3.text)
-                        if number > 0:
-                            fmarking[places_dict[place_id]] = number
+            trans_dict[trans_name] = petri.petrinet.PetriNet.Transition(trans_name, trans_label)
+            net.transitions.add(trans_dict[trans_name])
+        else:
+            weight = int(__get_text(elem, ("inscription",), "1")) if len(elem) else 1
+            arc = (elem.get("source"), elem.get("target"), weight)
+            # the arcs referring to nodes that have not been read yet are resolved at the end
+            if not __resolve_arc(arc, places_dict, trans_dict, net):
+                arcs.append(arc)
+        # the elements already converted are not needed anymore
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+
+    for arc in arcs:
+        __resolve_arc(arc, places_dict, trans_dict, net)
+
+    for place_id, number in final_places.items():
+        fmarking[places_dict[place_id]] = number
 
     # generate the final marking in the case has not been found
     if len(fmarking) == 0:
         fmarking = final_marking.discover_final_marking(net)
 
     return net, marking, fmarking
+
+
+def __get_text(elem, path, default):
+    """
+    Gets the text of the text element reached from an element following a path of tags (without namespace),
+    or the default value if there is no such element
+    """
+    for tag in path + ("text",):
+        for child in elem:
+            if child.tag.endswith(tag):
+                elem = child
+                break
+        else:
+            return default
+    return elem.text if elem.text else default
+
+
+def __resolve_arc(arc, places_dict, trans_dict, net):
+    """
+    Adds an arc, expressed as (source identifier, target identifier, weight), to a Petri net that is being imported
+    (like pm4py.objects.petri.utils.add_arc_from_to, without invalidating the caches of the net at each arc)
+
+    Returns
+    ------------
+    resolved
+        Boolean telling if both the source and the target are known (and the arc has been added)
+    """
+    arc_source, arc_target, weight = arc
+    if arc_source in places_dict and arc_target in trans_dict:
+        source, target = places_dict[arc_source], trans_dict[arc_target]
+    elif arc_target in places_dict and arc_source in trans_dict:
+        source, target = trans_dict[arc_source], places_dict[arc_target]
+    else:
+        return False
+    arc = petri.petrinet.PetriNet.Arc(source, target, weight)
+    net.arcs.add(arc)
+    source.out_arcs.add(arc)
+    target.in_arcs.add(arc)
+    return True
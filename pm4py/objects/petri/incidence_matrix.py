@@ -1,42 +1,149 @@
+import numpy as np
+from scipy.sparse import coo_matrix
+
+
 class IncidenceMatrix(object):
 
-    def __init__(self, net):
-        self.__A, self.__place_indices, self.__transition_indices = self.__construct_matrix(net)
+    def __init__(self, net, columns=None):
+        self.__A, self.__place_indices, self.__transition_indices = self.__construct_matrix(net, columns)
+        self.__places_array = np.empty(len(self.__place_indices), dtype=object)
+        for p, index in self.__place_indices.items():
+            self.__places_array[index] = p
+        self.__transitions_array = np.empty(len(self.__transition_indices), dtype=object)
+        for t, index in self.__transition_indices.items():
+            self.__transitions_array[index] = t
+        self.__pre = None
+        self.__post = None
 
     def encode_marking(self, marking):
-        x = [0 for i in range(len(self.places))]
-        for p in marking:
-            x[self.places[p]] = marking[p]
+        """
+        Encodes a marking as a vector of tokens, indexed like the places (rows) of the matrix
+
+        Parameters
+        ----------
+        marking
+            Marking
+
+        Returns
+        ----------
+        vector
+            Numpy (float) array
+        """
+        x = np.zeros(len(self.__place_indices))
+        if marking:
+            indices = np.fromiter((self.__place_indices[p] for p in marking), dtype=int, count=len(marking))
+            x[indices] = np.fromiter(marking.values(), dtype=float, count=len(marking))
         return x
 
     def __get_a_matrix(self):
         return self.__A
 
+    def __get_pre_matrix(self):
+        if self.__pre is None:
+            self.__pre = self.__construct_arcs_matrix(lambda t: [(a.source, a.weight) for a in t.in_arcs])
+        return self.__pre
+
+    def __get_post_matrix(self):
+        if self.__post is None:
+            self.__post = self.__construct_arcs_matrix(lambda t: [(a.target, a.weight) for a in t.out_arcs])
+        return self.__post
+
     def __get_transition_indices(self):
         return self.__transition_indices
 
     def __get_place_indices(self):
         return self.__place_indices
 
-    def __construct_matrix(self, net):
+    def __get_places_array(self):
+        return self.__places_array
+
+    def __get_transitions_array(self):
+        return self.__transitions_array
+
+    def __construct_matrix(self, net, columns):
         self.matrix_built = True
         p_index, t_index = {}, {}
         for p in net.places:
             p_index[p] = len(p_index)
         for t in net.transitions:
             t_index[t] = len(t_index)
-        a_matrix = [[0 for i in range(len(t_index))] for j in range(len(p_index))]
-        for p in net.places:
-            for a in p.in_arcs:
-                a_matrix[p_index[p]][t_index[a.source]] += 1
-            for a in p.out_arcs:
-                a_matrix[p_index[p]][t_index[a.target]] -= 1
-        return a_matrix, p_index, t_index
+        rows, cols, values = [], [], []
+        for t in net.transitions:
+            column = columns[t] if columns is not None and t in columns else get_column(t)
+            for p, delta in column:
+                rows.append(p_index[p])
+                cols.append(t_index[t])
+                values.append(delta)
+        return self.__to_csr(rows, cols, values, (len(p_index), len(t_index))), p_index, t_index
+
+    def __construct_arcs_matrix(self, get_places):
+        rows, cols, values = [], [], []
+        for t, index in self.__transition_indices.items():
+            for p, weight in get_places(t):
+                rows.append(self.__place_indices[p])
+                cols.append(index)
+                values.append(weight)
+        return self.__to_csr(rows, cols, values, (len(self.__place_indices), len(self.__transition_indices)))
+
+    @staticmethod
+    def __to_csr(rows, cols, values, shape):
+        """
+        Builds a (float) CSR matrix from its entries, summing the duplicate entries and dropping the null ones
+        """
+        matrix = coo_matrix((np.asarray(values, dtype=float),
+                             (np.asarray(rows, dtype=int), np.asarray(cols, dtype=int))), shape=shape).tocsr()
+        matrix.eliminate_zeros()
+        return matrix
 
     a_matrix = property(__get_a_matrix)
+    pre_matrix = property(__get_pre_matrix)
+    post_matrix = property(__get_post_matrix)
     places = property(__get_place_indices)
     transitions = property(__get_transition_indices)
+    places_array = property(__get_places_array)
+    transitions_array = property(__get_transitions_array)
+
+
+def get_column(t):
+    """
+    Gets the column of the incidence matrix related to a transition
+
+    Parameters
+    ----------
+    t
+        Transition
+
+    Returns
+    ----------
+    column
+        List of couples (place, variation of the tokens in the place when the transition fires)
+    """
+    column = []
+    for a in t.out_arcs:
+        column.append((a.target, a.weight))
+    for a in t.in_arcs:
+        column.append((a.source, -a.weight))
+    return column
+
+
+def construct(net, columns=None):
+    """
+    Constructs the incidence matrix of a Petri net.
+    The matrix (a_matrix), along with the consumption (pre_matrix) and production (post_matrix) matrices,
+    is a scipy sparse (CSR) matrix of floats, having a row for each place and a column for each transition
+    (see the places and transitions dictionaries, and the places_array and transitions_array numpy arrays,
+    for the correspondence between the objects and the indexes)
 
+    Parameters
+    ----------
+    net
+        Petri net
+    columns
+        (Optional) dictionary associating to some transitions their (precomputed) column, see get_column
 
-def construct(net):
-    return IncidenceMatrix(net)
+    Returns
+    ----------
+    incidence_matrix
+        Incidence matrix
+    """
+    return IncidenceMatrix(net, columns=columns)
@@ -0,0 +1,143 @@
+import hashlib
+import weakref
+from collections import OrderedDict
+from weakref import WeakKeyDictionary
+
+# maximum number of artefacts kept in the cache (the least recently used ones are discarded first)
+MAX_ARTEFACTS = 128
+
+# fingerprint of the structure of each Petri net, along with the elements of the net (places, transitions with their
+# labels, arcs with their weights) when it was computed
+STRUCTURE_FINGERPRINTS = WeakKeyDictionary()
+
+# artefacts computed on the Petri nets, associated to the fingerprint of (net, initial marking, final marking)
+ARTEFACTS = OrderedDict()
+
+
+def get_structure_fingerprint(net, memoised=True):
+    """
+    Gets a fingerprint of the structure of a Petri net (places, transitions with their labels, arcs with their
+    weights), that does not depend on the identity of the objects and is the same in different processes.
+    The fingerprint is memoised per net, and recomputed when a place, a transition (or its label), an arc
+    (or its weight) of the net changes
+
+    Parameters
+    -------------
+    net
+        Petri net
+    memoised
+        If False, the fingerprint is computed from scratch (e.g. for keys that are persisted)
+
+    Returns
+    -------------
+    fingerprint
+        Hexadecimal string
+    """
+    # comparing the elements of the net is cheaper than sorting and hashing them
+    elements = (len(net.places), len(net.transitions), len(net.arcs), frozenset(p.name for p in net.places),
+                frozenset((t.name, t.label) for t in net.transitions),
+                frozenset((a.source.name, a.target.name, a.weight) for a in net.arcs))
+    if memoised and net in STRUCTURE_FINGERPRINTS and STRUCTURE_FINGERPRINTS[net][0] == elements:
+        return STRUCTURE_FINGERPRINTS[net][1]
+    places = sorted(repr(p.name) for p in net.places)
+    transitions = sorted(repr((t.name, t.label)) for t in net.transitions)
+    arcs = sorted(repr((a.source.name, a.target.name, a.weight)) for a in net.arcs)
+    fingerprint = hashlib.sha256(repr((places, transitions, arcs)).encode("utf-8")).hexdigest()
+    STRUCTURE_FINGERPRINTS[net] = (elements, fingerprint)
+    return fingerprint
+
+
+def get_fingerprint(net, initial_marking=None, final_marking=None, memoised=True):
+    """
+    Gets a fingerprint of a Petri net and (optionally) of its initial and final marking
+
+    Parameters
+    -------------
+    net
+        Petri net
+    initial_marking
+        Initial marking
+    final_marking
+        Final marking
+    memoised
+        If False, the fingerprint of the structure of the net is computed from scratch
+
+    Returns
+    -------------
+    fingerprint
+        Hexadecimal string
+    """
+    markings = []
+    for marking in [initial_marking, final_marking]:
+        if marking is not None:
+            markings.append(sorted(repr((p.name, marking[p])) for p in marking))
+        else:
+            markings.append(None)
+    return hashlib.sha256(repr((get_structure_fingerprint(net, memoised=memoised), markings)).encode(
+        "utf-8")).hexdigest()
+
+
+def get(net, initial_marking, final_marking, artefact, compute, bound_to_net=False):
+    """
+    Gets an artefact computed on a Petri net (and its markings) from the process-wide cache, computing it
+    if it is not there.
+    Artefacts that do not refer to the objects of the net (e.g. a cost) are shared between all the nets having
+    the same fingerprint, while the ones that do (e.g. a dictionary of places) are kept separately for each net
+
+    Parameters
+    -------------
+    net
+        Petri net
+    initial_marking
+        Initial marking (or None, if the artefact does not depend on it)
+    final_marking
+        Final marking (or None, if the artefact does not depend on it)
+    artefact
+        Hashable identifier of the artefact (including the parameters it depends on)
+    compute
+        Function without arguments that computes the artefact
+    bound_to_net
+        The artefact refers to the objects of the net
+
+    Returns
+    -------------
+    value
+        Artefact
+    """
+    key = (get_fingerprint(net, initial_marking, final_marking), artefact)
+    if bound_to_net:
+        key = key + (id(net),)
+    if key in ARTEFACTS:
+        net_ref, value = ARTEFACTS[key]
+        if net_ref is None or net_ref() is net:
+            ARTEFACTS.move_to_end(key)
+            return value
+    value = compute()
+    # the artefacts bound to a net are discarded as soon as the net is garbage collected
+    net_ref = weakref.ref(net, lambda ref, key=key: ARTEFACTS.pop(key, None)) if bound_to_net else None
+    ARTEFACTS[key] = (net_ref, value)
+    while len(ARTEFACTS) > MAX_ARTEFACTS:
+        ARTEFACTS.popitem(last=False)
+    return value
+
+
+def invalidate(net):
+    """
+    Invalidates the fingerprint of a Petri net (called when the net is modified). The artefacts computed on the
+    previous structure are not reachable anymore, and are discarded when they become the least recently used
+
+    Parameters
+    -------------
+    net
+        Petri net
+    """
+    if net in STRUCTURE_FINGERPRINTS:
+        del STRUCTURE_FINGERPRINTS[net]
+
+
+def clear():
+    """
+    Empties the cache
+    """
+    STRUCTURE_FINGERPRINTS.clear()
+    ARTEFACTS.clear()
@@ -5,25 +5,14 @@ class Marking(Counter):
     pass
 
     def __hash__(self):
-        r = 0
-        for p in self.items():
-            r += 31 * hash(p[0]) * p[1]
-        return r
+        # the hash of the set of (place, tokens) couples does not depend on the order of the places, and (unlike
+        # a sum of the hashes of the places) rarely collides between the markings of the same net
+        return hash(frozenset(self.items()))
 
     def __eq__(self, other):
         if not isinstance(other, Marking):
             return False
-        for p in self.keys():
-            if p not in other.keys():
-                return False
-            if other.get(p) != self.get(p):
-                return False
-        for p in other.keys():
-            if p not in self.keys():
-                return False
-            if self.get(p) != other.get(p):
-                return False
-        return True
+        return dict.__eq__(self, other)
 
     def __repr__(self):
         # return str([str(p.name) + ":" + str(self.get(p)) for p in self.keys()])
@@ -111,7 +100,7 @@ class PetriNet(object):
             return self.__target
 
         def __set_weight(self, weight):
-            self.__wight = weight
+            self.__weight = weight
 
         def __get_weight(self):
             return self.__weight
@@ -1,9 +1,15 @@
 import re
+import time
+from collections import deque
 
 from pm4py.objects import petri
+from pm4py.objects.petri.petrinet import Marking
 from pm4py.objects.transition_system import transition_system as ts
 from pm4py.objects.transition_system import utils
 
+# number of tokens of a place that is unbounded in the coverability graph
+OMEGA = float("inf")
+
 
 def staterep(name):
     """
@@ -22,42 +28,136 @@ def staterep(name):
     return re.sub(r'\W+', '', name)
 
 
-def construct_reachability_graph(net, initial_marking):
+class StateSpaceTooLargeException(Exception):
+    def __init__(self, message):
+        self.message = message
+
+
+def get_state_name(marking, places_names):
+    """
+    Gets the name of the state of the reachability graph corresponding to a marking (the same as
+    staterep(repr(marking)), but the names of the places are filtered only once)
+
+    Parameters
+    ----------
+    marking: marking
+    places_names: dictionary associating to each place its filtered name (filled by the function)
+
+    Returns
+    -------
+    Name of the state
+    """
+    parts = []
+    for p in marking:
+        if p not in places_names:
+            places_names[p] = (str(p.name), staterep(str(p.name)))
+        count = marking[p]
+        parts.append((places_names[p], "omega" if count == OMEGA else str(count)))
+    parts.sort(key=lambda x: x[0][0])
+    return "".join(name[1] + count for name, count in parts)
+
+
+def __fire(t, marking):
+    """
+    Fires a transition that is known to be enabled in the marking (without checking it again as
+    petri.semantics.execute does)
+    """
+    m_out = Marking(marking)
+    for a in t.in_arcs:
+        m_out[a.source] -= a.weight
+        if m_out[a.source] == 0:
+            del m_out[a.source]
+    for a in t.out_arcs:
+        m_out[a.target] += a.weight
+    return m_out
+
+
+def __accelerate(marking, ancestor):
+    """
+    Karp-Miller acceleration: if the marking strictly covers the ancestor, the places having more tokens than in the
+    ancestor become unbounded (OMEGA)
+    """
+    for p in ancestor:
+        if marking[p] < ancestor[p]:
+            return False
+    if marking == ancestor:
+        return False
+    for p in list(marking):
+        if marking[p] > ancestor[p]:
+            marking[p] = OMEGA
+    return True
+
+
+def construct_reachability_graph(net, initial_marking, max_states=None, max_time=None, coverability=False):
     """
     Creates a reachability graph of a certain Petri net.
-    DO NOT ATTEMPT WITH AN UNBOUNDED PETRI NET, EVER.
+    DO NOT ATTEMPT WITH AN UNBOUNDED PETRI NET, EVER (unless max_states or max_time is provided, or the coverability
+    graph is requested).
     TODO: graphviz do not show labeling for the arcs. Add the labeling.
 
     Parameters
     ----------
     net: Petri net
     initial_marking: initial marking of the Petri net.
+    max_states: (optional) maximum number of states of the reachability graph. If the reachability graph
+    contains more states, a StateSpaceTooLargeException is raised
+    max_time: (optional) maximum time (in seconds) spent in the construction. If it is exceeded,
+    a StateSpaceTooLargeException is raised
+    coverability: (optional) if True, the coverability graph is constructed instead (Karp-Miller): when a marking
+    strictly covers a marking on the path that reached it, the places having more tokens become unbounded,
+    and get OMEGA tokens. The coverability graph is always finite, and equal to the reachability graph on
+    bounded nets
 
     Returns
     -------
-    re_gr: Transition system that represents the reachability graph of the input Petri net.
+    re_gr: Transition system that represents the reachability graph of the input Petri net. The marking
+    corresponding to each state is stored in the data of the state (key 'marking'), and the Petri net
+    transition corresponding to each arc in the data of the transition (key 'transition')
     """
-    active = [initial_marking]
-    visited = []
+    deadline = time.time() + max_time if max_time is not None else None
+    places_names = {}
     re_gr = ts.TransitionSystem()
-    re_gr.states.add(ts.TransitionSystem.State(staterep(repr(initial_marking))))
-    for i in range(10000000):
-        if not active:
-            break
-        curr_mark = active.pop(0)
-        curr_state = next((state for state in re_gr.states if state.name == staterep(repr(curr_mark))), None)
-        en_tr = petri.semantics.enabled_transitions(net, curr_mark)
+    states = {initial_marking: ts.TransitionSystem.State(get_state_name(initial_marking, places_names),
+                                                         data={'marking': initial_marking})}
+    re_gr.states.add(states[initial_marking])
+    # marking from which each marking has been reached first (used by the coverability graph)
+    parents = {initial_marking: None}
+    # the net is not modified during the construction
+    consumers_index = petri.semantics.get_consumers_index(net)
+    # markings to explore, along with the transitions enabled in them (updated incrementally after each firing)
+    active = deque([(initial_marking, petri.semantics.enabled_transitions(net, initial_marking,
+                                                                          consumers_index=consumers_index))])
+    while active:
+        if deadline is not None and time.time() > deadline:
+            raise StateSpaceTooLargeException("the construction of the reachability graph took more than " +
+                                              str(max_time) + " seconds")
+        curr_mark, en_tr = active.popleft()
+        curr_state = states[curr_mark]
         for t in en_tr:
-            next_mark = petri.semantics.execute(t, net, curr_mark)
-            next_state = next((state for state in re_gr.states if state.name == staterep(repr(next_mark))), None)
+            next_mark = __fire(t, curr_mark)
+            accelerated = False
+            if coverability:
+                ancestor = curr_mark
+                while ancestor is not None:
+                    accelerated = __accelerate(next_mark, ancestor) or accelerated
+                    ancestor = parents[ancestor]
+            next_state = states.get(next_mark)
             if next_state is None:
-                next_state = ts.TransitionSystem.State(staterep(repr(next_mark)))
+                if max_states is not None and len(states) >= max_states:
+                    raise StateSpaceTooLargeException("the reachability graph has more than " + str(max_states) +
+                                                      " states")
+                next_state = ts.TransitionSystem.State(get_state_name(next_mark, places_names),
+                                                       data={'marking': next_mark})
+                states[next_mark] = next_state
+                parents[next_mark] = curr_mark
                 re_gr.states.add(next_state)
-            utils.add_arc_from_to(repr(t), curr_state, next_state, re_gr)
-            # If the next marking hash is not in visited, if the next marking itself is not already in active
-            # and if the next marking is different from the current one
-            if hash(next_mark) not in visited and next((mark for mark in active if hash(mark) == hash(next_mark)),
-                                                       None) is None and hash(curr_mark) != hash(next_mark):
-                active.append(next_mark)
-        visited.append(hash(curr_mark))
+                # the next marking is new: it has not been visited yet and it is not already in active
+                if accelerated:
+                    next_enabled = petri.semantics.enabled_transitions(net, next_mark,
+                                                                       consumers_index=consumers_index)
+                else:
+                    next_enabled = petri.semantics.enabled_transitions_after_firing(net, t, next_mark, en_tr,
+                                                                                    consumers_index=consumers_index)
+                active.append((next_mark, next_enabled))
+            utils.add_arc_from_to(repr(t), curr_state, next_state, re_gr, data={'transition': t})
     return re_gr
@@ -0,0 +1,263 @@
+"""
+This module contains the structural reduction of Petri nets (T. Murata, "Petri nets: Properties, analysis and
+applications", Proceedings of the IEEE 77(4), 1989), restricted to the rules that only remove silent transitions
+and places, so that the language of the net (over the labels of the visible transitions) and the reachability of the
+final marking are preserved:
+- removal of self-loop silent transitions (consuming and producing the same tokens);
+- fusion of parallel silent transitions (same input and output places) and of parallel places (same input and
+  output transitions, and same tokens in the initial and final marking), i.e. removal of redundant places;
+- fusion of series places: a silent transition moving the token from a place, that has no other output transition,
+  to another place is removed, and the two places are merged;
+- fusion of series transitions: a silent transition that is the only output of a place, that is produced only by
+  another transition, is merged with the latter.
+The reduction is applied to a copy of the net, and a correspondence between the nodes of the reduced net and the
+nodes of the original net is returned.
+"""
+from pm4py.objects.petri import utils
+from pm4py.objects.petri.petrinet import PetriNet, Marking
+
+
+def __copy_net(net, initial_marking, final_marking):
+    """
+    Copies a Petri net along with its markings, returning the correspondence between the new and the old nodes
+    """
+    copy = PetriNet(net.name)
+    corr = {}
+    new_nodes = {}
+    for p in net.places:
+        new_nodes[p] = PetriNet.Place(p.name)
+        copy.places.add(new_nodes[p])
+        corr[new_nodes[p]] = [p]
+    for t in net.transitions:
+        new_nodes[t] = PetriNet.Transition(t.name, t.label)
+        copy.transitions.add(new_nodes[t])
+        corr[new_nodes[t]] = [t]
+    for a in net.arcs:
+        utils.add_arc_from_to(new_nodes[a.source], new_nodes[a.target], copy, weight=a.weight)
+    im = Marking({new_nodes[p]: initial_marking[p] for p in initial_marking})
+    fm = Marking({new_nodes[p]: final_marking[p] for p in final_marking})
+    return copy, im, fm, corr
+
+
+def __preset(node):
+    return {a.source: a.weight for a in node.in_arcs}
+
+
+def __postset(node):
+    return {a.target: a.weight for a in node.out_arcs}
+
+
+def __add_weight(source, target, net, weight):
+    """
+    Adds an arc from the source to the target, summing the weight to the one of the existing arc if there is one
+    """
+    for a in source.out_arcs:
+        if a.target is target:
+            weight = weight + a.weight
+            source.out_arcs.remove(a)
+            target.in_arcs.remove(a)
+            net.arcs.remove(a)
+            break
+    utils.add_arc_from_to(source, target, net, weight=weight)
+
+
+def remove_self_loop_transitions(net, initial_marking, final_marking, corr):
+    """
+    Removes the silent transitions that produce exactly the tokens they consume
+
+    Returns
+    -------------
+    changed
+        Boolean telling if the net has been modified
+    """
+    changed = False
+    for t in list(net.transitions):
+        if t.label is None and __preset(t) == __postset(t):
+            utils.remove_transition(net, t)
+            del corr[t]
+            changed = True
+    return changed
+
+
+def fuse_parallel_transitions(net, initial_marking, final_marking, corr):
+    """
+    Removes the silent transitions having the same input and output places (and weights) of another
+    silent transition
+
+    Returns
+    -------------
+    changed
+        Boolean telling if the net has been modified
+    """
+    changed = False
+    seen = {}
+    for t in sorted(net.transitions, key=lambda x: str(x.name)):
+        if t.label is None:
+            key = (frozenset(__preset(t).items()), frozenset(__postset(t).items()))
+            if key in seen:
+                utils.remove_transition(net, t)
+                del corr[t]
+                changed = True
+            else:
+                seen[key] = t
+    return changed
+
+
+def fuse_parallel_places(net, initial_marking, final_marking, corr):
+    """
+    Removes the redundant places, i.e. the places having the same input and output transitions (and weights),
+    and the same tokens in the initial and in the final marking, of another place
+
+    Returns
+    -------------
+    changed
+        Boolean telling if the net has been modified
+    """
+    changed = False
+    seen = {}
+    for p in sorted(net.places, key=lambda x: str(x.name)):
+        key = (frozenset(__preset(p).items()), frozenset(__postset(p).items()), initial_marking[p],
+               final_marking[p])
+        if key in seen:
+            corr[seen[key]].extend(corr.pop(p))
+            __remove_place(net, p, initial_marking, final_marking)
+            changed = True
+        else:
+            seen[key] = p
+    return changed
+
+
+def fuse_series_places(net, initial_marking, final_marking, corr):
+    """
+    Removes the silent transitions having a single input place p1 and a single output place p2 (different from p1),
+    where p1 has no other output transition and no token in the final marking: the input arcs (and the initial
+    tokens) of p1 are moved to p2, and p1 is removed
+
+    Returns
+    -------------
+    changed
+        Boolean telling if the net has been modified
+    """
+    changed = False
+    for t in sorted(net.transitions, key=lambda x: str(x.name)):
+        if t.label is not None or t not in net.transitions:
+            continue
+        pre, post = __preset(t), __postset(t)
+        if len(pre) != 1 or len(post) != 1:
+            continue
+        (p1, w1), = pre.items()
+        (p2, w2), = post.items()
+        if p1 is p2 or w1 != 1 or w2 != 1 or len(p1.out_arcs) != 1 or final_marking[p1] > 0:
+            continue
+        for a in list(p1.in_arcs):
+            __add_weight(a.source, p2, net, a.weight)
+        if initial_marking[p1] > 0:
+            initial_marking[p2] += initial_marking[p1]
+        utils.remove_transition(net, t)
+        del corr[t]
+        corr[p2].extend(corr.pop(p1))
+        __remove_place(net, p1, initial_marking, final_marking)
+        changed = True
+    return changed
+
+
+def fuse_series_transitions(net, initial_marking, final_marking, corr):
+    """
+    Merges a silent transition t2, whose only input place p is produced only by another transition t1 and consumed
+    only by t2, with t1: t1 produces the outputs of t2 in place of p, and p and t2 are removed (the merged transition
+    corresponds to the sequence of t1 and t2 in the original net)
+
+    Returns
+    -------------
+    changed
+        Boolean telling if the net has been modified
+    """
+    changed = False
+    for p in sorted(net.places, key=lambda x: str(x.name)):
+        if len(p.in_arcs) != 1 or len(p.out_arcs) != 1 or initial_marking[p] > 0 or final_marking[p] > 0:
+            continue
+        in_arc, = p.in_arcs
+        out_arc, = p.out_arcs
+        t1, t2 = in_arc.source, out_arc.target
+        if t1 is t2 or t2.label is not None or len(t2.in_arcs) != 1 or in_arc.weight != 1 or out_arc.weight != 1:
+            continue
+        for a in list(t2.out_arcs):
+            __add_weight(t1, a.target, net, a.weight)
+        utils.remove_transition(net, t2)
+        corr[t1].extend(corr.pop(t2))
+        __remove_place(net, p, initial_marking, final_marking)
+        changed = True
+    return changed
+
+
+def __remove_place(net, place, initial_marking, final_marking):
+    utils.remove_place(net, place)
+    if place in initial_marking:
+        del initial_marking[place]
+    if place in final_marking:
+        del final_marking[place]
+
+
+RULES = [remove_self_loop_transitions, fuse_parallel_transitions, fuse_parallel_places, fuse_series_places,
+         fuse_series_transitions]
+
+
+def apply(net, initial_marking, final_marking, parameters=None):
+    """
+    Reduces a Petri net applying the rules of the module until none of them applies
+
+    Parameters
+    -------------
+    net
+        Petri net
+    initial_marking
+        Initial marking
+    final_marking
+        Final marking
+    parameters
+        Parameters of the algorithm, including:
+            rules -> list of the rules to apply (default: RULES)
+
+    Returns
+    -------------
+    reduced_net
+        Reduced Petri net (a copy: the original net is not modified)
+    reduced_initial_marking
+        Initial marking of the reduced net
+    reduced_final_marking
+        Final marking of the reduced net
+    corr
+        Dictionary associating to each place and transition of the reduced net the list of the corresponding
+        nodes of the original net (for a transition, the sequence of original transitions that it fires;
+        for a place, the original places merged in it)
+    """
+    if parameters is None:
+        parameters = {}
+    rules = parameters["rules"] if "rules" in parameters else RULES
+    reduced_net, im, fm, corr = __copy_net(net, initial_marking, final_marking)
+    changed = True
+    while changed:
+        changed = False
+        for rule in rules:
+            changed = rule(reduced_net, im, fm, corr) or changed
+    return reduced_net, im, fm, corr
+
+
+def map_transitions(transitions, corr):
+    """
+    Maps a sequence of transitions of the reduced net (e.g. the activated transitions of a replay)
+    to the corresponding sequence of transitions of the original net
+
+    Parameters
+    -------------
+    transitions
+        Sequence of transitions of the reduced net
+    corr
+        Correspondence returned by apply
+
+    Returns
+    -------------
+    original_transitions
+        List of transitions of the original net
+    """
+    return [original for t in transitions for original in corr[t]]
@@ -79,7 +79,43 @@ def weak_execute(t, m):
     return m_out
 
 
-def enabled_transitions(pn, m):
+def get_consumers_index(pn):
+    """
+    Gets the index associating to each place of a Petri net the transitions of the net having the place in their
+    preset, along with the transitions having an empty preset (always enabled).
+    The index reflects the net at the time of the call: it is meant to be computed once by the algorithms firing
+    many transitions on a net that they do not modify, and passed to enabled_transitions and
+    enabled_transitions_after_firing
+
+    Parameters
+    ----------
+    :param pn: Petri net
+
+    Returns
+    -------
+    :return: consumers: dictionary place -> tuple of transitions having the place in their preset,
+    sources: tuple of transitions without input places
+    """
+    consumers = {}
+    sources = []
+    for t in pn.transitions:
+        if not t.in_arcs:
+            sources.append(t)
+        for a in t.in_arcs:
+            if a.source not in consumers:
+                consumers[a.source] = []
+            consumers[a.source].append(t)
+    return {p: tuple(consumers[p]) for p in consumers}, tuple(sources)
+
+
+def __is_enabled_in(t, m):
+    for a in t.in_arcs:
+        if m[a.source] < a.weight:
+            return False
+    return True
+
+
+def enabled_transitions(pn, m, consumers_index=None):
     """
     Returns a set of enabled transitions in a Petri net and given marking
 
@@ -87,13 +123,59 @@ def enabled_transitions(pn, m):
     ----------
     :param pn: Petri net
     :param m: marking of the pn
+    :param consumers_index: (optional) index of the consumers of the places of the net (see get_consumers_index);
+    if provided, only the transitions consuming from the marked places are checked
 
     Returns
     -------
     :return: set of enabled transitions
     """
-    enabled = set()
-    for t in pn.transitions:
-        if is_enabled(t, pn, m):
-            enabled.add(t)
+    if consumers_index is None:
+        enabled = set()
+        for t in pn.transitions:
+            if is_enabled(t, pn, m):
+                enabled.add(t)
+        return enabled
+    consumers, sources = consumers_index
+    enabled = set(sources)
+    for p in m:
+        if p in consumers:
+            for t in consumers[p]:
+                if t not in enabled and __is_enabled_in(t, m):
+                    enabled.add(t)
     return enabled
+
+
+def enabled_transitions_after_firing(pn, t, m, enabled, consumers_index=None):
+    """
+    Returns the set of enabled transitions after the firing of a transition, updating the set of the transitions
+    that were enabled before the firing: only the transitions consuming from the places whose tokens changed
+    are checked
+
+    Parameters
+    ----------
+    :param pn: Petri net
+    :param t: fired transition
+    :param m: marking reached after the firing
+    :param enabled: set of the transitions enabled before the firing
+    :param consumers_index: (optional) index of the consumers of the places of the net (see get_consumers_index),
+    computed from the net if not provided
+
+    Returns
+    -------
+    :return: set of enabled transitions
+    """
+    if consumers_index is None:
+        consumers_index = get_consumers_index(pn)
+    consumers, _ = consumers_index
+    affected = set()
+    for a in t.in_arcs:
+        affected.update(consumers[a.source])
+    for a in t.out_arcs:
+        if a.target in consumers:
+            affected.update(consumers[a.target])
+    new_enabled = {u for u in enabled if u not in affected}
+    for u in affected:
+        if __is_enabled_in(u, m):
+            new_enabled.add(u)
+    return new_enabled
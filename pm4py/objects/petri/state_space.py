@@ -0,0 +1,369 @@
+import multiprocessing
+
+from pm4py.objects.petri import net_cache
+from pm4py.objects.petri.petrinet import Marking
+from pm4py.objects.petri.reachability_graph import StateSpaceTooLargeException
+
+PARAM_MAX_WORKERS = "max_workers"
+PARAM_MAX_STATES = "max_states"
+PARAM_BOUND = "bound"
+
+PARAMETERS = [PARAM_MAX_WORKERS, PARAM_MAX_STATES, PARAM_BOUND]
+
+# maximum number of tokens in a place before the exploration is stopped (see BoundExceededException)
+DEFAULT_BOUND = 64
+
+
+class BoundExceededException(StateSpaceTooLargeException):
+    """
+    Raised when a place gets more tokens than the bound of the exploration, while no reachable marking has been found
+    to strictly cover the marking it is reached from (hence the net is not proved to be unbounded)
+    """
+
+
+def compile_net(net):
+    """
+    Compiles a Petri net into a picklable structure of place and transition indexes, that can be shipped to
+    the worker processes
+
+    Parameters
+    -------------
+    net
+        Petri net
+
+    Returns
+    -------------
+    places
+        List of places (the index of a place is its position)
+    transitions
+        List of transitions (the index of a transition is its position)
+    compiled
+        Tuple (pre, post, consumers, sources) where pre[t] and post[t] are the tuples of (place index, weight)
+        consumed and produced by the transition t, consumers[p] is the tuple of transitions having the place p
+        in their preset, and sources is the tuple of transitions with an empty preset
+    """
+    places = sorted(net.places, key=lambda x: str(x.name))
+    transitions = sorted(net.transitions, key=lambda x: (str(x.name), str(x.label)))
+    places_idx = {p: i for i, p in enumerate(places)}
+    pre = tuple(tuple((places_idx[a.source], a.weight) for a in t.in_arcs) for t in transitions)
+    post = tuple(tuple((places_idx[a.target], a.weight) for a in t.out_arcs) for t in transitions)
+    consumers = [[] for _ in places]
+    for i in range(len(transitions)):
+        for p, w in pre[i]:
+            consumers[p].append(i)
+    consumers = tuple(tuple(c) for c in consumers)
+    sources = tuple(i for i in range(len(transitions)) if not pre[i])
+    return places, transitions, (pre, post, consumers, sources)
+
+
+def encode_marking(marking, places):
+    """
+    Encodes a marking as a sorted tuple of (place index, tokens) couples, whose hash is the same in all the processes
+
+    Parameters
+    -------------
+    marking
+        Marking
+    places
+        List of places (see compile_net)
+
+    Returns
+    -------------
+    encoded_marking
+        Encoded marking
+    """
+    places_idx = {p: i for i, p in enumerate(places)}
+    return tuple(sorted((places_idx[p], marking[p]) for p in marking if marking[p] > 0))
+
+
+def get_owner(encoded_marking, no_partitions):
+    """
+    Gets the partition owning an encoded marking
+    """
+    return hash(encoded_marking) % no_partitions
+
+
+class Partition(object):
+    """
+    Part of the state space owned by a worker: the markings whose hash falls in the partition, with their
+    predecessors
+    """
+
+    def __init__(self, compiled, final_marking, no_partitions, bound):
+        self.pre, self.post, self.consumers, self.sources = compiled
+        self.final_marking = final_marking
+        self.final_dict = dict(final_marking)
+        self.no_partitions = no_partitions
+        self.bound = bound
+        self.predecessors = {}
+        self.co_reachable = set()
+        self.fired = set()
+        self.deadlocks = []
+        self.improper = []
+        self.unbounded = None
+        self.bound_exceeded = None
+
+    def enabled(self, marking_dict):
+        candidates = set(self.sources)
+        for p in marking_dict:
+            candidates.update(self.consumers[p])
+        return [t for t in candidates if all(marking_dict.get(p, 0) >= w for p, w in self.pre[t])]
+
+    def fire(self, t, marking_dict):
+        m_out = dict(marking_dict)
+        for p, w in self.pre[t]:
+            m_out[p] -= w
+            if m_out[p] == 0:
+                del m_out[p]
+        for p, w in self.post[t]:
+            m_out[p] = m_out.get(p, 0) + w
+        return m_out
+
+    def expand(self, batch):
+        """
+        Adds a batch of (marking, predecessor) couples to the partition, and expands the markings that were not
+        visited before
+
+        Returns
+        -------------
+        outboxes
+            For each partition, the list of (successor, marking) couples that it owns
+        no_states
+            Number of new markings
+        """
+        outboxes = [[] for _ in range(self.no_partitions)]
+        no_states = 0
+        for marking, predecessor in batch:
+            if marking in self.predecessors:
+                if predecessor is not None:
+                    self.predecessors[marking].add(predecessor)
+                continue
+            self.predecessors[marking] = {predecessor} if predecessor is not None else set()
+            no_states += 1
+            marking_dict = dict(marking)
+            if marking != self.final_marking and all(marking_dict.get(p, 0) >= w for p, w in self.final_dict.items()):
+                self.improper.append(marking)
+            enabled = self.enabled(marking_dict)
+            if not enabled and marking != self.final_marking:
+                self.deadlocks.append(marking)
+            for t in enabled:
+                self.fired.add(t)
+                next_dict = self.fire(t, marking_dict)
+                next_marking = tuple(sorted(next_dict.items()))
+                if self.unbounded is None and next_marking != marking and all(
+                        next_dict.get(p, 0) >= c for p, c in marking):
+                    # the transition can be fired indefinitely (the successor strictly covers the marking)
+                    self.unbounded = next_marking
+                elif self.bound_exceeded is None and max(next_dict.values(), default=0) > self.bound:
+                    self.bound_exceeded = next_marking
+                outboxes[get_owner(next_marking, self.no_partitions)].append((next_marking, marking))
+        return outboxes, no_states
+
+    def propagate_back(self, batch):
+        """
+        Marks as co-reachable (i.e. the final marking is reachable from them) the markings of the batch,
+        and returns the predecessors to visit, grouped by partition
+        """
+        outboxes = [[] for _ in range(self.no_partitions)]
+        for marking in batch:
+            if marking in self.co_reachable or marking not in self.predecessors:
+                continue
+            self.co_reachable.add(marking)
+            for predecessor in self.predecessors[marking]:
+                outboxes[get_owner(predecessor, self.no_partitions)].append(predecessor)
+        return outboxes
+
+    def summary(self):
+        return {"states": len(self.predecessors), "co_reachable": len(self.co_reachable), "fired": self.fired,
+                "deadlocks": self.deadlocks, "improper": self.improper}
+
+
+def __serve_partition(conn, compiled, final_marking, no_partitions, bound):
+    """
+    Loop of a worker process owning a partition of the state space
+    """
+    partition = Partition(compiled, final_marking, no_partitions, bound)
+    while True:
+        command, batch = conn.recv()
+        if command == "expand":
+            conn.send(partition.expand(batch) + (partition.unbounded, partition.bound_exceeded))
+        elif command == "back":
+            conn.send(partition.propagate_back(batch))
+        elif command == "summary":
+            conn.send(partition.summary())
+        else:
+            break
+    conn.close()
+
+
+class LocalPartition(object):
+    """
+    Partition explored in the current process (used when a single worker is requested)
+    """
+
+    def __init__(self, partition):
+        self.partition = partition
+        self.result = None
+
+    def send(self, message):
+        command, batch = message
+        if command == "expand":
+            self.result = self.partition.expand(batch) + (self.partition.unbounded, self.partition.bound_exceeded)
+        elif command == "back":
+            self.result = self.partition.propagate_back(batch)
+        elif command == "summary":
+            self.result = self.partition.summary()
+
+    def recv(self):
+        return self.result
+
+
+def __exchange(partitions, command, inboxes):
+    """
+    Sends to each partition its batch, and collects the answers (the partitions work concurrently)
+    """
+    for conn, batch in zip(partitions, inboxes):
+        conn.send((command, batch))
+    return [conn.recv() for conn in partitions]
+
+
+def explore(net, initial_marking, final_marking, parameters=None):
+    """
+    Explores the state space of a Petri net, partitioning the markings between worker processes according to
+    their hash. The exploration proceeds in rounds: in each round every worker expands the new markings
+    it owns, and the successors are exchanged in batches between the workers.
+    Then, the markings from which the final marking is reachable are found going backwards in the same way.
+
+    Parameters
+    -------------
+    net
+        Petri net
+    initial_marking
+        Initial marking
+    final_marking
+        Final marking
+    parameters
+        Parameters of the algorithm, including:
+            max_workers -> number of worker processes (default: 1, i.e. the state space is explored in the current
+            process)
+            max_states -> maximum number of states (if the state space is larger, a StateSpaceTooLargeException
+            is raised)
+            bound -> maximum number of tokens in a place (if a place gets more tokens before the net is proved to be
+            unbounded, a BoundExceededException is raised; default: DEFAULT_BOUND)
+
+    Returns
+    -------------
+    result
+        Dictionary containing:
+            bounded -> the net is bounded, i.e. no reachable marking strictly covers the marking it is reached from
+            (if not, the exploration is stopped and the other checks are not done)
+            states -> number of reachable markings
+            deadlocks -> reachable markings (different from the final marking) without enabled transitions
+            option_to_complete -> the final marking is reachable from every reachable marking
+            proper_completion -> no reachable marking strictly covers the final marking
+            dead_transitions -> transitions that are not enabled in any reachable marking
+            sound -> the net is bounded, has the option to complete, proper completion and no dead transitions
+        The result is kept in the cache of pm4py.objects.petri.net_cache
+    """
+    if parameters is None:
+        parameters = {}
+    max_workers = parameters[PARAM_MAX_WORKERS] if PARAM_MAX_WORKERS in parameters else 1
+    max_states = parameters[PARAM_MAX_STATES] if PARAM_MAX_STATES in parameters else None
+    bound = parameters[PARAM_BOUND] if PARAM_BOUND in parameters else DEFAULT_BOUND
+
+    return net_cache.get(net, initial_marking, final_marking, ("state_space", bound),
+                         lambda: __explore(net, initial_marking, final_marking, max_workers, max_states, bound),
+                         bound_to_net=True)
+
+
+def __explore(net, initial_marking, final_marking, max_workers, max_states, bound):
+    """
+    Explores the state space of a Petri net (see explore)
+    """
+    places, transitions, compiled = compile_net(net)
+    im = encode_marking(initial_marking, places)
+    fm = encode_marking(final_marking, places)
+    no_partitions = max(1, max_workers)
+    processes = []
+    if no_partitions == 1:
+        partitions = [LocalPartition(Partition(compiled, fm, 1, bound))]
+    else:
+        partitions = []
+        for i in range(no_partitions):
+            parent_conn, child_conn = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=__serve_partition,
+                                              args=(child_conn, compiled, fm, no_partitions, bound))
+            process.daemon = True
+            process.start()
+            partitions.append(parent_conn)
+            processes.append(process)
+    try:
+        result = __explore_partitions(partitions, no_partitions, im, fm, max_states)
+    finally:
+        if processes:
+            for conn in partitions:
+                conn.send(("stop", None))
+        for process in processes:
+            process.join()
+    fired = result.pop("fired")
+    result["dead_transitions"] = {transitions[i] for i in range(len(transitions)) if i not in fired}
+    result["deadlocks"] = [__decode_marking(m, places) for m in result["deadlocks"]]
+    result["sound"] = result["bounded"] and result["option_to_complete"] and result["proper_completion"] and \
+                      not result["dead_transitions"]
+    return result
+
+
+def __decode_marking(encoded_marking, places):
+    """
+    Decodes an encoded marking (see encode_marking)
+    """
+    marking = Marking()
+    for p, c in encoded_marking:
+        marking[places[p]] = c
+    return marking
+
+
+def __explore_partitions(partitions, no_partitions, im, fm, max_states):
+    """
+    Coordinates the exploration of the state space by the partitions
+    """
+    inboxes = [[] for _ in range(no_partitions)]
+    inboxes[get_owner(im, no_partitions)].append((im, None))
+    no_states = 0
+    unbounded = None
+    bound_exceeded = None
+    while any(inboxes) and unbounded is None and bound_exceeded is None:
+        answers = __exchange(partitions, "expand", inboxes)
+        inboxes = [[] for _ in range(no_partitions)]
+        for outboxes, new_states, partition_unbounded, partition_bound_exceeded in answers:
+            no_states += new_states
+            unbounded = unbounded if partition_unbounded is None else partition_unbounded
+            bound_exceeded = bound_exceeded if partition_bound_exceeded is None else partition_bound_exceeded
+            for i in range(no_partitions):
+                inboxes[i].extend(outboxes[i])
+        if max_states is not None and no_states > max_states:
+            raise StateSpaceTooLargeException("the state space has more than " + str(max_states) + " states")
+
+    if unbounded is not None:
+        return {"bounded": False, "states": no_states, "deadlocks": [], "option_to_complete": False,
+                "proper_completion": False, "fired": set()}
+    if bound_exceeded is not None:
+        raise BoundExceededException("a place of the net gets more tokens than the bound of the exploration")
+
+    inboxes = [[] for _ in range(no_partitions)]
+    inboxes[get_owner(fm, no_partitions)].append(fm)
+    while any(inboxes):
+        answers = __exchange(partitions, "back", inboxes)
+        inboxes = [[] for _ in range(no_partitions)]
+        for outboxes in answers:
+            for i in range(no_partitions):
+                inboxes[i].extend(outboxes[i])
+
+    summaries = __exchange(partitions, "summary", [None] * no_partitions)
+    fired = set()
+    for summary in summaries:
+        fired.update(summary["fired"])
+    return {"bounded": True, "states": sum(s["states"] for s in summaries),
+            "deadlocks": [m for s in summaries for m in s["deadlocks"]],
+            "option_to_complete": sum(s["co_reachable"] for s in summaries) == sum(s["states"] for s in summaries),
+            "proper_completion": not any(s["improper"] for s in summaries), "fired": fired}
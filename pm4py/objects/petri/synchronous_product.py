@@ -1,4 +1,5 @@
 from pm4py.objects import petri
+from pm4py.objects.petri import incidence_matrix
 
 
 def construct(pn1, im1, fm1, pn2, im2, fm2, skip):
@@ -110,6 +111,155 @@ def construct_cost_aware(pn1, im1, fm1, pn2, im2, fm2, skip, pn1_costs, pn2_cost
     return sync_net, sync_im, sync_fm, costs
 
 
+class SynchronousProductTemplate(object):
+    """
+    Precompiled model part of the synchronous product net between a (trace) net and a model.
+    The places, the transitions, the arcs and the incidence columns of the model part are created once;
+    for each trace, only the trace part and the synchronous transitions are added.
+    A template is not thread-safe: the arcs of the synchronous transitions are attached to the places of the model
+    part, shared by the synchronous product nets, until the template is released. Hence, a template shall be used
+    by a single thread at a time
+    """
+
+    def __init__(self, model_net, model_im, model_fm, skip, model_costs, sync_costs, model_part, t_map, p_map):
+        """
+        Constructor (use construct_template)
+
+        Parameters
+        ----------
+        :param model_net: Petri net of the model
+        :param model_im: Initial marking of the model
+        :param model_fm: Final marking of the model
+        :param skip: Symbol to be used as skip
+        :param model_costs: dictionary mapping transitions of the model to the cost of the corresponding model moves
+        :param sync_costs: dictionary mapping visible transitions of the model to the cost of the corresponding
+        synchronous moves
+        :param model_part: Petri net containing the model part of the synchronous product
+        :param t_map: dictionary mapping transitions of the model to transitions of the model part
+        :param p_map: dictionary mapping places of the model to places of the model part
+        """
+        self.model_name = model_net.name
+        self.skip = skip
+        self.model_part = model_part
+        self.t_map = t_map
+        self.p_map = p_map
+        self.im = petri.petrinet.Marking({self.p_map[p]: model_im[p] for p in model_im})
+        self.fm = petri.petrinet.Marking({self.p_map[p]: model_fm[p] for p in model_fm})
+        self.costs = {self.t_map[t]: model_costs[t] for t in model_net.transitions}
+        self.sync_costs = sync_costs
+        self.label_map = {}
+        for t in model_net.transitions:
+            if t.label is not None:
+                if t.label not in self.label_map:
+                    self.label_map[t.label] = []
+                self.label_map[t.label].append(t)
+        self.incidence_columns = {t: incidence_matrix.get_column(t) for t in self.model_part.transitions}
+        # arcs between the model part and the synchronous transitions of the last trace
+        self.model_out_arcs = []
+        self.model_in_arcs = []
+        # index of the event explained by each log move and synchronous transition of the last trace
+        self.event_indexes = {}
+        # number of events explained when each place of the trace part of the last trace holds the token
+        self.trace_place_indexes = {}
+
+    def construct(self, activities, trace_costs, trace_name=' '):
+        """
+        Constructs the synchronous product net between the trace net of a sequence of activities and the model.
+        The places and the transitions of the model part are shared between the synchronous product nets
+        obtained by the template: the arcs connecting them to the synchronous transitions are removed
+        when the next synchronous product net is constructed (or when release is called).
+        The events explained by the transitions and the places of the trace part are kept in the attributes
+        event_indexes and trace_place_indexes of the template, until then
+
+        Parameters
+        ----------
+        :param activities: list of activities of the trace
+        :param trace_costs: list of costs of the log moves, length should be equal to the length of the trace
+        :param trace_name: name of the trace
+
+        Returns
+        -------
+        :return: Synchronous product net, initial marking, final marking and cost function
+        """
+        self.release()
+        skip = self.skip
+        sync_net = petri.petrinet.PetriNet('synchronous_product_net of trace net of %s and %s' % (
+            trace_name, self.model_name), places=set(self.model_part.places),
+                                           transitions=set(self.model_part.transitions),
+                                           arcs=set(self.model_part.arcs))
+        costs = dict(self.costs)
+
+        trace_places = [petri.petrinet.PetriNet.Place(('p_0', skip))]
+        sync_net.places.add(trace_places[0])
+        self.trace_place_indexes[trace_places[0]] = 0
+        for i in range(len(activities)):
+            t = petri.petrinet.PetriNet.Transition(('t' + str(i), skip), (activities[i], skip))
+            sync_net.transitions.add(t)
+            costs[t] = trace_costs[i]
+            self.event_indexes[t] = i
+            trace_places.append(petri.petrinet.PetriNet.Place(('p_' + str(i + 1), skip)))
+            sync_net.places.add(trace_places[i + 1])
+            self.trace_place_indexes[trace_places[i + 1]] = i + 1
+            petri.utils.add_arc_from_to(trace_places[i], t, sync_net)
+            petri.utils.add_arc_from_to(t, trace_places[i + 1], sync_net)
+            if activities[i] in self.label_map:
+                for t_model in self.label_map[activities[i]]:
+                    sync = petri.petrinet.PetriNet.Transition(('t' + str(i), t_model.name),
+                                                              (activities[i], t_model.label))
+                    sync_net.transitions.add(sync)
+                    costs[sync] = self.sync_costs[t_model]
+                    self.event_indexes[sync] = i
+                    petri.utils.add_arc_from_to(trace_places[i], sync, sync_net)
+                    petri.utils.add_arc_from_to(sync, trace_places[i + 1], sync_net)
+                    for a in t_model.in_arcs:
+                        self.model_out_arcs.append(petri.utils.add_arc_from_to(self.p_map[a.source], sync, sync_net))
+                    for a in t_model.out_arcs:
+                        self.model_in_arcs.append(petri.utils.add_arc_from_to(sync, self.p_map[a.target], sync_net))
+
+        sync_im = petri.petrinet.Marking(self.im)
+        sync_im[trace_places[0]] = 1
+        sync_fm = petri.petrinet.Marking(self.fm)
+        sync_fm[trace_places[-1]] = 1
+
+        return sync_net, sync_im, sync_fm, costs
+
+    def release(self):
+        """
+        Removes the arcs connecting the model part to the synchronous transitions of the last constructed
+        synchronous product net
+        """
+        for a in self.model_out_arcs:
+            a.source.out_arcs.discard(a)
+        for a in self.model_in_arcs:
+            a.target.in_arcs.discard(a)
+        self.model_out_arcs = []
+        self.model_in_arcs = []
+        self.event_indexes = {}
+        self.trace_place_indexes = {}
+
+
+def construct_template(pn, im, fm, skip, pn_costs, sync_costs):
+    """
+    Constructs the template of the synchronous product nets between trace nets and a given model, which can be used
+    to construct the synchronous product net of each trace without copying again the model
+
+    :param pn: Petri net of the model
+    :param im: Initial marking of the model
+    :param fm: Final marking of the model
+    :param skip: Symbol to be used as skip
+    :param pn_costs: dictionary mapping transitions of the model to the cost of the corresponding model moves
+    :param sync_costs: dictionary mapping visible transitions of the model to the cost of the corresponding
+    synchronous moves
+
+    Returns
+    -------
+    :return: Template of the synchronous product nets
+    """
+    model_part = petri.petrinet.PetriNet('model part of the synchronous product nets of %s' % pn.name)
+    t_map, p_map = __copy_into(pn, model_part, False, skip)
+    return SynchronousProductTemplate(pn, im, fm, skip, pn_costs, sync_costs, model_part, t_map, p_map)
+
+
 def __copy_into(source_net, target_net, upper, skip):
     t_map = {}
     p_map = {}
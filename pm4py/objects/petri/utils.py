@@ -1,10 +1,26 @@
+from collections import deque
+
 import networkx as nx
 
 from pm4py.objects import petri
 from pm4py.objects.log.util import xes as xes_util
+from pm4py.objects.petri import net_cache
 from pm4py.objects.petri.networkx_graph import create_networkx_directed_graph
 
 
+def invalidate_caches(net):
+    """
+    Invalidates the structures memoised on a Petri net (the fingerprint used by the cache of
+    pm4py.objects.petri.net_cache), after the net has been modified
+
+    Parameters
+    ----------
+    net
+        Petri net
+    """
+    net_cache.invalidate(net)
+
+
 def remove_transition(net, trans):
     """
     Remove a transition from a Petri net
@@ -33,6 +49,7 @@ def remove_transition(net, trans):
             place.in_arcs.remove(arc)
             net.arcs.remove(arc)
         net.transitions.remove(trans)
+        invalidate_caches(net)
     return net
 
 
@@ -64,6 +81,7 @@ def remove_place(net, place):
             trans.in_arcs.remove(arc)
             net.arcs.remove(arc)
         net.places.remove(place)
+        invalidate_caches(net)
     return net
 
 
@@ -86,6 +104,7 @@ def add_arc_from_to(fr, to, net, weight=1):
     net.arcs.add(a)
     fr.out_arcs.add(a)
     to.in_arcs.add(a)
+    invalidate_caches(net)
 
     return a
 
@@ -152,46 +171,69 @@ def construct_trace_net_cost_aware(trace, costs, trace_name_key=xes_util.DEFAULT
     return net, petri.petrinet.Marking({place_map[0]: 1}), petri.petrinet.Marking({place_map[len(trace)]: 1}), cost_map
 
 
-def variants(net, initial_marking, final_marking):
+def variants(net, initial_marking, final_marking, count_only=False):
     """
     Given an acyclic workflow net, initial and final marking extracts a set of variants (list of event)
     replayable on the net.
+    The markings reachable from the initial marking are visited (depth-first) only once, associating to each of them
+    the set of the suffixes (sequences of transitions) leading from it to the final marking, so the work is
+    proportional to the number of reachable markings and to the size of the sets, instead of to the number of
+    firing sequences (that grows exponentially with the concurrency in the net)
 
     Parameters
     ----------
     net: An acyclic workflow net
     initial_marking: The initial marking of the net.
     final_marking: The final marking of the net.
+    count_only: If True, only the number of firing sequences leading from the initial marking to the final marking
+        is computed (without building them); this is the number of variants unless some sequences are equal
+        because of transitions having the same label
 
     Returns
     -------
-    variants: :class:`list` List of variants replayable in the net.
+    variants: :class:`list` List of variants replayable in the net (or their number, if count_only is True).
 
     """
-    active = [(initial_marking, [])]
-    visited = []
-    this_variants = []
-    for i in range(10000000):
-        if not active:
-            break
-        curr_couple = active.pop(0)
-        en_tr = petri.semantics.enabled_transitions(net, curr_couple[0])
-        for t in en_tr:
-            next_activitylist = list(curr_couple[1])
-            next_activitylist.append(repr(t))
-            next_couple = (petri.semantics.execute(t, net, curr_couple[0]), next_activitylist)
-            if hash(next_couple[0]) == hash(final_marking):
-                this_variants.append(next_couple[1])
+    # number (or set) of suffixes for the markings whose visit is complete
+    suffixes = {}
+    # successors of the markings on the current path of the visit
+    successors = {}
+    stack = deque()
+    # the net is not modified during the visit
+    consumers_index = petri.semantics.get_consumers_index(net)
+
+    def visit(marking):
+        # returns True if the marking has been pushed on the stack, False if its suffixes are already known
+        if marking == final_marking:
+            suffixes[marking] = 1 if count_only else frozenset([()])
+            return False
+        successors[marking] = [(repr(t), petri.semantics.execute(t, net, marking)) for t in
+                               petri.semantics.enabled_transitions(net, marking, consumers_index=consumers_index)]
+        stack.append((marking, iter(successors[marking])))
+        return True
+
+    if not visit(initial_marking):
+        return suffixes[initial_marking] if count_only else [[]]
+    while stack:
+        marking, to_visit = stack[-1]
+        pushed = False
+        for activity, next_marking in to_visit:
+            if next_marking in successors:
+                raise Exception("the net is not acyclic")
+            if next_marking not in suffixes and visit(next_marking):
+                pushed = True
+                break
+        if not pushed:
+            stack.pop()
+            if count_only:
+                suffixes[marking] = sum(suffixes[next_marking] for activity, next_marking in successors[marking])
             else:
-                # If the next marking hash is not in visited, if the next marking+partial trace itself is
-                # not already in active and if the next marking+partial trace is different from the
-                # current one+partial trace
-                if hash(next_couple[0]) not in visited and next((mark for mark in active if hash(mark[0]) == hash(
-                        next_couple[0] and mark[1] == next_couple[1])), None) is None and (
-                        hash(curr_couple[0]) != hash(next_couple[0]) or curr_couple[1] != next_couple[1]):
-                    active.append(next_couple)
-        visited.append(hash(curr_couple[0]))
-    return this_variants
+                suffixes[marking] = frozenset((activity,) + suffix for activity, next_marking in successors[marking]
+                                              for suffix in suffixes[next_marking])
+            del successors[marking]
+    if count_only:
+        return suffixes[initial_marking]
+    return [list(variant) for variant in sorted(suffixes[initial_marking], key=lambda x: (len(x), x))]
 
 
 def get_transition_by_name(net, transition_name):
@@ -216,6 +258,31 @@ def get_transition_by_name(net, transition_name):
     return None
 
 
+def get_net_fingerprint(net, initial_marking=None, final_marking=None, memoised=True):
+    """
+    Gets a fingerprint of a Petri net (and, optionally, of its initial and final marking), that is stable between
+    different executions and different processes, and changes when the places, the transitions (names and labels),
+    the arcs (and their weights) or the markings change (see pm4py.objects.petri.net_cache.get_fingerprint)
+
+    Parameters
+    ------------
+    net
+        Petri net
+    initial_marking
+        Initial marking
+    final_marking
+        Final marking
+    memoised
+        If False, the fingerprint is computed from scratch
+
+    Returns
+    ------------
+    fingerprint
+        Hexadecimal string
+    """
+    return net_cache.get_fingerprint(net, initial_marking, final_marking, memoised=memoised)
+
+
 def get_cycles_petri_net_places(net):
     """
     Get the cycles of a Petri net (returning only list of places belonging to the cycle)
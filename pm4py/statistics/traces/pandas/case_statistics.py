@@ -129,7 +129,7 @@ def get_variants_df(df, parameters=None):
     activity_key = parameters[
         PARAMETER_CONSTANT_ACTIVITY_KEY] if PARAMETER_CONSTANT_ACTIVITY_KEY in parameters else xes.DEFAULT_NAME_KEY
 
-    return df.groupby(case_id_glue)[activity_key].agg({'variant': lambda col: ','.join(col)})
+    return df.groupby(case_id_glue)[activity_key].agg(','.join).to_frame('variant')
 
 
 def get_events(df, case_id, parameters=None):
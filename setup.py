@@ -32,7 +32,10 @@ setup(
               'pm4py.algo.filtering.tracelog.auto_filter', 'pm4py.algo.filtering.tracelog.end_activities',
               'pm4py.algo.filtering.tracelog.start_activities', 'pm4py.algo.conformance',
               'pm4py.algo.conformance.alignments', 'pm4py.algo.conformance.alignments.versions',
-              'pm4py.algo.conformance.tokenreplay', 'pm4py.algo.conformance.tokenreplay.versions', 'pm4py.util',
+              'pm4py.algo.conformance.alignments.adapters', 'pm4py.algo.conformance.alignments.adapters.pandas',
+              'pm4py.algo.conformance.tokenreplay', 'pm4py.algo.conformance.tokenreplay.versions',
+              'pm4py.algo.conformance.tokenreplay.adapters', 'pm4py.algo.conformance.tokenreplay.adapters.pandas',
+              'pm4py.util',
               'pm4py.objects', 'pm4py.objects.log', 'pm4py.objects.log.util', 'pm4py.objects.log.adapters',
               'pm4py.objects.log.adapters.pandas', 'pm4py.objects.log.exporter', 'pm4py.objects.log.exporter.csv',
               'pm4py.objects.log.exporter.csv.versions', 'pm4py.objects.log.exporter.xes',
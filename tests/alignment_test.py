@@ -1,10 +1,18 @@
 import os
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 
+from pm4py.algo.conformance.alignments import factory as align_factory
+from pm4py.algo.conformance.alignments.adapters.pandas import df_alignments
+from pm4py.algo.conformance.alignments.versions import decomposed_state_equation_a_star
 from pm4py.algo.conformance.alignments.versions import state_equation_a_star
 from pm4py.algo.discovery.alpha import factory as alpha_factory
 from pm4py.algo.discovery.inductive.versions.dfg import dfg_only
+from pm4py.algo.filtering.tracelog.variants import variants_filter
+from pm4py.evaluation.replay_fitness.versions import alignment_based
 from pm4py.objects import petri
+from pm4py.objects.log.adapters.pandas import csv_import_adapter
+from pm4py.objects.log import log as log_instance
 from pm4py.objects.log.importer.xes import factory as xes_importer
 from tests.constants import INPUT_DATA_DIR
 
@@ -44,6 +52,167 @@ class AlignmentTest(unittest.TestCase):
             if not is_fit:
                 raise Exception("should be fit")
 
+    def test_alignment_parallel(self):
+        # to avoid static method warnings in tests,
+        # that by construction of the unittest package have to be expressed in such way
+        self.dummy_variable = "dummy_value"
+        trace_log = xes_importer.import_log(os.path.join(INPUT_DATA_DIR, "running-example.xes"))
+        net, marking, final_marking = alpha_factory.apply(trace_log)
+        sequential = align_factory.apply_log(trace_log, net, marking, final_marking)
+        parallel = align_factory.apply_log(trace_log, net, marking, final_marking,
+                                           parameters={align_factory.PARAM_PARALLEL: True,
+                                                       align_factory.PARAM_MAX_WORKERS: 2,
+                                                       align_factory.PARAM_CHUNK_SIZE: 1})
+        self.assertEqual([x["cost"] for x in sequential], [x["cost"] for x in parallel])
+        self.assertEqual([x["fitness"] for x in sequential], [x["fitness"] for x in parallel])
+
+    def test_alignment_cache(self):
+        # to avoid static method warnings in tests,
+        # that by construction of the unittest package have to be expressed in such way
+        self.dummy_variable = "dummy_value"
+        trace_log = xes_importer.import_log(os.path.join(INPUT_DATA_DIR, "running-example.xes"))
+        net, marking, final_marking = alpha_factory.apply(trace_log)
+        cache = {}
+        first = align_factory.apply_log(trace_log, net, marking, final_marking,
+                                        parameters={align_factory.PARAM_ALIGNMENTS_CACHE: cache})
+        self.assertTrue(len(cache) > 0)
+        second = align_factory.apply_log(trace_log, net, marking, final_marking,
+                                         parameters={align_factory.PARAM_ALIGNMENTS_CACHE: cache})
+        self.assertEqual(first, second)
+
+    def test_alignment_lp_solvers(self):
+        # to avoid static method warnings in tests,
+        # that by construction of the unittest package have to be expressed in such way
+        self.dummy_variable = "dummy_value"
+        trace_log = xes_importer.import_log(os.path.join(INPUT_DATA_DIR, "running-example.xes"))
+        net, marking, final_marking = dfg_only.apply(trace_log, None)
+        for trace in trace_log:
+            glpk_result = state_equation_a_star.apply(trace, net, marking, final_marking, parameters={
+                state_equation_a_star.PARAM_LP_SOLVER: state_equation_a_star.LP_SOLVER_CVXOPT_GLPK})
+            highs_result = state_equation_a_star.apply(trace, net, marking, final_marking, parameters={
+                state_equation_a_star.PARAM_LP_SOLVER: state_equation_a_star.LP_SOLVER_SCIPY_HIGHS})
+            self.assertEqual(glpk_result["cost"], highs_result["cost"])
+            self.assertTrue(glpk_result["lp_solved"] > 0)
+
+    def test_alignment_budget(self):
+        # to avoid static method warnings in tests,
+        # that by construction of the unittest package have to be expressed in such way
+        self.dummy_variable = "dummy_value"
+        trace_log = xes_importer.import_log(os.path.join(INPUT_DATA_DIR, "running-example.xes"))
+        net, marking, final_marking = alpha_factory.apply(trace_log)
+        alignments = align_factory.apply_log(trace_log, net, marking, final_marking,
+                                             parameters={state_equation_a_star.PARAM_MAX_VISITED_STATES: 2})
+        for align in alignments:
+            self.assertTrue(align["partial"])
+            self.assertEqual(align["budget_exceeded"], state_equation_a_star.BUDGET_MAX_VISITED_STATES)
+            self.assertTrue(align["cost"] >= 0)
+            self.assertIsNone(align["fitness"])
+        self.assertEqual(alignment_based.evaluate(alignments)["percFitTraces"], 0.0)
+
+    def test_alignment_threads(self):
+        # to avoid static method warnings in tests,
+        # that by construction of the unittest package have to be expressed in such way
+        self.dummy_variable = "dummy_value"
+        trace_log = xes_importer.import_log(os.path.join(INPUT_DATA_DIR, "running-example.xes"))
+        net, marking, final_marking = alpha_factory.apply(trace_log)
+        model_costs = {t: 1 for t in net.transitions}
+        sync_costs = {t: 0 for t in net.transitions if t.label is not None}
+        # the templates of the synchronous product are not shared between threads
+        template = state_equation_a_star.get_sync_product_template(net, marking, final_marking, model_costs,
+                                                                   sync_costs)
+        self.assertIs(state_equation_a_star.get_sync_product_template(net, marking, final_marking, model_costs,
+                                                                      sync_costs), template)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            thread_template = executor.submit(state_equation_a_star.get_sync_product_template, net, marking,
+                                              final_marking, model_costs, sync_costs).result()
+        self.assertIsNot(thread_template, template)
+
+    def test_alignment_reachability_graph(self):
+        # to avoid static method warnings in tests,
+        # that by construction of the unittest package have to be expressed in such way
+        self.dummy_variable = "dummy_value"
+        trace_log = xes_importer.import_log(os.path.join(INPUT_DATA_DIR, "running-example.xes"))
+        net, marking, final_marking = dfg_only.apply(trace_log, None)
+        self.assertEqual(align_factory.get_version(net, marking, final_marking),
+                         align_factory.VERSION_REACHABILITY_GRAPH_DIJKSTRA)
+        automaton_alignments = align_factory.apply_log(
+            trace_log, net, marking, final_marking, version=align_factory.VERSION_REACHABILITY_GRAPH_DIJKSTRA)
+        a_star_alignments = align_factory.apply_log(trace_log, net, marking, final_marking,
+                                                    version=align_factory.VERSION_STATE_EQUATION_A_STAR)
+        self.assertEqual([x["cost"] for x in automaton_alignments], [x["cost"] for x in a_star_alignments])
+
+    def test_alignment_extended_marking_equation(self):
+        # to avoid static method warnings in tests,
+        # that by construction of the unittest package have to be expressed in such way
+        self.dummy_variable = "dummy_value"
+        trace_log = xes_importer.import_log(os.path.join(INPUT_DATA_DIR, "running-example.xes"))
+        net, marking, final_marking = dfg_only.apply(trace_log, None)
+        extended_alignments = align_factory.apply_log(
+            trace_log, net, marking, final_marking, version=align_factory.VERSION_EXTENDED_MARKING_EQUATION_A_STAR)
+        a_star_alignments = align_factory.apply_log(trace_log, net, marking, final_marking,
+                                                    version=align_factory.VERSION_STATE_EQUATION_A_STAR)
+        self.assertEqual([x["cost"] for x in extended_alignments], [x["cost"] for x in a_star_alignments])
+        for align in extended_alignments:
+            self.assertTrue(0 <= align["restarted_visited_states"] <= align["visited_states"])
+
+    def test_alignment_decomposed(self):
+        # to avoid static method warnings in tests,
+        # that by construction of the unittest package have to be expressed in such way
+        self.dummy_variable = "dummy_value"
+        trace_log = xes_importer.import_log(os.path.join(INPUT_DATA_DIR, "running-example.xes"))
+        net, marking, final_marking = alpha_factory.apply(trace_log)
+        self.assertTrue(len(petri.decomposition.decompose(net, marking, final_marking)) > 1)
+        decomposed_alignments = align_factory.apply_log(
+            trace_log, net, marking, final_marking, version=align_factory.VERSION_DECOMPOSED_STATE_EQUATION_A_STAR)
+        a_star_alignments = align_factory.apply_log(trace_log, net, marking, final_marking,
+                                                    version=align_factory.VERSION_STATE_EQUATION_A_STAR)
+        for decomposed, a_star in zip(decomposed_alignments, a_star_alignments):
+            self.assertTrue(decomposed["cost"] <= a_star["cost"])
+            self.assertEqual(decomposed["cost"] == 0, a_star["cost"] == 0)
+        parallel_alignments = decomposed_state_equation_a_star.apply_log(
+            trace_log, net, marking, final_marking, parameters={decomposed_state_equation_a_star.PARAM_MAX_WORKERS: 2})
+        self.assertEqual([x["cost"] for x in decomposed_alignments], [x["cost"] for x in parallel_alignments])
+        # the factory aligns the log through the parallel apply_log of the version
+        parallel_alignments = align_factory.apply_log(
+            trace_log, net, marking, final_marking, version=align_factory.VERSION_DECOMPOSED_STATE_EQUATION_A_STAR,
+            parameters={align_factory.PARAM_PARALLEL: True, align_factory.PARAM_MAX_WORKERS: 2})
+        self.assertEqual(parallel_alignments, decomposed_alignments)
+        # a log move on an activity that is not in the model does not involve any shared transition
+        trace = log_instance.Trace(list(trace_log[0]) + [log_instance.Event({"concept:name": "unknown"})])
+        align = align_factory.apply_trace(trace, net, marking, final_marking,
+                                          version=align_factory.VERSION_DECOMPOSED_STATE_EQUATION_A_STAR)
+        self.assertFalse(align["approximate"])
+        self.assertEqual(align_factory.get_deviations(align), 1)
+
+    def test_alignment_variants(self):
+        # to avoid static method warnings in tests,
+        # that by construction of the unittest package have to be expressed in such way
+        self.dummy_variable = "dummy_value"
+        trace_log = xes_importer.import_log(os.path.join(INPUT_DATA_DIR, "running-example.xes"))
+        net, marking, final_marking = alpha_factory.apply(trace_log)
+        log_alignments = align_factory.apply_log(trace_log, net, marking, final_marking)
+        variants = variants_filter.get_variants_sorted_by_count(variants_filter.get_variants(trace_log))
+        result = align_factory.apply_variants(variants, net, marking, final_marking)
+        self.assertEqual(len(result["variants"]), len(variants))
+        log_fitness = alignment_based.evaluate(log_alignments)
+        for key in ["percFitTraces", "averageFitness"]:
+            self.assertAlmostEqual(result["fitness"][key], log_fitness[key])
+
+    def test_alignment_dataframe(self):
+        # to avoid static method warnings in tests,
+        # that by construction of the unittest package have to be expressed in such way
+        self.dummy_variable = "dummy_value"
+        trace_log = xes_importer.import_log(os.path.join(INPUT_DATA_DIR, "running-example.xes"))
+        net, marking, final_marking = alpha_factory.apply(trace_log)
+        dataframe = csv_import_adapter.import_dataframe_from_path(os.path.join(INPUT_DATA_DIR, "running-example.csv"),
+                                                                  sep=',')
+        result = df_alignments.apply(dataframe, net, marking, final_marking)
+        self.assertEqual(len(result["cases"]), len(trace_log))
+        log_alignments = align_factory.apply_log(trace_log, net, marking, final_marking)
+        log_fitness = alignment_based.evaluate(log_alignments)
+        for key in ["percFitTraces", "averageFitness"]:
+            self.assertAlmostEqual(result["fitness"][key], log_fitness[key])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,6 +1,8 @@
 import os
 import unittest
 
+from pm4py.algo.conformance.tokenreplay.adapters.pandas import df_token_replay
+from pm4py.algo.discovery.inductive import factory as inductive_miner
 from pm4py.algo.filtering.pandas.attributes import attributes_filter
 from pm4py.algo.filtering.pandas.auto_filter import auto_filter
 from pm4py.algo.filtering.pandas.cases import case_filter
@@ -84,6 +86,18 @@ class DataframePrefilteringTest(unittest.TestCase):
         del df2
         del df3
 
+    def test_token_replay_dataframe(self):
+        # to avoid static method warnings in tests,
+        # that by construction of the unittest package have to be expressed in such way
+        self.dummy_variable = "dummy_value"
+        input_log = os.path.join(INPUT_DATA_DIR, "running-example.csv")
+        dataframe = csv_import_adapter.import_dataframe_from_path(input_log, sep=',')
+        trace_log = transform.transform_event_log_to_trace_log(pandas_df_imp.convert_dataframe_to_event_log(dataframe))
+        net, initial_marking, final_marking = inductive_miner.apply(trace_log)
+        cases_df = df_token_replay.apply(dataframe, net, initial_marking, final_marking)
+        self.assertEqual(len(cases_df), len(trace_log))
+        self.assertTrue(cases_df["trace_is_fit"].all())
+
 
 if __name__ == "__main__":
     unittest.main()
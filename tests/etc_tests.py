@@ -17,6 +17,17 @@ class ETCTest(unittest.TestCase):
         precision = etc_factory.apply(log, net, marking, final_marking)
         del precision
 
+    def test_etc_prefix_trie(self):
+        # to avoid static method warnings in tests,
+        # that by construction of the unittest package have to be expressed in such way
+        self.dummy_variable = "dummy_value"
+        log = xes_importer.import_log(os.path.join(INPUT_DATA_DIR, "running-example.xes"))
+        net, marking, final_marking = dfg_only.apply(log, None)
+        precision_trie = etc_factory.apply(log, net, marking, final_marking, parameters={"use_prefix_trie": True})
+        precision_fake_log = etc_factory.apply(log, net, marking, final_marking,
+                                               parameters={"use_prefix_trie": False})
+        self.assertAlmostEqual(precision_trie, precision_fake_log)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,6 +1,8 @@
 import os
 import unittest
 
+from pm4py.algo.conformance.tokenreplay import multi_model
+from pm4py.algo.discovery.alpha import factory as alpha_miner
 from pm4py.algo.discovery.inductive.versions.dfg import dfg_only
 from pm4py.evaluation import factory as evaluation_factory
 from pm4py.evaluation.generalization import factory as generalization_factory
@@ -36,6 +38,19 @@ class ProcessModelEvaluationTests(unittest.TestCase):
         metrics = evaluation_factory.apply(log, net, marking, final_marking)
         del metrics
 
+    def test_multi_model_replay(self):
+        # to avoid static method warnings in tests,
+        # that by construction of the unittest package have to be expressed in such way
+        self.dummy_variable = "dummy_value"
+        log = xes_importer.import_log(os.path.join(INPUT_DATA_DIR, "running-example.xes"))
+        models = [dfg_only.apply(log, None), alpha_miner.apply(log)]
+        comparison_table = multi_model.apply(log, models, parameters={multi_model.PARAM_MAX_WORKERS: 2})
+        self.assertEqual(len(comparison_table), len(models))
+        for index, model in enumerate(models):
+            fitness = fitness_factory.apply(log, model[0], model[1], model[2])
+            for column in multi_model.FITNESS_COLUMNS:
+                self.assertAlmostEqual(comparison_table[column][index], fitness[column])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -2,7 +2,10 @@ from pm4py.objects.petri.exporter import pnml as petri_exporter
 from pm4py.objects.petri.importer import pnml as petri_importer
 from tests.constants import INPUT_DATA_DIR, OUTPUT_DATA_DIR
 from pm4py.algo.conformance.tokenreplay.versions import token_replay
+from pm4py.algo.conformance.tokenreplay import factory as token_replay_factory
+from pm4py.algo.other.playout import factory as playout_factory
 from pm4py.objects import petri
+from pm4py.objects.log import log as log_instance
 from pm4py.objects.log.importer.xes import factory as xes_importer
 from pm4py.algo.conformance.alignments.versions import state_equation_a_star
 from pm4py.objects.petri import check_soundness
@@ -10,6 +13,30 @@ import unittest
 import os
 
 
+def get_places_shortest_path_recursive(place_to_populate, current_place, places_shortest_path, actual_list,
+                                       rec_depth, max_rec_depth=50):
+    """
+    Former (recursive, depth-bounded) computation of the shortest paths between places lead by hidden transitions,
+    used as reference for the output of token_replay.get_places_shortest_path_by_hidden
+    """
+    if rec_depth > max_rec_depth:
+        return places_shortest_path
+    if place_to_populate not in places_shortest_path:
+        places_shortest_path[place_to_populate] = {}
+    for t in current_place.out_arcs:
+        if t.target.label is None:
+            for p2 in t.target.out_arcs:
+                if p2.target not in places_shortest_path[place_to_populate] or len(actual_list) + 1 < len(
+                        places_shortest_path[place_to_populate][p2.target]):
+                    new_actual_list = list(actual_list)
+                    new_actual_list.append(t.target)
+                    places_shortest_path[place_to_populate][p2.target] = list(new_actual_list)
+                    places_shortest_path = get_places_shortest_path_recursive(place_to_populate, p2.target,
+                                                                              places_shortest_path, new_actual_list,
+                                                                              rec_depth + 1, max_rec_depth)
+    return places_shortest_path
+
+
 class PetriImportExportTest(unittest.TestCase):
     def test_importingExportingPetri(self):
         # to avoid static method warnings in tests,
@@ -68,6 +95,408 @@ class PetriImportExportTest(unittest.TestCase):
             if not is_fit:
                 raise Exception("should be fit")
 
+    def test_placesShortestPathByHidden(self):
+        # to avoid static method warnings in tests,
+        # that by construction of the unittest package have to be expressed in such way
+        self.dummy_variable = "dummy_value"
+        net, marking, fmarking = petri_importer.import_net(os.path.join(INPUT_DATA_DIR, "running-example.pnml"))
+        expected = {}
+        for p in net.places:
+            expected = get_places_shortest_path_recursive(p, p, expected, [], 0)
+        shortest_paths = token_replay.get_places_shortest_path_by_hidden(net)
+        self.assertEqual(shortest_paths, expected)
+        # the second call reuses the memoised paths
+        self.assertIs(token_replay.get_places_shortest_path_by_hidden(net), shortest_paths)
+        # a chain of hidden transitions longer than the maximum depth of the former recursion
+        chain = petri.petrinet.PetriNet("chain")
+        places = [petri.petrinet.PetriNet.Place("p" + str(i)) for i in range(61)]
+        for p in places:
+            chain.places.add(p)
+        hidden = []
+        for i in range(60):
+            t = petri.petrinet.PetriNet.Transition("t" + str(i), None)
+            chain.transitions.add(t)
+            hidden.append(t)
+            petri.utils.add_arc_from_to(places[i], t, chain)
+            petri.utils.add_arc_from_to(t, places[i + 1], chain)
+        # a longer alternative path from p0 to p1
+        detour = petri.petrinet.PetriNet.Place("detour")
+        chain.places.add(detour)
+        detour_in = petri.petrinet.PetriNet.Transition("detour_in", None)
+        detour_out = petri.petrinet.PetriNet.Transition("detour_out", None)
+        chain.transitions.add(detour_in)
+        chain.transitions.add(detour_out)
+        petri.utils.add_arc_from_to(places[0], detour_in, chain)
+        petri.utils.add_arc_from_to(detour_in, detour, chain)
+        petri.utils.add_arc_from_to(detour, detour_out, chain)
+        petri.utils.add_arc_from_to(detour_out, places[1], chain)
+        shortest_paths = token_replay.get_places_shortest_path_by_hidden(chain)
+        self.assertEqual(shortest_paths[places[0]][places[60]], hidden)
+        self.assertEqual(shortest_paths[places[0]][places[2]], hidden[:2])
+        self.assertEqual(shortest_paths[places[59]][places[60]], hidden[59:])
+        self.assertNotIn(places[0], shortest_paths[places[60]])
+        self.assertNotIn(places[60], get_places_shortest_path_recursive(places[0], places[0], {}, [], 0)[places[0]])
+
+    def test_tokenReplayResultFields(self):
+        # to avoid static method warnings in tests,
+        # that by construction of the unittest package have to be expressed in such way
+        self.dummy_variable = "dummy_value"
+        net, marking, fmarking = petri_importer.import_net(os.path.join(INPUT_DATA_DIR, "running-example.pnml"))
+        log = xes_importer.import_log(os.path.join(INPUT_DATA_DIR, "running-example.xes"))
+        # each variant twice, along with its (unfit) suffix without the first event
+        for trace in list(log):
+            log.append(log_instance.Trace(list(trace)))
+            log.append(log_instance.Trace(list(trace)[1:]))
+        full_results = token_replay.apply_log(log, net, marking, fmarking)
+        results = token_replay.apply_log(log, net, marking, fmarking,
+                                         result_fields=token_replay.FITNESS_RESULT_FIELDS)
+        self.assertEqual(len(results), len(log))
+        self.assertFalse(all(x["trace_is_fit"] for x in results))
+        results_by_variant = {}
+        for trace, result, full_result in zip(log, results, full_results):
+            self.assertEqual(sorted(result.keys()), sorted(token_replay.FITNESS_RESULT_FIELDS))
+            for field in token_replay.FITNESS_RESULT_FIELDS:
+                self.assertEqual(result[field], full_result[field])
+            # the traces of the same variant share the result
+            variant = tuple(x["concept:name"] for x in trace)
+            if variant in results_by_variant:
+                self.assertIs(result, results_by_variant[variant])
+            results_by_variant[variant] = result
+        self.assertEqual(len({id(x) for x in results}), len(results_by_variant))
+
+    def test_enabledTransitionsIndex(self):
+        # to avoid static method warnings in tests,
+        # that by construction of the unittest package have to be expressed in such way
+        self.dummy_variable = "dummy_value"
+        net, marking, fmarking = petri_importer.import_net(os.path.join(INPUT_DATA_DIR, "running-example.pnml"))
+        reach_graph = petri.reachability_graph.construct_reachability_graph(net, marking)
+        consumers_index = petri.semantics.get_consumers_index(net)
+        for state in reach_graph.states:
+            curr_marking = state.data['marking']
+            enabled = petri.semantics.enabled_transitions(net, curr_marking, consumers_index=consumers_index)
+            self.assertEqual(enabled, petri.semantics.enabled_transitions(net, curr_marking))
+            for t in enabled:
+                next_marking = petri.semantics.execute(t, net, curr_marking)
+                self.assertEqual(petri.semantics.enabled_transitions_after_firing(net, t, next_marking, enabled,
+                                                                                  consumers_index=consumers_index),
+                                 petri.semantics.enabled_transitions(net, next_marking))
+
+    def test_enabledTransitionsRewiredArc(self):
+        # to avoid static method warnings in tests,
+        # that by construction of the unittest package have to be expressed in such way
+        self.dummy_variable = "dummy_value"
+        net = petri.petrinet.PetriNet("sequence")
+        places = [petri.petrinet.PetriNet.Place("p" + str(i)) for i in range(3)]
+        for p in places:
+            net.places.add(p)
+        a = petri.petrinet.PetriNet.Transition("a", "A")
+        b = petri.petrinet.PetriNet.Transition("b", "B")
+        net.transitions.add(a)
+        net.transitions.add(b)
+        petri.utils.add_arc_from_to(places[0], a, net)
+        petri.utils.add_arc_from_to(a, places[1], net)
+        arc = petri.utils.add_arc_from_to(places[1], b, net)
+        petri.utils.add_arc_from_to(b, places[2], net)
+        marking = petri.petrinet.Marking({places[0]: 1})
+        self.assertEqual(petri.semantics.enabled_transitions(net, marking), {a})
+        # rewires the arc (p1, b) to (p0, b) in place, without changing the number of places, transitions or arcs
+        net.arcs.remove(arc)
+        places[1].out_arcs.remove(arc)
+        b.in_arcs.remove(arc)
+        rewired = petri.petrinet.PetriNet.Arc(places[0], b)
+        net.arcs.add(rewired)
+        places[0].out_arcs.add(rewired)
+        b.in_arcs.add(rewired)
+        self.assertEqual(petri.semantics.enabled_transitions(net, marking), {a, b})
+
+    def test_coverabilityGraph(self):
+        # to avoid static method warnings in tests,
+        # that by construction of the unittest package have to be expressed in such way
+        self.dummy_variable = "dummy_value"
+        net = petri.petrinet.PetriNet("unbounded")
+        source = petri.petrinet.PetriNet.Place("source")
+        counter = petri.petrinet.PetriNet.Place("counter")
+        produce = petri.petrinet.PetriNet.Transition("produce", "produce")
+        consume = petri.petrinet.PetriNet.Transition("consume", "consume")
+        net.places.add(source)
+        net.places.add(counter)
+        net.transitions.add(produce)
+        net.transitions.add(consume)
+        petri.utils.add_arc_from_to(source, produce, net)
+        petri.utils.add_arc_from_to(produce, source, net)
+        petri.utils.add_arc_from_to(produce, counter, net)
+        petri.utils.add_arc_from_to(counter, consume, net)
+        marking = petri.petrinet.Marking()
+        marking[source] = 1
+        with self.assertRaises(petri.reachability_graph.StateSpaceTooLargeException):
+            petri.reachability_graph.construct_reachability_graph(net, marking, max_states=100)
+        with self.assertRaises(petri.reachability_graph.StateSpaceTooLargeException):
+            petri.reachability_graph.construct_reachability_graph(net, marking, max_time=0.5)
+        cov_graph = petri.reachability_graph.construct_reachability_graph(net, marking, coverability=True)
+        self.assertEqual(len(cov_graph.states), 2)
+        for state in cov_graph.states:
+            if state.data['marking'] != marking:
+                self.assertEqual(state.data['marking'][counter], petri.reachability_graph.OMEGA)
+        net, marking, fmarking = petri_importer.import_net(os.path.join(INPUT_DATA_DIR, "running-example.pnml"))
+        reach_graph = petri.reachability_graph.construct_reachability_graph(net, marking)
+        cov_graph = petri.reachability_graph.construct_reachability_graph(net, marking, coverability=True)
+        self.assertEqual({s.name for s in reach_graph.states}, {s.name for s in cov_graph.states})
+        self.assertEqual(len(reach_graph.transitions), len(cov_graph.transitions))
+
+    def test_stateSpaceSoundness(self):
+        # to avoid static method warnings in tests,
+        # that by construction of the unittest package have to be expressed in such way
+        self.dummy_variable = "dummy_value"
+        net, marking, fmarking = petri_importer.import_net(os.path.join(INPUT_DATA_DIR, "running-example.pnml"))
+        local = petri.state_space.explore(net, marking, fmarking, parameters={"max_workers": 1})
+        petri.net_cache.clear()
+        partitioned = petri.state_space.explore(net, marking, fmarking, parameters={"max_workers": 2})
+        self.assertEqual(local, partitioned)
+        self.assertTrue(local["sound"])
+        self.assertEqual(local["states"], 9)
+        self.assertTrue(check_soundness.check_soundness_state_space(net, marking, fmarking))
+        # a transition consuming from a place that is never marked is dead
+        place = petri.petrinet.PetriNet.Place("never_marked")
+        trans = petri.petrinet.PetriNet.Transition("dead", "dead")
+        net.places.add(place)
+        net.transitions.add(trans)
+        petri.utils.add_arc_from_to(place, trans, net)
+        result = petri.state_space.explore(net, marking, fmarking, parameters={"max_workers": 1})
+        self.assertFalse(result["sound"])
+        self.assertEqual(result["dead_transitions"], {trans})
+
+    def test_stateSpaceBound(self):
+        # to avoid static method warnings in tests,
+        # that by construction of the unittest package have to be expressed in such way
+        self.dummy_variable = "dummy_value"
+        # a bounded (and sound) net putting more tokens in a place than the default bound
+        net = petri.petrinet.PetriNet("bounded")
+        source = petri.petrinet.PetriNet.Place("source")
+        buffer = petri.petrinet.PetriNet.Place("buffer")
+        sink = petri.petrinet.PetriNet.Place("sink")
+        produce = petri.petrinet.PetriNet.Transition("produce", "produce")
+        consume = petri.petrinet.PetriNet.Transition("consume", "consume")
+        for p in [source, buffer, sink]:
+            net.places.add(p)
+        net.transitions.add(produce)
+        net.transitions.add(consume)
+        petri.utils.add_arc_from_to(source, produce, net)
+        petri.utils.add_arc_from_to(produce, buffer, net, weight=petri.state_space.DEFAULT_BOUND + 1)
+        petri.utils.add_arc_from_to(buffer, consume, net, weight=petri.state_space.DEFAULT_BOUND + 1)
+        petri.utils.add_arc_from_to(consume, sink, net)
+        marking = petri.petrinet.Marking({source: 1})
+        fmarking = petri.petrinet.Marking({sink: 1})
+        with self.assertRaises(petri.state_space.BoundExceededException):
+            petri.state_space.explore(net, marking, fmarking, parameters={"max_workers": 1})
+        with self.assertRaises(petri.state_space.BoundExceededException):
+            check_soundness.check_soundness_state_space(net, marking, fmarking, parameters={"max_workers": 2})
+        result = petri.state_space.explore(net, marking, fmarking, parameters={"bound": 100})
+        self.assertTrue(result["bounded"])
+        self.assertTrue(result["sound"])
+        # an unbounded net is detected through a marking strictly covering its predecessor
+        consume_again = petri.petrinet.PetriNet.Transition("consume_again", "consume_again")
+        net.transitions.add(consume_again)
+        petri.utils.add_arc_from_to(sink, consume_again, net)
+        petri.utils.add_arc_from_to(consume_again, sink, net)
+        petri.utils.add_arc_from_to(consume_again, buffer, net)
+        result = petri.state_space.explore(net, marking, fmarking, parameters={"bound": 100})
+        self.assertFalse(result["bounded"])
+        self.assertFalse(result["sound"])
+
+    def test_netCache(self):
+        # to avoid static method warnings in tests,
+        # that by construction of the unittest package have to be expressed in such way
+        self.dummy_variable = "dummy_value"
+        net1, marking1, fmarking1 = petri_importer.import_net(os.path.join(INPUT_DATA_DIR, "running-example.pnml"))
+        net2, marking2, fmarking2 = petri_importer.import_net(os.path.join(INPUT_DATA_DIR, "running-example.pnml"))
+        self.assertEqual(petri.net_cache.get_fingerprint(net1, marking1, fmarking1),
+                         petri.net_cache.get_fingerprint(net2, marking2, fmarking2))
+        self.assertNotEqual(petri.net_cache.get_fingerprint(net1, marking1, fmarking1),
+                            petri.net_cache.get_fingerprint(net1, fmarking1, marking1))
+        calls = []
+        petri.net_cache.get(net1, marking1, fmarking1, "test", lambda: calls.append(1) or len(calls))
+        self.assertEqual(petri.net_cache.get(net2, marking2, fmarking2, "test", lambda: calls.append(1) or len(calls)),
+                         1)
+        # artefacts bound to the net are not shared between structurally equal nets
+        self.assertEqual(petri.net_cache.get(net1, None, None, "test", lambda: net1, bound_to_net=True), net1)
+        self.assertEqual(petri.net_cache.get(net2, None, None, "test", lambda: net2, bound_to_net=True), net2)
+        # modifying the net through petri.utils invalidates its fingerprint
+        fingerprint = petri.net_cache.get_fingerprint(net1)
+        petri.utils.remove_transition(net1, list(net1.transitions)[0])
+        self.assertNotEqual(petri.net_cache.get_fingerprint(net1), fingerprint)
+        self.assertEqual(petri.net_cache.get(net1, marking1, fmarking1, "test", lambda: calls.append(1) or len(calls)),
+                         2)
+        # hiding a transition in place changes the fingerprint as well
+        fingerprint = petri.net_cache.get_fingerprint(net1)
+        [t for t in net1.transitions if t.label is not None][0].label = None
+        self.assertNotEqual(petri.net_cache.get_fingerprint(net1), fingerprint)
+        # as well as changing the weight of an arc, or rewiring it, in place
+        fingerprint = petri.net_cache.get_fingerprint(net1)
+        arc = list(net1.arcs)[0]
+        arc.weight = 2
+        self.assertNotEqual(petri.net_cache.get_fingerprint(net1), fingerprint)
+        fingerprint = petri.net_cache.get_fingerprint(net1)
+        other_place = [p for p in net1.places if p is not arc.source and p is not arc.target][0]
+        net1.arcs.remove(arc)
+        rewired = petri.petrinet.PetriNet.Arc(other_place, arc.target) if arc.target in net1.transitions else \
+            petri.petrinet.PetriNet.Arc(arc.source, other_place)
+        net1.arcs.add(rewired)
+        self.assertNotEqual(petri.net_cache.get_fingerprint(net1), fingerprint)
+        self.assertEqual(petri.net_cache.get_fingerprint(net1),
+                         petri.net_cache.get_fingerprint(net1, memoised=False))
+
+    def test_incidenceMatrix(self):
+        # to avoid static method warnings in tests,
+        # that by construction of the unittest package have to be expressed in such way
+        self.dummy_variable = "dummy_value"
+        net, marking, fmarking = petri_importer.import_net(os.path.join(INPUT_DATA_DIR, "running-example.pnml"))
+        matrix = petri.incidence_matrix.construct(net)
+        self.assertEqual(matrix.a_matrix.shape, (len(net.places), len(net.transitions)))
+        self.assertEqual(abs(matrix.a_matrix - (matrix.post_matrix - matrix.pre_matrix)).sum(), 0)
+        for t in net.transitions:
+            column = matrix.a_matrix[:, matrix.transitions[t]].toarray().flatten()
+            self.assertEqual(column.sum(), len(t.out_arcs) - len(t.in_arcs))
+            self.assertIs(matrix.transitions_array[matrix.transitions[t]], t)
+        vector = matrix.encode_marking(marking)
+        self.assertEqual(vector.sum(), sum(marking.values()))
+        for p in marking:
+            self.assertEqual(vector[matrix.places[p]], marking[p])
+            self.assertIs(matrix.places_array[matrix.places[p]], p)
+
+    def test_netReduction(self):
+        # to avoid static method warnings in tests,
+        # that by construction of the unittest package have to be expressed in such way
+        self.dummy_variable = "dummy_value"
+        net = petri.petrinet.PetriNet("chain")
+        places = [petri.petrinet.PetriNet.Place("p" + str(i)) for i in range(4)]
+        trans = [petri.petrinet.PetriNet.Transition("t0", "A"), petri.petrinet.PetriNet.Transition("t1", None),
+                 petri.petrinet.PetriNet.Transition("t2", "B")]
+        for p in places:
+            net.places.add(p)
+        for i, t in enumerate(trans):
+            net.transitions.add(t)
+            petri.utils.add_arc_from_to(places[i], t, net)
+            petri.utils.add_arc_from_to(t, places[i + 1], net)
+        marking = petri.petrinet.Marking({places[0]: 1})
+        fmarking = petri.petrinet.Marking({places[3]: 1})
+        reduced_net, reduced_im, reduced_fm, corr = petri.reduction.apply(net, marking, fmarking)
+        self.assertEqual(len(net.transitions), 3)
+        self.assertEqual(len(reduced_net.transitions), 2)
+        self.assertEqual(len(reduced_net.places), 3)
+        self.assertTrue(check_soundness.check_soundness_state_space(reduced_net, reduced_im, reduced_fm))
+        self.assertFalse([t for t in reduced_net.transitions if t.label is None])
+        fired = sorted(reduced_net.transitions, key=lambda t: t.label)
+        self.assertEqual(petri.reduction.map_transitions(fired, corr)[0], trans[0])
+        self.assertEqual(petri.reduction.map_transitions(fired, corr)[-1], trans[2])
+        reach_graph = petri.reachability_graph.construct_reachability_graph(reduced_net, reduced_im)
+        self.assertEqual(len(reach_graph.states), 3)
+        trace_log = xes_importer.import_log(os.path.join(INPUT_DATA_DIR, "running-example.xes"))
+        net, marking, fmarking = petri_importer.import_net(os.path.join(INPUT_DATA_DIR, "running-example.pnml"))
+        replayed = token_replay_factory.apply(trace_log, net, marking, fmarking)
+        replayed_reduced = token_replay_factory.apply(trace_log, net, marking, fmarking,
+                                                      parameters={token_replay_factory.PARAM_REDUCE_NET: True})
+        self.assertEqual([x["trace_is_fit"] for x in replayed], [x["trace_is_fit"] for x in replayed_reduced])
+        for x in replayed_reduced:
+            self.assertTrue(all(t in net.transitions for t in x["activated_transitions"]))
+
+    def test_pnmlStringRoundTrip(self):
+        # to avoid static method warnings in tests,
+        # that by construction of the unittest package have to be expressed in such way
+        self.dummy_variable = "dummy_value"
+        net = petri.petrinet.PetriNet("weighted")
+        source = petri.petrinet.PetriNet.Place("source & <start>")
+        sink = petri.petrinet.PetriNet.Place("sink")
+        visible = petri.petrinet.PetriNet.Transition("t1", "A & \"B\"")
+        silent = petri.petrinet.PetriNet.Transition("t2", None)
+        net.places.add(source)
+        net.places.add(sink)
+        net.transitions.add(visible)
+        net.transitions.add(silent)
+        petri.utils.add_arc_from_to(source, visible, net, weight=2)
+        petri.utils.add_arc_from_to(visible, sink, net)
+        petri.utils.add_arc_from_to(sink, silent, net)
+        petri.utils.add_arc_from_to(silent, sink, net, weight=3)
+        marking = petri.petrinet.Marking({source: 2})
+        fmarking = petri.petrinet.Marking({sink: 1})
+        petri_string = petri_exporter.export_petri_as_string(net, marking, final_marking=fmarking)
+        for imported in [petri_importer.import_petri_from_string(petri_string),
+                         petri_importer.import_petri_from_string(petri_string.decode("utf-8"))]:
+            imported_net, imported_marking, imported_fmarking = imported
+            self.assertEqual(sorted((t.name, str(t.label)) for t in imported_net.transitions),
+                             [("t1", "A & \"B\""), ("t2", "None")])
+            self.assertEqual(sorted((a.source.name, a.target.name, a.weight) for a in imported_net.arcs),
+                             sorted((a.source.name, a.target.name, a.weight) for a in net.arcs))
+            self.assertEqual([(p.name, n) for p, n in imported_marking.items()], [("source & <start>", 2)])
+            self.assertEqual([(p.name, n) for p, n in imported_fmarking.items()], [("sink", 1)])
+
+    def test_playout(self):
+        # to avoid static method warnings in tests,
+        # that by construction of the unittest package have to be expressed in such way
+        self.dummy_variable = "dummy_value"
+        net, marking, fmarking = petri_importer.import_net(os.path.join(INPUT_DATA_DIR, "running-example.pnml"))
+        parameters = {"noTraces": 2500, "seed": 42}
+        log1 = playout_factory.apply(net, marking, parameters=parameters)
+        log2 = playout_factory.apply(net, marking, parameters=dict(parameters, max_workers=2))
+        variants1 = [[x["concept:name"] for x in trace] for trace in log1]
+        self.assertEqual(len(log1), 2500)
+        self.assertEqual(variants1, [[x["concept:name"] for x in trace] for trace in log2])
+        aligned_traces = token_replay.apply_log(log1, net, marking, fmarking)
+        self.assertTrue(all(x["trace_is_fit"] for x in aligned_traces))
+        playout_factory.apply_to_xes(net, marking, os.path.join(OUTPUT_DATA_DIR, "playout.xes"), parameters=parameters)
+        log3 = xes_importer.import_log(os.path.join(OUTPUT_DATA_DIR, "playout.xes"))
+        self.assertEqual(variants1, [[x["concept:name"] for x in trace] for trace in log3])
+        os.remove(os.path.join(OUTPUT_DATA_DIR, "playout.xes"))
+        # more chunks than the ones kept in flight by the workers; the traces of a chunk do not depend on the
+        # number of traces of the playout
+        playout_factory.apply_to_xes(net, marking, os.path.join(OUTPUT_DATA_DIR, "playout.xes"),
+                                     parameters=dict(parameters, noTraces=5500, max_workers=2))
+        log4 = xes_importer.import_log(os.path.join(OUTPUT_DATA_DIR, "playout.xes"))
+        self.assertEqual(len(log4), 5500)
+        self.assertEqual(variants1, [[x["concept:name"] for x in trace] for trace in log4][:len(log1)])
+        os.remove(os.path.join(OUTPUT_DATA_DIR, "playout.xes"))
+
+    def test_variants(self):
+        # to avoid static method warnings in tests,
+        # that by construction of the unittest package have to be expressed in such way
+        self.dummy_variable = "dummy_value"
+        # two concurrent sequences of two activities each
+        net = petri.petrinet.PetriNet("parallel")
+        source = petri.petrinet.PetriNet.Place("source")
+        sink = petri.petrinet.PetriNet.Place("sink")
+        split = petri.petrinet.PetriNet.Transition("split", None)
+        join = petri.petrinet.PetriNet.Transition("join", None)
+        net.places.add(source)
+        net.places.add(sink)
+        net.transitions.add(split)
+        net.transitions.add(join)
+        petri.utils.add_arc_from_to(source, split, net)
+        petri.utils.add_arc_from_to(join, sink, net)
+        for branch in ["a", "b"]:
+            previous = split
+            for i in range(2):
+                place = petri.petrinet.PetriNet.Place(branch + str(i))
+                trans = petri.petrinet.PetriNet.Transition(branch + str(i), branch + str(i))
+                net.places.add(place)
+                net.transitions.add(trans)
+                petri.utils.add_arc_from_to(previous, place, net)
+                petri.utils.add_arc_from_to(place, trans, net)
+                previous = trans
+            place = petri.petrinet.PetriNet.Place(branch + "_end")
+            net.places.add(place)
+            petri.utils.add_arc_from_to(previous, place, net)
+            petri.utils.add_arc_from_to(place, join, net)
+        marking = petri.petrinet.Marking({source: 1})
+        fmarking = petri.petrinet.Marking({sink: 1})
+        variants = petri.utils.variants(net, marking, fmarking)
+        self.assertEqual(len(variants), 6)
+        self.assertEqual(len(set(tuple(v) for v in variants)), 6)
+        self.assertIn(["split", "a0", "a1", "b0", "b1", "join"], variants)
+        self.assertIn(["split", "b0", "a0", "b1", "a1", "join"], variants)
+        self.assertEqual(petri.utils.variants(net, marking, fmarking, count_only=True), 6)
+        net, marking, fmarking = petri_importer.import_net(os.path.join(INPUT_DATA_DIR, "running-example.pnml"))
+        with self.assertRaises(Exception):
+            petri.utils.variants(net, marking, fmarking)
+
 
 if __name__ == "__main__":
     unittest.main()